@@ -0,0 +1 @@
+"""가짜 YouTube/CDN 서버를 사용하는 오프라인 성능 측정 도구"""
@@ -0,0 +1,248 @@
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# 미디어 내용을 만드는 반복 패턴 크기 (큰 파일도 메모리를 이만큼만 사용)
+PATTERN_SIZE = 1024 * 1024
+
+# 대역폭 제한 시 한 번에 보내는 크기
+SEND_SIZE = 64 * 1024
+
+# 가짜 영상의 포맷 (itag, mimeType, qualityLabel, 전체 크기 대비 비율)
+FORMATS = (
+    (22, 'video/mp4; codecs="avc1.64001F, mp4a.40.2"', '720p', 1.0),
+    (18, 'video/mp4; codecs="avc1.42001E, mp4a.40.2"', '360p', 0.4),
+    (140, 'audio/mp4; codecs="mp4a.40.2"', None, 0.1),
+)
+
+_RANGE = re.compile(r'bytes=(\d+)-(\d*)')
+
+
+class FakeYouTubeServer:
+    """YouTube 시청 페이지, 플레이어 데이터, Range 요청을 지원하는 미디어를 흉내 내는 로컬 HTTP 서버
+    
+    GET  /watch?v=ID              ytInitialPlayerResponse가 들어 있는 시청 페이지
+    POST /youtubei/v1/player      플레이어 데이터 JSON {"videoId": ID}
+    GET  /videoplayback?id=&itag= 미디어 (Range 요청 지원)
+    GET  /files/NAME              add_file()로 등록한 내용 (Range 요청 지원, 실제 미디어 샘플 등)
+    
+    응답마다 latency초를 기다린 뒤 헤더를 보내고, bandwidth(bytes/s)를 지정하면 연결마다
+    그 속도를 넘지 않도록 나누어 보낸다. 미디어 내용은 (영상 ID, itag)와 위치로 정해지므로
+    서버가 실행되는 동안 같은 구간은 언제 받아도 같다. ranges=False이면 Range 헤더를 무시하고
+    항상 전체 내용을 200으로 보낸다. cut_after를 지정하면 200 응답은 Content-Length 없이 앞의
+    cut_after바이트만 보내고 연결을 닫는다 (길이 없이 보내다 끊긴 응답).
+    """
+    def __init__(self, media_size=32 * 1024 * 1024, latency=0.0, bandwidth=None, ranges=True,
+                 cut_after=None, host='127.0.0.1', port=0):
+        self.media_size = media_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.ranges = ranges
+        self.cut_after = cut_after
+        self.pattern = os.urandom(PATTERN_SIZE)
+        self.requests = 0
+        self.files = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self._thread = None
+    
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-youtube", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+    
+    def watch_url(self, video_id):
+        return f"{self.base_url}/watch?v={video_id}"
+    
+    def media_url(self, video_id, itag=22):
+        # 실제 스트림 URL처럼 만료 시각을 넣어 메타데이터 캐시가 그대로 다룰 수 있게 함
+        return f"{self.base_url}/videoplayback?id={video_id}&itag={itag}&expire={int(time.time()) + 6 * 3600}"
+    
+    def add_file(self, name, data, content_type='application/octet-stream'):
+        """data를 /files/name으로 내보내고 URL 반환"""
+        self.files[name] = (data, content_type)
+        return f"{self.base_url}/files/{name}"
+    
+    def format_size(self, itag):
+        for format_itag, _, _, ratio in FORMATS:
+            if format_itag == itag:
+                return max(1, int(self.media_size * ratio))
+        return None
+    
+    def media(self, video_id, itag, start, end):
+        """(영상 ID, itag)의 [start, end] 구간 내용"""
+        offset = (zlib.crc32(f"{video_id}:{itag}".encode()) + start) % PATTERN_SIZE
+        size = end - start + 1
+        chunks = []
+        while size > 0:
+            chunk = self.pattern[offset:offset + size]
+            chunks.append(chunk)
+            size -= len(chunk)
+            offset = 0
+        return b''.join(chunks)
+    
+    def player_response(self, video_id):
+        """innertube 플레이어 응답과 같은 구조의 딕셔너리"""
+        formats = []
+        adaptive_formats = []
+        for itag, mime_type, quality, _ in FORMATS:
+            entry = {
+                'itag': itag,
+                'url': self.media_url(video_id, itag),
+                'mimeType': mime_type,
+                'contentLength': str(self.format_size(itag)),
+            }
+            if quality:
+                entry['qualityLabel'] = quality
+                entry['fps'] = 30
+                formats.append(entry)
+            else:
+                entry['averageBitrate'] = 128000
+                adaptive_formats.append(entry)
+        return {
+            'videoDetails': {
+                'videoId': video_id,
+                'title': f"Benchmark video {video_id}",
+                'author': "Benchmark",
+                'lengthSeconds': '600',
+                'viewCount': '1000',
+                'shortDescription': "",
+                'thumbnail': {'thumbnails': [{'url': f"{self.base_url}/vi/{video_id}/hqdefault.jpg"}]},
+            },
+            'streamingData': {'formats': formats, 'adaptiveFormats': adaptive_formats},
+        }
+    
+    def _count(self):
+        with self._lock:
+            self.requests += 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 헤더와 본문을 따로 보내므로 Nagle 알고리즘 때문에 응답이 늦어지지 않도록 함
+    disable_nagle_algorithm = True
+    
+    def log_message(self, *args):
+        pass
+    
+    @property
+    def fake(self):
+        return self.server.fake
+    
+    def do_GET(self):
+        self.fake._count()
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        if parts.path == '/watch' and 'v' in query:
+            player = json.dumps(self.fake.player_response(query['v'][0]))
+            page = f"<html><body><script>var ytInitialPlayerResponse = {player};</script></body></html>"
+            self.send_body(200, page.encode('utf-8'), 'text/html; charset=utf-8')
+        elif parts.path == '/videoplayback' and 'id' in query:
+            self.send_media(query['id'][0], int(query.get('itag', ['22'])[0]))
+        elif parts.path.startswith('/files/') and parts.path[len('/files/'):] in self.fake.files:
+            data, content_type = self.fake.files[parts.path[len('/files/'):]]
+            self.send_ranged(len(data), lambda start, end: data[start:end + 1], content_type)
+        else:
+            self.send_body(404, b'not found', 'text/plain')
+    
+    def do_POST(self):
+        self.fake._count()
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if urlsplit(self.path).path != '/youtubei/v1/player':
+            self.send_body(404, b'not found', 'text/plain')
+            return
+        try:
+            video_id = json.loads(body or b'{}')['videoId']
+        except (ValueError, KeyError):
+            self.send_body(400, b'videoId required', 'text/plain')
+            return
+        self.send_body(200, json.dumps(self.fake.player_response(video_id)).encode('utf-8'), 'application/json')
+    
+    def send_media(self, video_id, itag):
+        total = self.fake.format_size(itag)
+        if total is None:
+            self.send_body(404, b'unknown itag', 'text/plain')
+            return
+        self.send_ranged(total, lambda start, end: self.fake.media(video_id, itag, start, end), 'video/mp4')
+    
+    def send_ranged(self, total, read, content_type):
+        """전체 크기가 total인 내용을 Range 헤더에 맞춰 보냄 (read(start, end)는 [start, end] 구간 내용)"""
+        match = _RANGE.match(self.headers.get('Range') or '') if self.fake.ranges else None
+        if match:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) if match.group(2) else total - 1, total - 1)
+            if start >= total:
+                self.send_body(416, b'', 'text/plain', {'Content-Range': f"bytes */{total}"})
+                return
+            status, extra = 206, {'Content-Range': f"bytes {start}-{end}/{total}"}
+        else:
+            start, end = 0, total - 1
+            status, extra = 200, {}
+        self.wait_latency()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        if status == 200 and self.fake.cut_after is not None:
+            end = min(end, self.fake.cut_after - 1)
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        else:
+            self.send_header('Content-Length', str(end - start + 1))
+        if self.fake.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        for name, value in extra.items():
+            self.send_header(name, value)
+        self.end_headers()
+        
+        # 큰 구간도 한꺼번에 만들지 않고 SEND_SIZE씩 보냄
+        position = start
+        sent_at = time.monotonic()
+        try:
+            while position <= end:
+                size = min(SEND_SIZE, end - position + 1)
+                self.wfile.write(read(position, position + size - 1))
+                position += size
+                if self.fake.bandwidth:
+                    sent_at += size / self.fake.bandwidth
+                    delay = sent_at - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+        except (ConnectionError, OSError):
+            # 클라이언트가 먼저 끊음 (취소 등)
+            self.close_connection = True
+    
+    def send_body(self, status, body, content_type, headers=None):
+        self.wait_latency()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def wait_latency(self):
+        if self.fake.latency:
+            time.sleep(self.fake.latency)
@@ -0,0 +1,511 @@
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# 저장소 최상위에서 python bench/run.py로 실행해도 core를 찾도록 함
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.fake_server import FakeYouTubeServer
+from core.database import Database
+from core.metadata_cache import MetadataCache
+from core.scheduler import WorkerPool
+from core.segmented import SegmentedDownloader
+from core.transport import get_transport
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# 비교하는 측정값의 접미사 (나머지는 설정값)와 그중 작을수록 좋은 것 (나머지는 클수록 좋음)
+METRIC_SUFFIXES = ('_ms', '_us', '_seconds', '_mbps', '_rss_mb')
+LOWER_IS_BETTER = ('_ms', '_us', '_seconds', '_rss_mb')
+
+# 시작 시간 예산 (ms, 중앙값 기준). 넘으면 결과에 표시하고 종료 코드 1
+# core_import_ms: 핵심 모듈 불러오기, window_ms: 창이 뜰 때까지, history_ms: 히스토리 첫 페이지까지
+STARTUP_BUDGET_MS = {'core_import_ms': 250, 'window_ms': 1500, 'history_ms': 2000}
+
+_PLAYER_RESPONSE = re.compile(r'var ytInitialPlayerResponse = (\{.*?\});</script>', re.S)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def summarize(samples, scale=1000.0, unit='ms'):
+    """초 단위 표본을 {median_<unit>, p95_<unit>, max_<unit>}로 요약"""
+    return {
+        f'median_{unit}': round(statistics.median(samples) * scale, 3),
+        f'p95_{unit}': round(percentile(samples, 0.95) * scale, 3),
+        f'max_{unit}': round(max(samples) * scale, 3),
+    }
+
+
+def peak_rss_mb():
+    """지금까지의 최대 메모리 사용량 (MB, 알 수 없으면 None)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS는 바이트, 리눅스는 KB
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def player_to_info(player):
+    """플레이어 응답을 앱의 영상 정보 딕셔너리(core.youtube.build_video_info와 같은 구조)로 변환"""
+    details = player['videoDetails']
+    info = {
+        'id': details['videoId'],
+        'title': details['title'],
+        'description': details['shortDescription'],
+        'author': details['author'],
+        'length': int(details['lengthSeconds']),
+        'publish_date': "Unknown",
+        'views': int(details['viewCount']),
+        'rating': None,
+        'thumbnail_url': details['thumbnail']['thumbnails'][-1]['url'],
+        'video_formats': {},
+        'audio_formats': {},
+    }
+    streaming = player['streamingData']
+    for entry in streaming['formats'] + streaming['adaptiveFormats']:
+        format_info = {
+            'itag': entry['itag'],
+            'mime_type': entry['mimeType'].split(';')[0],
+            'extension': entry['mimeType'].split(';')[0].split('/')[1],
+            'file_size': int(entry['contentLength']),
+            'url': entry['url'],
+            'default_filename': f"{details['videoId']}.mp4",
+        }
+        if 'qualityLabel' in entry:
+            format_info.update(resolution=entry['qualityLabel'], fps=entry['fps'], progressive=True)
+            info['video_formats'].setdefault(entry['qualityLabel'], []).append(format_info)
+        else:
+            format_info['abr'] = f"{entry['averageBitrate'] // 1000}kbps"
+            info['audio_formats'].setdefault(format_info['abr'], []).append(format_info)
+    return info
+
+
+class _DownloadTask:
+    """WorkerPool에 넣는 구간 분할 다운로드 작업 (끝나면 done을 놓음)"""
+    def __init__(self, downloader, done, on_first_byte):
+        self.downloader = downloader
+        self.downloader.progress_callback = self._on_progress
+        self.done = done
+        self.on_first_byte = on_first_byte
+        self.first_byte = False
+        self.error = None
+    
+    def _on_progress(self, downloaded, total):
+        if not self.first_byte:
+            self.first_byte = True
+            self.on_first_byte()
+    
+    def run(self):
+        try:
+            self.downloader.download()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.release()
+    
+    def cancel(self):
+        self.downloader.cancel()
+
+
+def bench_throughput(server, work_dir, jobs, workers, segments):
+    """jobs개의 파일을 workers개의 작업자와 파일당 segments개의 연결로 받는 속도"""
+    size = server.format_size(22)
+    pool = WorkerPool(max_workers=workers, name="bench")
+    done = threading.Semaphore(0)
+    first_bytes = []
+    tasks = []
+    started = time.monotonic()
+    for index in range(jobs):
+        video_id = f"tp{index}"
+        downloader = SegmentedDownloader(
+            server.media_url(video_id), os.path.join(work_dir, f"{video_id}.mp4"), size,
+            segments=segments, resume_key=f"bench-{started}-{index}"
+        )
+        task = _DownloadTask(downloader, done, lambda: first_bytes.append(time.monotonic() - started))
+        pool.submit(video_id, task)
+        tasks.append(task)
+    for _ in range(jobs):
+        done.acquire()
+    elapsed = time.monotonic() - started
+    pool.shutdown()
+    
+    errors = [str(task.error) for task in tasks if task.error]
+    if errors:
+        raise RuntimeError(f"다운로드 실패: {errors[0]}")
+    total = size * jobs
+    for task in tasks:
+        os.remove(task.downloader.file_path)
+    return {
+        'jobs': jobs,
+        'workers': workers,
+        'segments': segments,
+        'bytes': total,
+        'elapsed_seconds': round(elapsed, 3),
+        'throughput_mbps': round(total / elapsed / 1000000, 2),
+        'first_byte_ms': round(min(first_bytes) * 1000, 3) if first_bytes else None,
+    }
+
+
+def bench_ttfb(server, samples):
+    """미디어 Range 요청의 첫 바이트까지 걸리는 시간 (연결 풀의 연결 재사용 포함)"""
+    transport = get_transport()
+    url = server.media_url('ttfb')
+    
+    async def first_byte():
+        started = time.perf_counter()
+        async with await transport.open('GET', url, {'Range': 'bytes=0-65535'}) as response:
+            await response.read(1)
+            elapsed = time.perf_counter() - started
+            await response.read_all()
+        return elapsed
+    
+    results = [transport.run(first_byte()) for _ in range(samples)]
+    return dict(samples=samples, **summarize(results))
+
+
+def bench_metadata(server, work_dir, samples):
+    """시청 페이지와 플레이어 데이터를 받아 영상 정보를 만드는 시간과 메타데이터 캐시 조회 시간"""
+    transport = get_transport()
+    page_samples = []
+    player_samples = []
+    infos = []
+    for index in range(samples):
+        video_id = f"meta{index}"
+        # 시청 페이지에서 플레이어 데이터를 꺼내고, 플레이어 API로 스트림 정보를 다시 받음
+        started = time.perf_counter()
+        page = transport.fetch(server.watch_url(video_id)).decode('utf-8')
+        json.loads(_PLAYER_RESPONSE.search(page).group(1))
+        page_samples.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        player = json.loads(transport.run(transport.request(
+            'POST', f"{server.base_url}/youtubei/v1/player",
+            {'Content-Type': 'application/json'}, json.dumps({'videoId': video_id}).encode('utf-8')
+        ))[1])
+        infos.append(player_to_info(player))
+        player_samples.append(time.perf_counter() - started)
+    
+    db_path = os.path.join(work_dir, 'metadata.db')
+    db = Database(db_path)
+    cache = MetadataCache(db)
+    try:
+        put_samples = []
+        for info in infos:
+            started = time.perf_counter()
+            cache.put(info['id'], info)
+            put_samples.append(time.perf_counter() - started)
+        memory_samples = []
+        for info in infos:
+            started = time.perf_counter()
+            cache.get(info['id'])
+            memory_samples.append(time.perf_counter() - started)
+    finally:
+        db.close()
+    
+    # 새 캐시는 메모리가 비어 있으므로 SQLite에서 읽음
+    db = Database(db_path)
+    cache = MetadataCache(db)
+    try:
+        disk_samples = []
+        for info in infos:
+            started = time.perf_counter()
+            cache.get(info['id'])
+            disk_samples.append(time.perf_counter() - started)
+    finally:
+        db.close()
+    return {
+        'samples': samples,
+        'watch_page': summarize(page_samples),
+        'player': summarize(player_samples),
+        'total': summarize([page + player for page, player in zip(page_samples, player_samples)]),
+        'cache_put': summarize(put_samples, 1000000.0, 'us'),
+        'cache_memory_hit': summarize(memory_samples, 1000000.0, 'us'),
+        'cache_disk_hit': summarize(disk_samples, 1000000.0, 'us'),
+    }
+
+
+class _NoopTask:
+    def __init__(self, done):
+        self.done = done
+    
+    def run(self):
+        self.done.release()
+    
+    def cancel(self):
+        pass
+
+
+def bench_scheduler(jobs, workers):
+    """아무 일도 하지 않는 작업 jobs개를 넣고 모두 끝날 때까지 걸리는 시간 (작업자 풀 자체의 비용)"""
+    pool = WorkerPool(max_workers=workers, name="bench-noop")
+    done = threading.Semaphore(0)
+    started = time.perf_counter()
+    for index in range(jobs):
+        pool.submit(index, _NoopTask(done), priority=index % 3)
+    submitted = time.perf_counter() - started
+    for _ in range(jobs):
+        done.acquire()
+    elapsed = time.perf_counter() - started
+    stats = pool.stats()
+    pool.shutdown()
+    return {
+        'jobs': jobs,
+        'workers': workers,
+        'submit_ms': round(submitted * 1000, 3),
+        'drain_ms': round(elapsed * 1000, 3),
+        'per_job_us': round(elapsed / jobs * 1000000, 3),
+        'max_wait_ms': round(stats['max_wait'] * 1000, 3),
+    }
+
+
+def fill_history(db, rows):
+    """히스토리에 가짜 기록 rows개 추가 (50개마다 제목에 'lofi'가 들어감)"""
+    for index in range(rows):
+        db.add_to_history(
+            f"vid{index:07d}", f"Benchmark video {index} lofi mix" if index % 50 == 0 else f"Benchmark video {index}",
+            f"https://www.youtube.com/watch?v=vid{index:07d}", f"/downloads/video{index}.mp4", None,
+            'mp4', '720p', 50000000 + index, author=f"Channel {index % 100}", itag=22
+        )
+    db.flush()
+
+
+def bench_history(server, work_dir, rows, page_size=200):
+    """히스토리 rows개에서 첫 페이지, 전체 페이지, 검색 첫 페이지를 읽는 시간 (PyQt6가 있으면 목록 그리기 포함)"""
+    db = Database(os.path.join(work_dir, 'history.db'))
+    try:
+        started = time.perf_counter()
+        fill_history(db, rows)
+        insert = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        first_page = db.get_history_page(page_size)
+        first = time.perf_counter() - started
+        
+        # HistoryModel.fetchMore()와 같은 방식으로 끝까지 읽음
+        started = time.perf_counter()
+        page = first_page
+        loaded = len(page)
+        while len(page) == page_size:
+            page = db.get_history_page(page_size, before=(page[-1][8], page[-1][0]))
+            loaded += len(page)
+        all_pages = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        db.get_history_page(page_size, search="lofi")
+        search = time.perf_counter() - started
+        
+        result = {
+            'rows': rows,
+            'insert_ms': round(insert * 1000, 3),
+            'first_page_ms': round(first * 1000, 3),
+            'all_pages_ms': round(all_pages * 1000, 3),
+            'loaded_rows': loaded,
+            'search_first_page_ms': round(search * 1000, 3),
+            'render_ms': bench_history_render(server, work_dir, db),
+        }
+    finally:
+        db.close()
+    return result
+
+
+def bench_history_render(server, work_dir, db):
+    """히스토리 목록 위젯을 만들어 첫 화면을 그리는 시간 (PyQt6가 없으면 None)"""
+    try:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt6.QtWidgets import QApplication
+        import main
+    except ImportError:
+        return None
+    app = QApplication.instance() or QApplication([])
+    # 썸네일도 가짜 서버에 요청하고 사용자 캐시 폴더를 건드리지 않음
+    main.thumbnail_url = lambda video_id: f"{server.base_url}/vi/{video_id}/hqdefault.jpg"
+    thumbnail_cache = main.ThumbnailCache(db, cache_dir=os.path.join(work_dir, 'thumbnails'))
+    started = time.perf_counter()
+    model = main.HistoryModel(db)
+    model.reload()
+    widget = main.DownloadHistoryWidget(model, main.ThumbnailLoader(thumbnail_cache))
+    widget.resize(900, 700)
+    widget.grab()
+    app.processEvents()
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def bench_startup(server, work_dir, runs, rows):
+    """새 인터프리터에서 앱을 runs번 시작하여 잰 시작 시간 (bench/startup.py 참고)
+    
+    앱 데이터 폴더를 임시 폴더로 바꾸고 히스토리 rows개를 넣어 둔 상태에서 실행한다. 첫 실행은
+    바이트코드를 만드는 데 시간이 들어 버린다.
+    """
+    home = os.path.join(work_dir, 'home')
+    os.makedirs(home, exist_ok=True)
+    db = Database(os.path.join(home, '.youtube_downloader.db'))
+    fill_history(db, rows)
+    db.close()
+    env = dict(os.environ, HOME=home, USERPROFILE=home, QT_QPA_PLATFORM='offscreen')
+    for name in ('YTDL_METRICS_PORT', 'YTDL_METRICS_LOG', 'YTDL_TRACE'):
+        env.pop(name, None)
+    cmd = [sys.executable, os.path.join(ROOT, 'bench', 'startup.py'), server.base_url]
+    
+    samples = []
+    process = []
+    for index in range(runs + 1):
+        started = time.perf_counter()
+        output = subprocess.run(cmd, cwd=work_dir, env=env, capture_output=True, text=True, check=True).stdout
+        elapsed = time.perf_counter() - started
+        if index:
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+            process.append(elapsed)
+    
+    result = {'runs': runs, 'rows': rows, 'gui': 'window_ms' in samples[0]}
+    for name in samples[0]:
+        if name.endswith('_ms'):
+            result[name] = round(statistics.median(sample[name] for sample in samples), 3)
+    result['modules'] = samples[0]['modules']
+    # 인터프리터 시작과 종료까지 포함한 프로세스 전체 시간
+    result['process_ms'] = round(statistics.median(process) * 1000, 3)
+    result['budget_ms'] = {name: budget for name, budget in STARTUP_BUDGET_MS.items() if name in result}
+    result['over_budget'] = [name for name, budget in result['budget_ms'].items() if result[name] > budget]
+    return result
+
+
+def git_version():
+    """벤치마크한 코드의 커밋 (git이 없으면 None)"""
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=""):
+    """중첩된 결과를 'scenario.metric' 키의 숫자 값으로 펼침"""
+    values = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            values.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[name] = value
+    return values
+
+
+def compare(previous, current):
+    """이전 결과와 비교한 줄 목록 (10% 넘게 나빠진 값에는 ! 표시)"""
+    before = flatten(previous['results'])
+    after = flatten(current['results'])
+    lines = [f"{previous.get('version') or '?'} -> {current.get('version') or '?'}"]
+    if previous.get('config') != current.get('config'):
+        lines.append("경고: 측정 설정이 달라 직접 비교하기 어렵습니다")
+    for name in sorted(after):
+        if not name.endswith(METRIC_SUFFIXES) or not before.get(name):
+            continue
+        change = (after[name] - before[name]) / before[name] * 100
+        worse = change > 0 if name.endswith(LOWER_IS_BETTER) else change < 0
+        mark = "!" if worse and abs(change) >= 10 else " "
+        lines.append(f"{mark} {name:<40} {before[name]:>12} -> {after[name]:>12}  ({change:+.1f}%)")
+    return lines
+
+
+def run(args):
+    """모든 시나리오를 실행하고 결과 딕셔너리 반환"""
+    work_dir = tempfile.mkdtemp(prefix="ytdl-bench-")
+    server = FakeYouTubeServer(
+        media_size=args.size * 1024 * 1024, latency=args.latency / 1000,
+        bandwidth=args.bandwidth * 1000 if args.bandwidth else None
+    ).start()
+    results = {}
+    scenarios = [
+        ('throughput', lambda: bench_throughput(server, work_dir, args.jobs, args.workers, args.segments)),
+        ('ttfb', lambda: bench_ttfb(server, args.samples)),
+        ('metadata', lambda: bench_metadata(server, work_dir, args.samples)),
+        ('scheduler', lambda: bench_scheduler(args.queue, args.workers)),
+        ('history', lambda: bench_history(server, work_dir, args.rows)),
+        ('startup', lambda: bench_startup(server, work_dir, args.startup_runs, args.rows)),
+    ]
+    try:
+        for name, scenario in scenarios:
+            if args.only and name not in args.only:
+                continue
+            print(f"{name}...", file=sys.stderr)
+            results[name] = scenario()
+            results[name]['peak_rss_mb'] = peak_rss_mb()
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        'version': git_version(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'size_mb': args.size, 'latency_ms': args.latency, 'bandwidth_kbps': args.bandwidth,
+            'jobs': args.jobs, 'workers': args.workers, 'segments': args.segments,
+            'samples': args.samples, 'queue': args.queue, 'rows': args.rows, 'startup_runs': args.startup_runs,
+        },
+        'results': results,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="bench/run.py", description="가짜 YouTube/CDN 서버로 다운로드 핵심 모듈 성능 측정")
+    parser.add_argument('-o', '--output', help="결과 JSON 파일 (없으면 표준 출력)")
+    parser.add_argument('--compare', metavar='JSON', help="이전 결과 파일과 비교하여 출력")
+    parser.add_argument('--only', nargs='+', choices=('throughput', 'ttfb', 'metadata', 'scheduler', 'history', 'startup'),
+                        help="실행할 시나리오")
+    parser.add_argument('--size', type=int, default=32, help="720p 미디어 크기 (MB)")
+    parser.add_argument('--latency', type=float, default=0.0, help="응답마다 지연 (밀리초)")
+    parser.add_argument('--bandwidth', type=int, default=0, help="연결별 대역폭 (KB/s, 0은 무제한)")
+    parser.add_argument('--jobs', type=int, default=4, help="throughput에서 받을 파일 수")
+    parser.add_argument('--workers', type=int, default=3, help="동시 다운로드 수")
+    parser.add_argument('--segments', type=int, default=4, help="파일당 연결 수")
+    parser.add_argument('--samples', type=int, default=50, help="ttfb/metadata 표본 수")
+    parser.add_argument('--queue', type=int, default=1000, help="scheduler에서 넣을 작업 수")
+    parser.add_argument('--rows', type=int, default=10000, help="history/startup 히스토리 행 수")
+    parser.add_argument('--startup-runs', type=int, default=10, help="startup에서 앱을 시작할 횟수")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        print("\n".join(compare(previous, report)), file=sys.stderr)
+    over_budget = report['results'].get('startup', {}).get('over_budget')
+    if over_budget:
+        print(f"시작 시간 예산 초과: {', '.join(over_budget)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""새 인터프리터에서 앱의 시작 시간을 재는 스크립트 (bench/run.py의 startup 시나리오가 실행)
+
+결과는 JSON 한 줄로 표준 출력에 쓴다. 시각은 모두 이 스크립트가 실행되기 시작한 때부터이며,
+PyQt6가 없으면 GUI가 시작할 때 불러오는 핵심 모듈을 불러오는 시간만 잰다.
+"""
+import json
+import os
+import sys
+import time
+
+started = time.perf_counter()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# main.py가 시작할 때 불러오는 core 모듈 (다운로드, 일괄 다운로드, 변환, 합치기, 중복 색인은 처음 쓸 때 불러옴)
+CORE_MODULES = (
+    'core.database', 'core.youtube', 'core.manager', 'core.metadata_cache', 'core.progress', 'core.ratelimit',
+    'core.thumbnails', 'core.transport', 'core.metrics', 'core.tracing', 'core.watchdog', 'core.storage',
+)
+
+# 히스토리 첫 페이지를 기다리는 최대 시간 (초)
+HISTORY_TIMEOUT = 10
+
+
+def elapsed_ms():
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+def main(argv):
+    import importlib
+    
+    result = {}
+    for name in CORE_MODULES:
+        importlib.import_module(name)
+    result['core_import_ms'] = elapsed_ms()
+    result['modules'] = len(sys.modules)
+    
+    try:
+        from PyQt6.QtWidgets import QApplication
+    except ImportError:
+        print(json.dumps(result))
+        return 0
+    
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    import main as app_main
+    result['import_ms'] = elapsed_ms()
+    if argv:
+        # 썸네일은 가짜 서버에 요청
+        app_main.thumbnail_url = lambda video_id: f"{argv[0]}/vi/{video_id}/hqdefault.jpg"
+    
+    app = QApplication([])
+    window = app_main.MainWindow()
+    window.show()
+    app.processEvents()
+    result['window_ms'] = elapsed_ms()
+    
+    # 히스토리는 창을 띄운 뒤 이벤트 루프에서 채워짐
+    deadline = time.monotonic() + HISTORY_TIMEOUT
+    while not window.history_model.rowCount() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    result['history_ms'] = elapsed_ms()
+    result['history_rows'] = window.history_model.rowCount()
+    result['modules'] = len(sys.modules)
+    print(json.dumps(result))
+    
+    window.on_quit()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
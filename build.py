@@ -1,8 +1,22 @@
 import os
 import sys
+import argparse
 import platform
 import subprocess
 
+# 앱이 쓰지 않는 Qt 모듈 (--trim-qt로 빌드하면 포함하지 않음, QtCore/QtGui/QtWidgets만 사용)
+UNUSED_QT_MODULES = [
+    "QtBluetooth", "QtDBus", "QtDesigner", "QtHelp", "QtMultimedia", "QtMultimediaWidgets",
+    "QtNetwork", "QtNfc", "QtOpenGL", "QtOpenGLWidgets", "QtPdf", "QtPdfWidgets", "QtPositioning",
+    "QtPrintSupport", "QtQml", "QtQuick", "QtQuick3D", "QtQuickWidgets", "QtRemoteObjects",
+    "QtSensors", "QtSerialPort", "QtSql", "QtSpatialAudio", "QtSvg", "QtSvgWidgets", "QtTest",
+    "QtTextToSpeech", "QtWebChannel", "QtWebEngineCore", "QtWebEngineWidgets", "QtWebSockets",
+    "QtXml", "Qt3DCore",
+]
+
+# 실행 파일에 넣지 않을 표준 라이브러리 모듈
+UNUSED_MODULES = ["tkinter", "unittest", "pydoc", "test", "lib2to3"]
+
 # 필요한 라이브러리 확인 및 설치
 def install_requirements():
     print("필요한 라이브러리 설치 중...")
@@ -17,7 +31,8 @@ def install_requirements():
     print("라이브러리 설치 완료")
 
 # PyInstaller로 실행 파일 빌드
-def build_executable():
+# onefile은 실행할 때마다 임시 폴더에 압축을 풀어 시작이 느리므로, 빠른 시작이 필요하면 onedir 사용
+def build_executable(mode="onefile", trim_qt=False):
     os_type = platform.system()
     print(f"{os_type} 운영체제용 빌드를 시작합니다...")
     
@@ -39,10 +54,18 @@ def build_executable():
     cmd = [
         "pyinstaller",
         "--name=YouTubeDownloader",
-        "--onefile",
+        f"--{mode}",
         "--windowed",
+        "--noconfirm",
     ]
     
+    # 쓰지 않는 모듈을 빼면 묶음 크기와 압축 해제/로드 시간이 줄어듦
+    for module in UNUSED_MODULES:
+        cmd.append(f"--exclude-module={module}")
+    if trim_qt:
+        for module in UNUSED_QT_MODULES:
+            cmd.append(f"--exclude-module=PyQt6.{module}")
+    
     if icon_path:
         cmd.append(f"--icon={icon_path}")
     
@@ -58,10 +81,14 @@ def build_executable():
     print("빌드 완료!")
     
     # 빌드된 파일 경로 안내
-    if os_type == "Windows":
-        print("실행 파일 위치: dist/YouTubeDownloader.exe")
-    elif os_type == "Darwin":
+    if os_type == "Darwin":
         print("실행 파일 위치: dist/YouTubeDownloader.app")
+    elif mode == "onedir":
+        # 폴더째로 배포해야 함
+        executable = "YouTubeDownloader.exe" if os_type == "Windows" else "YouTubeDownloader"
+        print(f"실행 파일 위치: dist/YouTubeDownloader/{executable}")
+    elif os_type == "Windows":
+        print("실행 파일 위치: dist/YouTubeDownloader.exe")
     else:
         print("실행 파일 위치: dist/YouTubeDownloader")
 
@@ -69,9 +96,17 @@ if __name__ == "__main__":
     print("YouTube 동영상 다운로더 빌드 스크립트")
     print("====================================")
     
+    parser = argparse.ArgumentParser(description="PyInstaller로 실행 파일 빌드")
+    parser.add_argument("--mode", choices=["onefile", "onedir"], default="onefile",
+                        help="onefile: 파일 하나 (실행할 때마다 압축 해제), onedir: 폴더 (시작이 빠름)")
+    parser.add_argument("--trim-qt", action="store_true", help="쓰지 않는 Qt 모듈을 빼고 빌드")
+    parser.add_argument("--skip-install", action="store_true", help="라이브러리 설치 건너뛰기")
+    args = parser.parse_args()
+    
     try:
-        install_requirements()
-        build_executable()
+        if not args.skip_install:
+            install_requirements()
+        build_executable(args.mode, args.trim_qt)
     except Exception as e:
         print(f"오류 발생: {e}")
         sys.exit(1)
\ No newline at end of file
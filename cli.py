@@ -0,0 +1,694 @@
+import argparse
+import json
+import signal
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Qt 없이 다운로드 핵심 모듈만 사용 (서버 등 GUI가 없는 환경용)
+from core.database import Database
+from core.dedupe import DuplicateIndex
+from core.youtube import resolve_video_info
+from core.download import DownloadJob
+from core.manager import DownloadManager
+from core.metadata_cache import MetadataCache, iter_formats
+from core.metrics import get_metrics, start_exporters
+from core.tracing import start_tracing, stop_tracing
+from core.ratelimit import get_rate_limiter, parse_schedule
+from core.progress import ProgressTracker, REPORT_INTERVAL, format_eta
+from core.batch import BatchJob, FORMAT_RULES, parse_url_list, read_url_file, select_format
+from core.thumbnails import ThumbnailCache
+from core.transcode import AUDIO_FORMATS, TranscodePool
+from core.storage import FSYNC_POLICIES
+from core.transport import get_transport
+from core.integrity import CORRUPTED, MISSING, OK, SIZE_MISMATCH, TRUNCATED, UNKNOWN, verify_files
+
+# 작업 상태 중 더 이상 바뀌지 않는 상태
+FINISHED_STATES = ('completed', 'failed', 'cancelled')
+
+
+def format_size(size):
+    if not size:
+        return "?"
+    return f"{size/1000000:.1f}MB"
+
+
+class JobRunner:
+    """다운로드 관리자로 작업을 실행하고 결과를 데이터베이스에 기록
+    
+    Database는 어느 스레드에서나 쓸 수 있으므로 작업자/HTTP 스레드가 바로 기록하고,
+    메인 스레드는 run_until()에서 진행 상황 표본만 만든다.
+    """
+    def __init__(self, db, metadata_cache, thumbnail_cache, download_path, max_workers, on_event=None, fsync=None):
+        self.db = db
+        self.metadata_cache = metadata_cache
+        self.thumbnail_cache = thumbnail_cache
+        self.download_path = download_path
+        self.fsync = fsync
+        self.manager = DownloadManager(max_workers)
+        self.on_event = on_event
+        self.jobs = {}
+        self.batches = {}
+        self._lock = threading.Lock()
+        self.progress = ProgressTracker()
+        # 음성 변환은 다운로드 작업자와 별개로 CPU 코어 수만큼 실행
+        self.transcoder = TranscodePool()
+        # 이미 받은 파일은 다시 받지 않고 링크
+        self.duplicates = DuplicateIndex(db)
+    
+    def submit(self, url, itag, download_path=None, filename=None, title=None, priority=0,
+               batch_id=None, download_id=None, limit=None, weight=1.0, convert=None):
+        """다운로드 작업 추가 후 작업 ID 반환 (어느 스레드에서나 호출 가능, limit은 KB/s, convert는 음성 변환 형식)"""
+        download_id = download_id or uuid.uuid4().hex[:12]
+        download_path = download_path or self.download_path
+        record = {
+            'id': download_id,
+            'url': url,
+            'itag': itag,
+            'title': title or url,
+            'batch': batch_id,
+            'status': 'queued',
+            'downloaded': 0,
+            'total': 0,
+            'speed': 0.0,
+            'eta': None,
+            'convert': convert,
+            'convert_progress': None,
+            'reused': None,
+            'file_path': None,
+            'error': None,
+        }
+        with self._lock:
+            self.jobs[download_id] = record
+        
+        # 종료되어도 다음 실행 때 이어받을 수 있도록 기록
+        self.db.add_pending_download(download_id, url, itag, download_path, filename, record['title'], convert)
+        
+        if limit or weight != 1.0:
+            self.set_rate_limit(limit, download_id, weight)
+        job = DownloadJob(
+            url, itag, download_path, filename, self.metadata_cache,
+            on_progress=lambda done, total: self.progress.update(download_id, done, total),
+            on_completed=lambda info: self._on_completed(download_id, info),
+            on_error=lambda message: self._on_error(download_id, message),
+            thumbnail_cache=self.thumbnail_cache,
+            rate_key=download_id,
+            convert=convert,
+            transcoder=self.transcoder,
+            on_transcode=lambda status, percentage: self._on_transcode(download_id, percentage),
+            duplicates=self.duplicates,
+            fsync=self.fsync
+        )
+        # 받아 둔 같은 파일을 캐시만으로 찾으면 대기열에 넣지 않고 바로 완료 처리
+        if not job.reuse_cached():
+            self.manager.add_download(download_id, job, lambda status: self._set_status(download_id, status), priority)
+        return download_id
+    
+    def submit_batch(self, urls, rule, download_path=None, priority=0, convert=None):
+        """URL 목록(재생목록/채널 포함)을 규칙에 맞는 포맷으로 추가하고 일괄 작업 ID 반환"""
+        batch_id = uuid.uuid4().hex[:12]
+        batch = {'id': batch_id, 'rule': rule, 'finished': False, 'errors': [], 'job': None}
+        
+        def on_item(url, info, format_info):
+            self.submit(url, format_info['itag'], download_path, title=info['title'],
+                        priority=priority, batch_id=batch_id, convert=convert)
+        
+        def on_error(url, message):
+            batch['errors'].append(f"{url}: {message}")
+            self._emit('batch_error', {'url': url, 'error': message})
+        
+        def on_finished(resolved, failed):
+            batch['finished'] = True
+        
+        batch['job'] = BatchJob(
+            urls, rule,
+            resolve=lambda url: resolve_video_info(url, self.metadata_cache),
+            on_item=on_item, on_error=on_error, on_finished=on_finished
+        )
+        with self._lock:
+            self.batches[batch_id] = batch
+        batch['job'].start()
+        return batch_id
+    
+    def resume_pending(self):
+        """이전 실행에서 끝나지 않은 다운로드를 다시 추가"""
+        pending = self.db.get_pending_downloads()
+        for download_id, url, itag, download_path, filename, title, convert in pending:
+            self.submit(url, itag, download_path, filename, title, download_id=download_id, convert=convert)
+        return len(pending)
+    
+    def set_rate_limit(self, limit, download_id=None, weight=1.0):
+        """속도 제한 변경 (KB/s, 0이나 None은 무제한, download_id가 없으면 전체 제한)
+        
+        진행 중인 다운로드에도 바로 반영된다.
+        """
+        limiter = get_rate_limiter()
+        if download_id is None:
+            limiter.set_limit((limit or 0) * 1000)
+        else:
+            limiter.configure(download_id, limit=(limit or 0) * 1000, weight=weight)
+    
+    def cancel(self, download_id):
+        with self._lock:
+            record = self.jobs.get(download_id)
+        if record is None or record['status'] in FINISHED_STATES:
+            return False
+        self.manager.remove_download(download_id)
+        self.db.remove_pending_download(download_id)
+        self._set_status(download_id, 'cancelled')
+        return True
+    
+    def snapshot(self):
+        """모든 작업 상태 목록 (진행 중인 작업은 마지막 진행 상황 표본 포함)"""
+        progress = self.progress.snapshot()['downloads']
+        with self._lock:
+            return [self._with_progress(record, progress) for record in self.jobs.values()]
+    
+    def get(self, download_id):
+        progress = self.progress.snapshot()['downloads']
+        with self._lock:
+            record = self.jobs.get(download_id)
+            return self._with_progress(record, progress) if record else None
+    
+    def stats(self):
+        jobs = self.snapshot()
+        states = {}
+        for record in jobs:
+            states[record['status']] = states.get(record['status'], 0) + 1
+        return {
+            'jobs': states,
+            'progress': self.progress.snapshot()['total'],
+            'queue': self.manager.get_stats(),
+            'transcode': self.transcoder.stats(),
+            'transport': get_transport().stats(),
+            'metadata_cache': {'hits': self.metadata_cache.hits, 'misses': self.metadata_cache.misses},
+            'rate_limit': get_rate_limiter().stats(),
+        }
+    
+    def idle(self):
+        """모든 일괄 작업과 다운로드가 끝났는지 확인"""
+        with self._lock:
+            batches_done = all(batch['finished'] for batch in self.batches.values())
+            jobs_done = all(record['status'] in FINISHED_STATES for record in self.jobs.values())
+        return batches_done and jobs_done
+    
+    def run_until(self, done, interval=REPORT_INTERVAL, on_tick=None):
+        """메인 스레드에서 진행 상황 표본을 만들면서 done()이 참이 될 때까지 대기"""
+        last_sample = 0
+        while not done():
+            time.sleep(interval)
+            now = time.monotonic()
+            if now - last_sample >= REPORT_INTERVAL:
+                last_sample = now
+                self.progress.sample(now)
+                if on_tick:
+                    on_tick()
+        self.db.flush()
+    
+    def shutdown(self):
+        """일괄 작업과 다운로드를 멈추고 남은 기록 처리 (받은 구간은 이어받을 수 있도록 남겨 둠)"""
+        with self._lock:
+            batches = list(self.batches.values())
+        for batch in batches:
+            batch['job'].cancel()
+        self.manager.clear_all()
+        self.transcoder.shutdown()
+        self.db.flush()
+    
+    @staticmethod
+    def _with_progress(record, progress):
+        record = dict(record)
+        if record['id'] in progress:
+            record.update(progress[record['id']])
+        return record
+    
+    def _set_status(self, download_id, status):
+        with self._lock:
+            record = self.jobs.get(download_id)
+            if record is None or record['status'] in FINISHED_STATES:
+                return
+            record['status'] = status
+        if status == 'active':
+            self.progress.register(download_id)
+        elif status in FINISHED_STATES or status == 'converting':
+            self.progress.remove(download_id)
+        self._emit(status, record)
+    
+    def _on_transcode(self, download_id, percentage):
+        """다 받은 뒤 변환 대기/진행 상황 기록 (변환 작업자 스레드)"""
+        with self._lock:
+            record = self.jobs.get(download_id)
+            if record is None:
+                return
+            record['convert_progress'] = percentage
+            started = record['status'] == 'active'
+        if started:
+            self._set_status(download_id, 'converting')
+    
+    def _on_completed(self, download_id, info):
+        # 이미 같은 자리에 있던 파일은 기록이 있으므로 다시 추가하지 않음
+        if info.get('reused') != 'existing':
+            self.db.add_to_history(
+                info['video_id'], info['title'], info['url'], info['file_path'],
+                info['thumbnail_path'], info['format'], info['resolution'], info['file_size'],
+                author=info.get('author'), itag=info.get('itag'), content_hash=info.get('content_hash')
+            )
+        self.db.remove_pending_download(download_id)
+        self.manager.download_completed(download_id)
+        self.progress.remove(download_id)
+        with self._lock:
+            self.jobs[download_id].update(title=info['title'], file_path=info['file_path'], reused=info.get('reused'),
+                                          downloaded=info['file_size'], total=info['file_size'])
+        self._set_status(download_id, 'completed')
+    
+    def _on_error(self, download_id, message):
+        self.db.remove_pending_download(download_id)
+        self.manager.download_completed(download_id)
+        self.progress.remove(download_id)
+        with self._lock:
+            self.jobs[download_id]['error'] = message
+        self._set_status(download_id, 'failed')
+    
+    def _emit(self, event, data):
+        if self.on_event:
+            self.on_event(event, data)
+
+
+def print_event(event, data):
+    """작업 상태 변화를 표준 오류로 출력"""
+    if event == 'completed':
+        reused = f" (받아 둔 파일 사용: {data['reused']})" if data.get('reused') else ""
+        print(f"[완료] {data['title']} -> {data['file_path']}{reused}", file=sys.stderr)
+    elif event == 'failed':
+        print(f"[오류] {data['title']}: {data['error']}", file=sys.stderr)
+    elif event == 'batch_error':
+        print(f"[오류] {data['url']}: {data['error']}", file=sys.stderr)
+    elif event == 'active':
+        print(f"[시작] {data['title']}", file=sys.stderr)
+    elif event == 'converting':
+        print(f"[변환] {data['title']} -> {data['convert']}", file=sys.stderr)
+
+
+def open_runner(args, on_event=print_event):
+    db = Database(args.db)
+    settings = db.get_settings()
+    metadata_cache = MetadataCache(db)
+    # GUI가 없으므로 썸네일은 줄이지 않고 원본으로 저장
+    thumbnail_cache = ThumbnailCache(db)
+    workers = getattr(args, 'jobs', None) or settings['max_concurrent_downloads']
+    download_path = getattr(args, 'output', None) or settings['download_path']
+    
+    # 속도 제한은 설정값(GUI와 공유)을 쓰고 --limit-rate로 덮어씀
+    limiter = get_rate_limiter()
+    limit = getattr(args, 'limit_rate', None)
+    limiter.set_limit((settings['rate_limit'] if limit is None else limit) * 1000)
+    limiter.set_schedule(parse_schedule(settings['rate_schedule']))
+    fsync = getattr(args, 'fsync', None) or settings['fsync_policy']
+    runner = JobRunner(db, metadata_cache, thumbnail_cache, download_path, workers, on_event, fsync)
+    
+    # --auto 또는 설정의 자동 모드 (-j를 지정하면 자동 모드에서는 최댓값으로 사용)
+    jobs = getattr(args, 'jobs', None)
+    if getattr(args, 'auto', False) or (settings['auto_concurrency'] and jobs is None and hasattr(args, 'jobs')):
+        runner.manager.set_auto_concurrency(True, settings['auto_min_downloads'], jobs or settings['auto_max_downloads'])
+    return runner
+
+
+def close_runner(runner):
+    runner.shutdown()
+    runner.db.close()
+
+
+def wait_for_jobs(runner):
+    """모든 작업이 끝날 때까지 대기하고 실패한 작업이 있으면 1 반환"""
+    try:
+        runner.run_until(runner.idle)
+    except KeyboardInterrupt:
+        print("중단합니다. 받은 구간은 다음에 이어받습니다.", file=sys.stderr)
+        return 130
+    failed = any(record['status'] == 'failed' for record in runner.snapshot())
+    failed = failed or any(batch['errors'] for batch in runner.batches.values())
+    return 1 if failed else 0
+
+
+def cmd_fetch(args):
+    db = Database(args.db)
+    try:
+        info = resolve_video_info(args.url, MetadataCache(db))
+    finally:
+        db.close()
+    
+    if args.json:
+        print(json.dumps(info, ensure_ascii=False, indent=2))
+        return 0
+    
+    minutes, seconds = divmod(info['length'] or 0, 60)
+    print(f"제목: {info['title']}")
+    print(f"채널: {info['author']}")
+    print(f"길이: {minutes}:{seconds:02d}")
+    print(f"조회수: {info['views']:,}" if info['views'] else "조회수: ?")
+    print("포맷:")
+    for format_info in iter_formats(info):
+        quality = format_info.get('resolution') or format_info.get('abr')
+        # 영상 전용 스트림은 음성 스트림과 합쳐서 받음 (ffmpeg 필요)
+        merged = "" if format_info.get('progressive', True) else f"  + 음성 {format_info['audio_itag']}"
+        print(f"  {format_info['itag']:>4}  {quality:<8} {format_info['extension']:<5} {format_size(format_info['file_size'])}{merged}")
+    return 0
+
+
+def cmd_download(args):
+    runner = open_runner(args)
+    try:
+        itag = args.itag
+        title = None
+        if itag is None:
+            info = resolve_video_info(args.url, runner.metadata_cache)
+            format_info = select_format(info, args.rule)
+            if format_info is None:
+                print("규칙에 맞는 포맷이 없습니다", file=sys.stderr)
+                return 1
+            itag = format_info['itag']
+            title = info['title']
+        download_id = runner.submit(args.url, itag, filename=args.filename, title=title, convert=args.convert)
+        
+        def show_progress():
+            record = runner.get(download_id)
+            if record['status'] == 'converting':
+                percentage = record['convert_progress']
+                print(f"\r변환 중 {'' if percentage is None or percentage < 0 else f'{percentage}%'}" + " " * 40,
+                      end='', file=sys.stderr)
+            elif record['status'] == 'active' and record['total']:
+                percentage = int(record['downloaded'] / record['total'] * 100)
+                print(f"\r{percentage}% - {format_size(record['downloaded'])}/{format_size(record['total'])}"
+                      f" · {format_size(record['speed'])}/s · 남은 시간 {format_eta(record['eta'])}  ",
+                      end='', file=sys.stderr)
+        
+        try:
+            runner.run_until(runner.idle, on_tick=show_progress)
+        except KeyboardInterrupt:
+            print("\n중단합니다. 받은 구간은 다음에 이어받습니다.", file=sys.stderr)
+            return 130
+        print(file=sys.stderr)
+        return 0 if runner.get(download_id)['status'] == 'completed' else 1
+    finally:
+        close_runner(runner)
+
+
+def cmd_batch(args):
+    urls = list(args.urls)
+    if args.file:
+        urls += read_url_file(args.file)
+    if not args.urls and not args.file and not sys.stdin.isatty():
+        urls += parse_url_list(sys.stdin.read())
+    if not urls:
+        print("받을 URL이 없습니다", file=sys.stderr)
+        return 1
+    
+    runner = open_runner(args)
+    try:
+        runner.submit_batch(urls, args.rule, convert=args.convert)
+        return wait_for_jobs(runner)
+    finally:
+        close_runner(runner)
+
+
+def cmd_history(args):
+    db = Database(args.db)
+    try:
+        rows = db.get_history_page(args.limit, search=args.search)
+    finally:
+        db.close()
+    
+    keys = ('id', 'video_id', 'title', 'url', 'file_path', 'thumbnail_path', 'format', 'resolution', 'download_date',
+            'file_size', 'author')
+    if args.json:
+        print(json.dumps([dict(zip(keys, row)) for row in rows], ensure_ascii=False, indent=2))
+        return 0
+    for row in rows:
+        item = dict(zip(keys, row))
+        print(f"{item['download_date']}  {item['resolution'] or '':<8} {format_size(item['file_size']):>9}  {item['title']}")
+    return 0
+
+
+# verify 결과 표시 (정상은 출력하지 않음)
+VERIFY_LABELS = {
+    OK: "정상",
+    CORRUPTED: "손상",
+    TRUNCATED: "잘림",
+    SIZE_MISMATCH: "크기 다름",
+    MISSING: "없음",
+    UNKNOWN: "해시 없음",
+}
+
+
+def cmd_verify(args):
+    db = Database(args.db)
+    try:
+        rows = db.get_history_files(search=args.search)
+    finally:
+        db.close()
+    
+    files = {row[0]: row for row in rows}
+    counts = dict.fromkeys(VERIFY_LABELS, 0)
+    
+    def on_result(history_id, status):
+        counts[status] += 1
+        if status != OK and not args.json:
+            _, title, file_path, _, _ = files[history_id]
+            print(f"[{VERIFY_LABELS[status]}] {title}  {file_path}")
+    
+    results = verify_files(
+        [(history_id, file_path, file_size, content_hash)
+         for history_id, _, file_path, file_size, content_hash in rows],
+        workers=args.jobs, on_result=on_result
+    )
+    
+    if args.json:
+        print(json.dumps([{'id': history_id, 'title': files[history_id][1], 'file_path': files[history_id][2],
+                           'status': status} for history_id, status in results], ensure_ascii=False, indent=2))
+    else:
+        summary = ", ".join(f"{label} {counts[status]}" for status, label in VERIFY_LABELS.items())
+        print(f"확인 {len(results)}개: {summary}")
+    damaged = counts[CORRUPTED] + counts[TRUNCATED] + counts[SIZE_MISMATCH]
+    return 1 if damaged else 0
+
+
+class DaemonHandler(BaseHTTPRequestHandler):
+    """다운로드 데몬의 HTTP API
+    
+      GET    /jobs         작업 목록
+      GET    /jobs/<id>    작업 상태
+      POST   /jobs         작업 추가 {"url", "itag" 또는 "rule", "path", "filename", "priority", "limit", "weight",
+                                    "convert"}
+      DELETE /jobs/<id>    작업 취소
+      POST   /limit        속도 제한 변경 {"limit": KB/s (0은 무제한), "id": 작업 ID (없으면 전체), "weight"}
+      GET    /stats        전체 진행 상황, 다운로드/변환 대기열, 연결 풀, 캐시, 속도 제한 통계
+      GET    /metrics      단계별 소요 시간, 대기 시간, 호스트별 전송량과 재시도 수 (Prometheus, JSON은 /metrics.json)
+    """
+    runner = None
+    
+    def do_GET(self):
+        if self.path == '/jobs':
+            self.send_json(200, self.runner.snapshot())
+        elif self.path.startswith('/jobs/'):
+            record = self.runner.get(self.path[len('/jobs/'):])
+            if record is None:
+                self.send_json(404, {'error': "작업을 찾을 수 없습니다"})
+            else:
+                self.send_json(200, record)
+        elif self.path == '/stats':
+            self.send_json(200, self.runner.stats())
+        elif self.path == '/metrics':
+            body = get_metrics().prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        elif self.path == '/metrics.json':
+            self.send_json(200, get_metrics().snapshot())
+        else:
+            self.send_json(404, {'error': "알 수 없는 경로입니다"})
+    
+    def do_POST(self):
+        if self.path == '/limit':
+            self.post_limit()
+            return
+        if self.path != '/jobs':
+            self.send_json(404, {'error': "알 수 없는 경로입니다"})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            url = request['url']
+            limit = int(request.get('limit') or 0)
+            weight = float(request.get('weight', 1.0))
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, {'error': "url이 필요합니다"})
+            return
+        
+        rule = request.get('rule', 'best')
+        if rule not in FORMAT_RULES:
+            self.send_json(400, {'error': f"알 수 없는 규칙입니다: {rule}"})
+            return
+        
+        convert = request.get('convert')
+        if convert is not None and convert not in AUDIO_FORMATS:
+            self.send_json(400, {'error': f"알 수 없는 변환 형식입니다: {convert}"})
+            return
+        
+        priority = int(request.get('priority', 0))
+        if request.get('itag') is not None:
+            download_id = self.runner.submit(url, int(request['itag']), request.get('path'),
+                                             request.get('filename'), priority=priority,
+                                             limit=limit, weight=weight, convert=convert)
+            self.send_json(202, {'id': download_id})
+        else:
+            # 재생목록/채널 URL도 규칙에 맞는 포맷으로 펼쳐서 추가
+            batch_id = self.runner.submit_batch([url], rule, request.get('path'), priority, convert)
+            self.send_json(202, {'batch': batch_id})
+    
+    def post_limit(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+            limit = int(request['limit'])
+            weight = float(request.get('weight', 1.0))
+        except (ValueError, KeyError, TypeError):
+            self.send_json(400, {'error': "limit(KB/s)이 필요합니다"})
+            return
+        download_id = request.get('id')
+        if download_id is not None and self.runner.get(download_id) is None:
+            self.send_json(404, {'error': "작업을 찾을 수 없습니다"})
+            return
+        self.runner.set_rate_limit(limit, download_id, weight)
+        self.send_json(200, get_rate_limiter().stats())
+    
+    def do_DELETE(self):
+        if self.path.startswith('/jobs/') and self.runner.cancel(self.path[len('/jobs/'):]):
+            self.send_json(200, {'cancelled': True})
+        else:
+            self.send_json(404, {'error': "취소할 작업을 찾을 수 없습니다"})
+    
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def cmd_daemon(args):
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    
+    runner = open_runner(args)
+    resumed = runner.resume_pending()
+    
+    handler = type('Handler', (DaemonHandler,), {'runner': runner})
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="http", daemon=True).start()
+    print(f"다운로드 데몬 실행 중: http://{args.host}:{server.server_port} (이어받기 {resumed}개)", file=sys.stderr)
+    
+    try:
+        runner.run_until(stop.is_set)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        close_runner(runner)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="YouTube 동영상 다운로더 (GUI 없이 실행)")
+    parser.add_argument('--db', help="데이터베이스 파일 경로 (기본: ~/.youtube_downloader.db)")
+    parser.add_argument('--metrics-port', metavar='[HOST:]PORT',
+                        help="단계별 소요 시간과 전송량을 /metrics(Prometheus), /metrics.json으로 제공 (기본: $YTDL_METRICS_PORT)")
+    parser.add_argument('--metrics-log', metavar='PATH', help="측정값 요약을 1분마다 기록할 파일 (5MB마다 돌려 씀, 기본: $YTDL_METRICS_LOG)")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="작업 단계를 Chrome trace JSON으로 기록해 종료할 때 저장 (Perfetto에서 열기, 기본: $YTDL_TRACE)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    fetch = commands.add_parser('fetch', help="영상 정보와 포맷 목록 출력")
+    fetch.add_argument('url')
+    fetch.add_argument('--json', action='store_true', help="JSON으로 출력")
+    fetch.set_defaults(func=cmd_fetch)
+    
+    download = commands.add_parser('download', help="영상 하나 다운로드")
+    download.add_argument('url')
+    download.add_argument('--itag', type=int, help="받을 포맷의 itag (fetch로 확인)")
+    download.add_argument('--rule', choices=FORMAT_RULES, default='best', help="itag를 지정하지 않을 때 포맷 규칙")
+    download.add_argument('-o', '--output', help="저장 폴더 (기본: 설정의 다운로드 폴더)")
+    download.add_argument('--filename', help="파일명")
+    download.add_argument('--convert', choices=AUDIO_FORMATS, help="받은 뒤 음성을 이 형식으로 변환 (ffmpeg 필요)")
+    download.add_argument('--limit-rate', type=int, metavar='KB/s', help="최대 다운로드 속도 (기본: 설정값, 0은 무제한)")
+    download.add_argument('--fsync', choices=FSYNC_POLICIES, help="디스크 동기화: none(운영체제에 맡김), finish(완료할 때), block(블록마다) (기본: 설정값)")
+    download.set_defaults(func=cmd_download)
+    
+    batch = commands.add_parser('batch', help="여러 영상, 재생목록, 채널 일괄 다운로드")
+    batch.add_argument('urls', nargs='*', help="URL 목록 (없으면 표준 입력에서 읽음)")
+    batch.add_argument('-f', '--file', help="URL 목록 텍스트 파일")
+    batch.add_argument('--rule', choices=FORMAT_RULES, default='best', help="포맷 규칙")
+    batch.add_argument('-o', '--output', help="저장 폴더 (기본: 설정의 다운로드 폴더)")
+    batch.add_argument('-j', '--jobs', type=int, help="동시 다운로드 수 (기본: 설정값)")
+    batch.add_argument('--auto', action='store_true', help="처리량과 스로틀 응답에 따라 동시 다운로드 수와 구간 수 자동 조정 (-j는 최댓값)")
+    batch.add_argument('--convert', choices=AUDIO_FORMATS, help="받은 뒤 음성을 이 형식으로 변환 (ffmpeg 필요)")
+    batch.add_argument('--limit-rate', type=int, metavar='KB/s', help="최대 다운로드 속도 (기본: 설정값, 0은 무제한)")
+    batch.add_argument('--fsync', choices=FSYNC_POLICIES, help="디스크 동기화: none(운영체제에 맡김), finish(완료할 때), block(블록마다) (기본: 설정값)")
+    batch.set_defaults(func=cmd_batch)
+    
+    history = commands.add_parser('history', help="다운로드 히스토리 출력")
+    history.add_argument('--limit', type=int, default=50)
+    history.add_argument('-s', '--search', help="제목, 채널, URL, 파일 경로에서 찾을 단어")
+    history.add_argument('--json', action='store_true', help="JSON으로 출력")
+    history.set_defaults(func=cmd_history)
+    
+    verify = commands.add_parser('verify', help="받은 파일이 잘리거나 손상되지 않았는지 기록된 해시로 확인")
+    verify.add_argument('-s', '--search', help="이 단어가 들어간 기록만 확인")
+    verify.add_argument('-j', '--jobs', type=int, help="동시에 해시하는 스레드 수 (기본: CPU 코어 수)")
+    verify.add_argument('--json', action='store_true', help="JSON으로 출력")
+    verify.set_defaults(func=cmd_verify)
+    
+    daemon = commands.add_parser('daemon', help="HTTP API로 작업을 받는 다운로드 데몬 실행")
+    daemon.add_argument('--host', default='127.0.0.1')
+    daemon.add_argument('--port', type=int, default=8765)
+    daemon.add_argument('-o', '--output', help="저장 폴더 (기본: 설정의 다운로드 폴더)")
+    daemon.add_argument('-j', '--jobs', type=int, help="동시 다운로드 수 (기본: 설정값)")
+    daemon.add_argument('--auto', action='store_true', help="처리량과 스로틀 응답에 따라 동시 다운로드 수와 구간 수 자동 조정 (-j는 최댓값)")
+    daemon.add_argument('--limit-rate', type=int, metavar='KB/s', help="최대 다운로드 속도 (기본: 설정값, 0은 무제한)")
+    daemon.add_argument('--fsync', choices=FSYNC_POLICIES, help="디스크 동기화: none(운영체제에 맡김), finish(완료할 때), block(블록마다) (기본: 설정값)")
+    daemon.set_defaults(func=cmd_daemon)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        exporters = start_exporters(args.metrics_port, args.metrics_log)
+    except (OSError, ValueError) as e:
+        print(f"오류: 측정값 서버를 시작할 수 없습니다: {e}", file=sys.stderr)
+        return 1
+    start_tracing(args.trace)
+    try:
+        return args.func(args)
+    except Exception as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 1
+    finally:
+        for exporter in exporters:
+            exporter.close()
+        tracer = stop_tracing()
+        if tracer:
+            print(f"추적 기록 저장: {tracer.path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
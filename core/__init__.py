@@ -0,0 +1 @@
+"""GUI와 독립적인 다운로드 핵심 모듈"""
@@ -0,0 +1,236 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+
+from core import tracing
+from core.metrics import get_metrics, url_host
+from core.mux import STREAMING_MUX, MuxError, StreamMuxer, ffmpeg_path, mux_files
+from core.ratelimit import get_rate_limiter
+from core.storage import DEFAULT_FSYNC, commit_file, ensure_free_space
+from core.segmented import (NETWORK_ERRORS, PART_SUFFIX, READ_SIZE, REQUEST_RANGE_SIZE, THROTTLE_CODES,
+                            DownloadCancelled, SegmentedDownloader, open_range)
+from core.transport import get_transport
+
+# 임시 파일로 받을 때(Windows) 트랙별 파일 접미사
+TRACK_SUFFIXES = ('.video', '.audio')
+
+
+class AdaptiveDownloader:
+    """영상 전용 트랙과 음성 전용 트랙(DASH)을 동시에 받아 하나의 파일로 합치는 클래스
+    
+    POSIX에서는 두 트랙을 앞에서부터 Range 요청으로 받으면서 바로 ffmpeg 파이프로 넘기므로
+    임시 파일을 만들지 않고, 두 트랙 중 오래 걸리는 쪽의 시간 안에 끝난다. 이 방식은 앱을 다시
+    시작하면 처음부터 받는다. Windows에서는 두 트랙을 SegmentedDownloader로 각각 받은 뒤
+    (이어받기 가능) 합친다. progress_callback(bytes_downloaded, total_size)는 두 트랙을 합친
+    크기로 네트워크 스레드에서 호출된다.
+    """
+    def __init__(self, video_url, video_size, audio_url, audio_size, file_path, container='mp4',
+                 progress_callback=None, headers=None, timeout=30, retries=3, resume_key=None,
+                 transport=None, rate_limiter=None, rate_key=None, fsync=DEFAULT_FSYNC):
+        self.tracks = [(video_url, video_size or 0), (audio_url, audio_size or 0)]
+        self.file_path = file_path
+        self.part_path = file_path + PART_SUFFIX
+        self.container = container
+        self.total_size = sum(size for _, size in self.tracks)
+        self.progress_callback = progress_callback
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.retries = retries
+        self.resume_key = resume_key or video_url
+        self.transport = transport or get_transport()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.rate_key = rate_key or self.resume_key
+        self.fsync = fsync or DEFAULT_FSYNC
+        
+        self.cancelled = False
+        self.bytes_downloaded = 0
+        self.muxer = None
+        self._stopped = False
+        self._executor = None
+        self._segmented = []
+        self._lock = threading.Lock()
+    
+    def cancel(self):
+        """다운로드 취소"""
+        self.cancelled = True
+        self._stop()
+    
+    def download(self):
+        """다운로드와 합치기를 수행한 뒤 파일 경로 반환"""
+        if ffmpeg_path() is None:
+            raise MuxError("영상과 음성을 합치려면 ffmpeg가 필요합니다")
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 합친 파일은 두 트랙을 더한 크기와 비슷함
+        ensure_free_space(self.part_path, self.total_size)
+        
+        if STREAMING_MUX:
+            self._download_streaming()
+        else:
+            self._download_files()
+        commit_file(self.part_path, self.file_path, self.fsync)
+        return self.file_path
+    
+    def _stop(self):
+        """받고 있는 트랙을 모두 중단 (ffmpeg를 먼저 끝내 파이프 쓰기 대기를 풂)"""
+        self._stopped = True
+        if self.muxer:
+            self.muxer.kill()
+        for downloader in self._segmented:
+            downloader.cancel()
+    
+    def _raise_first(self, errors):
+        """취소 예외보다 실제 원인(네트워크, ffmpeg 순)을 우선 전달"""
+        if self.cancelled:
+            raise DownloadCancelled("Download cancelled")
+        for kind in (NETWORK_ERRORS, MuxError):
+            for error in errors:
+                if isinstance(error, kind):
+                    raise error
+        raise errors[0]
+    
+    def _add_progress(self, size):
+        with self._lock:
+            self.bytes_downloaded += size
+            downloaded = self.bytes_downloaded
+        if self.progress_callback:
+            self.progress_callback(downloaded, self.total_size)
+    
+    def _download_streaming(self):
+        self.muxer = StreamMuxer(self.part_path, self.container)
+        # 파이프 쓰기는 ffmpeg가 읽을 때까지 대기할 수 있으므로 이벤트 루프 밖의 전용 스레드에서 수행
+        self._executor = ThreadPoolExecutor(max_workers=len(self.tracks), thread_name_prefix="mux")
+        try:
+            if self.cancelled:
+                raise DownloadCancelled("Download cancelled")
+            sinks = (self.muxer.video, self.muxer.audio)
+            errors = self.transport.run(self._pump_tracks(sinks))
+            if errors:
+                self.muxer.kill()
+                self.muxer.wait()
+                # ffmpeg가 입력을 거부해 파이프가 닫혔으면 ffmpeg의 오류 메시지를 전달
+                network_error = any(isinstance(error, NETWORK_ERRORS) for error in errors)
+                if self.muxer.stderr and not network_error and not self.cancelled:
+                    raise MuxError(f"ffmpeg 오류: {self.muxer.stderr}")
+                self._raise_first(errors)
+            self.muxer.finish()
+        except BaseException:
+            self.muxer.abort()
+            raise
+        finally:
+            self._executor.shutdown()
+    
+    async def _pump_tracks(self, sinks):
+        """두 트랙을 동시에 받아 각각의 파이프에 쓰고 발생한 예외 목록 반환"""
+        async def run(track, sink):
+            try:
+                with tracing.async_span('track', 'segment', size=track[1]):
+                    await self._pump(*track, sink)
+            except BaseException:
+                # 한 트랙이 실패하면 나머지도 중단
+                self._stop()
+                raise
+        results = await asyncio.gather(*(run(track, sink) for track, sink in zip(self.tracks, sinks)),
+                                       return_exceptions=True)
+        return [result for result in results if isinstance(result, BaseException)]
+    
+    async def _pump(self, url, size, sink):
+        """트랙 하나를 앞에서부터 REQUEST_RANGE_SIZE 단위로 받아 순서대로 파이프에 씀"""
+        loop = asyncio.get_running_loop()
+        metrics = get_metrics()
+        host = url_host(url)
+        offset = 0
+        attempts = 0
+        while True:
+            if self._stopped:
+                raise DownloadCancelled("Download cancelled")
+            if size:
+                start, end = offset, min(size, offset + REQUEST_RANGE_SIZE) - 1
+            else:
+                # 크기를 모르면 한 번의 요청으로 끝까지 받음
+                start = end = None
+            try:
+                async with await open_range(self.transport, url, start, end, self.headers, self.timeout) as response:
+                    if start is not None and response.status != 206:
+                        raise IOError(f"Range 요청이 거부되었습니다 (HTTP {response.status})")
+                    while True:
+                        if self._stopped:
+                            raise DownloadCancelled("Download cancelled")
+                        chunk = await response.read(READ_SIZE if end is None else min(READ_SIZE, end - offset + 1),
+                                                    self.timeout)
+                        if not chunk:
+                            break
+                        await loop.run_in_executor(self._executor, sink.write, chunk)
+                        offset += len(chunk)
+                        metrics.inc('bytes_total', len(chunk), host=host)
+                        self._add_progress(len(chunk))
+                        await self.rate_limiter.acquire(self.rate_key, len(chunk))
+                        if end is not None and offset > end:
+                            break
+                if end is None:
+                    break
+                if offset <= end:
+                    raise IOError("연결이 도중에 끊어졌습니다")
+                attempts = 0
+                if offset >= size:
+                    break
+            except DownloadCancelled:
+                raise
+            except NETWORK_ERRORS as e:
+                # 받은 위치부터 다시 시도 (크기를 모르는 트랙은 이미 넘긴 데이터가 있으면 불가)
+                attempts += 1
+                metrics.inc('retries_total', host=host)
+                if isinstance(e, HTTPError) and e.code in THROTTLE_CODES:
+                    metrics.inc('throttled_total', host=host)
+                if (attempts > self.retries or (end is None and offset)
+                        or (isinstance(e, HTTPError) and e.code < 500 and e.code != 429)):
+                    raise
+                await asyncio.sleep(min(2 ** attempts, 10))
+        # 입력이 끝났음을 ffmpeg에 알림
+        sink.close()
+    
+    def _download_files(self):
+        """두 트랙을 각각 임시 파일로 받은 뒤 합침 (파이프를 넘길 수 없는 Windows용)"""
+        paths = [self.file_path + suffix for suffix in TRACK_SUFFIXES]
+        progress = [0] * len(self.tracks)
+        
+        def on_progress(index, downloaded):
+            with self._lock:
+                progress[index] = downloaded
+                self.bytes_downloaded = sum(progress)
+            if self.progress_callback:
+                self.progress_callback(self.bytes_downloaded, self.total_size)
+        
+        self._segmented = [
+            SegmentedDownloader(
+                url, path, size,
+                progress_callback=lambda downloaded, total, index=index: on_progress(index, downloaded),
+                headers=self.headers, timeout=self.timeout, retries=self.retries,
+                resume_key=f"{self.resume_key}{suffix}", transport=self.transport,
+                rate_limiter=self.rate_limiter, rate_key=self.rate_key, fsync=self.fsync
+            )
+            for index, ((url, size), path, suffix) in enumerate(zip(self.tracks, paths, TRACK_SUFFIXES))
+        ]
+        if self.cancelled:
+            raise DownloadCancelled("Download cancelled")
+        
+        def run(downloader):
+            try:
+                downloader.download()
+            except BaseException:
+                self._stop()
+                raise
+        
+        with ThreadPoolExecutor(max_workers=len(self._segmented), thread_name_prefix="track") as executor:
+            futures = [executor.submit(run, downloader) for downloader in self._segmented]
+        errors = [future.exception() for future in futures if future.exception()]
+        if errors:
+            self._raise_first(errors)
+        
+        with tracing.span('mux', 'phase'):
+            mux_files(paths[0], paths[1], self.part_path, self.container)
+        for path in paths:
+            os.remove(path)
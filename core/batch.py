@@ -0,0 +1,185 @@
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from core.mux import ffmpeg_path
+
+# 동시에 정보를 가져올 영상 수 기본값
+DEFAULT_PREFETCH = 4
+
+# 일괄 다운로드 포맷 규칙 (키: 표시 이름)
+FORMAT_RULES = {
+    'best': "최고 화질 (동영상+음성)",
+    'best_1080': "1080p 이하 최고 화질",
+    'best_720': "720p 이하 최고 화질",
+    'best_480': "480p 이하 최고 화질",
+    'best_audio': "최고 음질 (오디오만)",
+    'smallest': "가장 작은 동영상 파일",
+}
+
+_CHANNEL_PATH = re.compile(r'^/(c/|channel/|user/|@)')
+
+
+def parse_url_list(text):
+    """붙여넣은 텍스트에서 URL 목록 추출 (빈 줄, # 주석, 중복 제거)"""
+    urls = []
+    seen = set()
+    for line in text.splitlines():
+        if line.lstrip().startswith('#'):
+            continue
+        for token in line.split():
+            if token.startswith(('http://', 'https://')) and token not in seen:
+                seen.add(token)
+                urls.append(token)
+    return urls
+
+
+def read_url_file(path):
+    """텍스트 파일에서 URL 목록 읽기"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return parse_url_list(f.read())
+
+
+def is_playlist_url(url):
+    parts = urlsplit(url)
+    return 'list' in parse_qs(parts.query) and parts.path in ('/playlist', '/watch')
+
+
+def is_channel_url(url):
+    return bool(_CHANNEL_PATH.match(urlsplit(url).path))
+
+
+def is_collection_url(url):
+    """재생목록이나 채널처럼 여러 영상을 가리키는 URL인지 확인"""
+    return is_playlist_url(url) or is_channel_url(url)
+
+
+def expand_url(url):
+    """재생목록/채널 URL은 영상 URL 목록으로 펼치고, 그 외에는 그대로 반환"""
+    if is_playlist_url(url):
+        from pytube import Playlist
+        return list(Playlist(url).video_urls)
+    if is_channel_url(url):
+        from pytube import Channel
+        return list(Channel(url).video_urls)
+    return [url]
+
+
+def _number(text):
+    match = re.match(r'\d+', text or '')
+    return int(match.group()) if match else 0
+
+
+def select_format(info, rule):
+    """규칙에 맞는 포맷 항목을 선택 (맞는 포맷이 없으면 None)"""
+    if rule == 'best_audio':
+        candidates = [f for formats in info['audio_formats'].values() for f in formats]
+        return max(candidates, key=lambda f: (_number(f.get('abr')), f['file_size'] or 0), default=None)
+    
+    # 영상 전용 스트림은 ffmpeg가 있어야 음성과 합칠 수 있음
+    can_mux = ffmpeg_path() is not None
+    if rule == 'smallest':
+        candidates = [f for formats in info['video_formats'].values() for f in formats
+                      if f.get('progressive', True) or can_mux]
+        return min(candidates, key=lambda f: f['file_size'] or 0, default=None)
+    
+    limit = {'best_1080': 1080, 'best_720': 720, 'best_480': 480}.get(rule)
+    candidates = [
+        f for formats in info['video_formats'].values() for f in formats
+        if (limit is None or _number(f.get('resolution')) <= limit)
+        and (f.get('progressive', True) or can_mux)
+    ]
+    # 같은 화질이면 합칠 필요가 없는 영상+음성 스트림을 우선
+    return max(candidates, key=lambda f: (_number(f.get('resolution')), f.get('fps') or 0,
+                                          f.get('progressive', True), f['file_size'] or 0), default=None)
+
+
+class BatchJob:
+    """여러 URL의 정보를 제한된 동시성으로 미리 가져와 포맷을 고른 뒤 콜백으로 넘기는 작업
+    
+    resolve(url)는 영상 정보를 반환하는 함수이며(캐시 사용), 콜백들은 작업 스레드에서 호출된다.
+      on_item(url, info, format_info): 다운로드할 항목이 준비됨
+      on_error(url, message): 정보 가져오기 실패 또는 맞는 포맷 없음
+      on_finished(resolved, failed): 모든 항목 처리 완료
+    """
+    def __init__(self, urls, rule, resolve, on_item, on_error=None, on_finished=None,
+                 prefetch=DEFAULT_PREFETCH):
+        self.urls = list(urls)
+        self.rule = rule
+        self.resolve = resolve
+        self.on_item = on_item
+        self.on_error = on_error
+        self.on_finished = on_finished
+        self.prefetch = max(1, prefetch)
+        self.cancelled = False
+        
+        self.total = 0
+        self.resolved = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="batch", daemon=True)
+        self._thread.start()
+    
+    def cancel(self):
+        self.cancelled = True
+    
+    def _run(self):
+        # 1단계: 재생목록/채널 펼치기
+        video_urls = []
+        seen = set()
+        for url in self.urls:
+            if self.cancelled:
+                break
+            try:
+                expanded = expand_url(url)
+            except Exception as e:
+                self._report_error(url, f"목록을 가져오지 못했습니다: {e}")
+                continue
+            for video_url in expanded:
+                if video_url not in seen:
+                    seen.add(video_url)
+                    video_urls.append(video_url)
+        self.total = len(video_urls)
+        
+        # 2단계: 제한된 동시성으로 정보 미리 가져오기
+        # 세마포어로 대기 중인 작업 수도 제한하여 수백 개를 한꺼번에 쌓아 두지 않음
+        slots = threading.BoundedSemaphore(self.prefetch * 2)
+        with ThreadPoolExecutor(max_workers=self.prefetch, thread_name_prefix="prefetch") as executor:
+            for video_url in video_urls:
+                if self.cancelled:
+                    break
+                slots.acquire()
+                future = executor.submit(self._process, video_url)
+                future.add_done_callback(lambda _: slots.release())
+        
+        if self.on_finished:
+            self.on_finished(self.resolved, self.failed)
+    
+    def _process(self, url):
+        if self.cancelled:
+            return
+        try:
+            info = self.resolve(url)
+        except Exception as e:
+            self._report_error(url, str(e))
+            return
+        
+        format_info = select_format(info, self.rule)
+        if format_info is None:
+            self._report_error(url, "규칙에 맞는 포맷이 없습니다")
+            return
+        
+        with self._lock:
+            self.resolved += 1
+        if not self.cancelled:
+            self.on_item(url, info, format_info)
+    
+    def _report_error(self, url, message):
+        with self._lock:
+            self.failed += 1
+        if self.on_error:
+            self.on_error(url, message)
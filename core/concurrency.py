@@ -0,0 +1,205 @@
+import threading
+import time
+
+from core import tracing
+from core.metrics import get_metrics
+
+# 한 파일을 동시에 받을 구간 수 기본값 (자동 모드가 꺼져 있거나 처음 보는 호스트)
+DEFAULT_SEGMENTS = 4
+
+# 자동 모드의 기본 동시 다운로드 수 범위와 설정할 수 있는 최댓값
+AUTO_MIN_DOWNLOADS = 1
+AUTO_MAX_DOWNLOADS = 8
+AUTO_LIMIT = 16
+
+# 호스트별 구간(연결) 수 최댓값
+MAX_SEGMENTS = 8
+
+# 조정 간격 (초)
+CONTROL_INTERVAL = 2.0
+
+# 동시 다운로드 수를 늘린 뒤 효과를 판단하기까지 기다리는 간격 수 (새 작업이 정보를 가져와 받기 시작하는 시간)
+PROBE_TICKS = 2
+
+# 늘린 뒤 전체 처리량이 이 비율만큼 늘지 않으면 되돌림
+MIN_GAIN = 0.05
+
+# 줄이거나 되돌린 뒤 다시 늘리기까지 쉬는 간격 수
+HOLD_TICKS = 3
+
+
+class _HostState:
+    def __init__(self, received=0, throttled=0):
+        self.segments = DEFAULT_SEGMENTS
+        self.received = received
+        self.throttled = throttled
+        self.rate = 0.0
+
+
+class ConcurrencyController:
+    """호스트별 처리량과 스로틀 응답(HTTP 429/403)을 보고 동시 다운로드 수와 구간 수를 AIMD로 조정
+    
+    CONTROL_INTERVAL마다 측정값(bytes_total, throttled_total)에서 호스트별로 늘어난 양을 읽는다.
+    - 어느 호스트든 스로틀 응답이 있으면 동시 다운로드 수를 절반으로 줄이고 (곱셈 감소),
+      그 호스트의 구간 수도 절반으로 줄인다.
+    - 대기 중인 작업이 있는데 작업자가 모두 바쁘면 동시 다운로드 수를 하나 늘리고 (덧셈 증가),
+      PROBE_TICKS 뒤 전체 처리량이 MIN_GAIN만큼 늘지 않았으면 되돌린다.
+    - 스로틀 없이 데이터를 받은 호스트는 구간 수를 하나씩 늘린다 (새로 시작하는 다운로드부터 적용).
+    동시 다운로드 수는 start()로 넘긴 WorkerPool의 크기로 적용되며 항상 [min_downloads, max_downloads]
+    안에 있다. 켜져 있지 않으면 segments()는 기본 구간 수를 반환한다.
+    """
+    def __init__(self, max_segments=MAX_SEGMENTS, interval=CONTROL_INTERVAL, metrics=None):
+        self.max_segments = max_segments
+        self.interval = interval
+        self.metrics = metrics or get_metrics()
+        self.pool = None
+        self.min_downloads = AUTO_MIN_DOWNLOADS
+        self.max_downloads = AUTO_MAX_DOWNLOADS
+        self.limit = AUTO_MIN_DOWNLOADS
+        self.rate = 0.0
+        self.hosts = {}
+        
+        self._probe = None
+        self._hold = 0
+        self._last_tick = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = None
+        self._thread = None
+    
+    @property
+    def enabled(self):
+        return self.pool is not None
+    
+    def start(self, pool, min_downloads=AUTO_MIN_DOWNLOADS, max_downloads=AUTO_MAX_DOWNLOADS):
+        """pool의 크기를 자동으로 조정하기 시작 (현재 크기에서 출발)"""
+        with self._lock:
+            self.pool = pool
+            self._set_bounds(min_downloads, max_downloads, pool.max_workers)
+            # 켜기 전에 받은 양은 처리량에 넣지 않음
+            received = self.metrics.counters('bytes_total')
+            throttled = self.metrics.counters('throttled_total')
+            self.hosts = {
+                dict(labels).get('host'): _HostState(received.get(labels, 0), throttled.get(labels, 0))
+                for labels in set(received) | set(throttled)
+            }
+            self._probe = None
+            self._hold = 0
+            self._last_tick = time.monotonic()
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, name="concurrency", daemon=True)
+                self._thread.start()
+    
+    def stop(self):
+        """자동 조정을 끔 (풀 크기는 호출한 쪽에서 되돌림)"""
+        with self._lock:
+            self.pool = None
+            self.hosts = {}
+            thread, self._thread = self._thread, None
+            if thread:
+                self._stop.set()
+        if thread and thread is not threading.current_thread():
+            thread.join()
+    
+    def set_bounds(self, min_downloads, max_downloads):
+        """동시 다운로드 수 범위 변경 (현재 값이 범위를 벗어나면 바로 맞춤)"""
+        with self._lock:
+            self._set_bounds(min_downloads, max_downloads, self.limit)
+    
+    def segments(self, host):
+        """host에서 새로 시작하는 다운로드의 구간 수"""
+        with self._lock:
+            state = self.hosts.get(host)
+            return state.segments if state else DEFAULT_SEGMENTS
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'limit': self.limit,
+                'min_downloads': self.min_downloads,
+                'max_downloads': self.max_downloads,
+                'rate': self.rate,
+                'segments': {host: state.segments for host, state in self.hosts.items()},
+            }
+    
+    def tick(self):
+        """조정 한 번 (CONTROL_INTERVAL마다 호출됨)"""
+        with self._lock:
+            if self.pool is None:
+                return
+            now = time.monotonic()
+            elapsed = max(0.001, now - self._last_tick)
+            self._last_tick = now
+            
+            received = self.metrics.counters('bytes_total')
+            throttled = self.metrics.counters('throttled_total')
+            total_rate = 0.0
+            any_throttled = False
+            for labels in set(received) | set(throttled):
+                host = dict(labels).get('host')
+                state = self.hosts.get(host)
+                if state is None:
+                    state = self.hosts[host] = _HostState()
+                # 측정값이 초기화되었으면 (reset) 처음부터 다시 셈
+                received_delta = max(0, received.get(labels, 0) - state.received)
+                throttled_delta = max(0, throttled.get(labels, 0) - state.throttled)
+                state.received = received.get(labels, 0)
+                state.throttled = throttled.get(labels, 0)
+                state.rate = received_delta / elapsed
+                total_rate += state.rate
+                if throttled_delta:
+                    any_throttled = True
+                    state.segments = max(1, state.segments // 2)
+                elif received_delta and state.segments < self.max_segments:
+                    state.segments += 1
+            self.rate = total_rate
+            self._adjust_downloads(total_rate, any_throttled)
+            limit = self.limit
+        tracing.counter('concurrency', downloads=limit, rate=round(total_rate))
+    
+    def _adjust_downloads(self, total_rate, throttled):
+        stats = self.pool.stats()
+        saturated = stats['queue_depth'] > 0 and stats['running'] >= self.limit
+        if throttled:
+            self.limit = max(self.min_downloads, self.limit // 2)
+            self._probe = None
+            self._hold = HOLD_TICKS
+        elif self._probe is not None:
+            base_rate, ticks = self._probe
+            if ticks > 1:
+                self._probe = (base_rate, ticks - 1)
+            else:
+                self._probe = None
+                # 대기열이 비어 늘린 슬롯을 쓰지 않았으면 판단하지 않음
+                if saturated and total_rate < base_rate * (1 + MIN_GAIN):
+                    self.limit = max(self.min_downloads, self.limit - 1)
+                    self._hold = HOLD_TICKS
+        elif self._hold:
+            self._hold -= 1
+        elif saturated and self.limit < self.max_downloads:
+            self._probe = (total_rate, PROBE_TICKS)
+            self.limit += 1
+        if self.pool.max_workers != self.limit:
+            self.pool.resize(self.limit)
+    
+    def _set_bounds(self, min_downloads, max_downloads, current):
+        """잠금 상태에서 호출"""
+        self.min_downloads = max(1, min(min_downloads, AUTO_LIMIT))
+        self.max_downloads = max(self.min_downloads, min(max_downloads, AUTO_LIMIT))
+        self.limit = max(self.min_downloads, min(current, self.max_downloads))
+        if self.pool and self.pool.max_workers != self.limit:
+            self.pool.resize(self.limit)
+    
+    def _run(self):
+        stop = self._stop
+        while not stop.wait(self.interval):
+            self.tick()
+
+
+_controller = ConcurrencyController()
+
+
+def get_concurrency():
+    """앱 전체가 공유하는 동시 다운로드 수 조정기"""
+    return _controller
@@ -0,0 +1,467 @@
+import os
+import sqlite3
+import threading
+
+from core.concurrency import AUTO_MAX_DOWNLOADS, AUTO_MIN_DOWNLOADS
+from core.metrics import get_metrics
+from core.storage import DEFAULT_FSYNC
+
+# 현재 사용자의 다운로드 폴더 경로를 기본값으로 설정
+DEFAULT_DOWNLOAD_PATH = os.path.join(os.path.expanduser("~"), "Downloads")
+
+# 설정, 히스토리, 캐시를 저장하는 데이터베이스 파일
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".youtube_downloader.db")
+
+# 히스토리 조회 시 읽는 열 (이 순서의 튜플로 반환)
+HISTORY_COLUMNS = "id, video_id, title, url, file_path, thumbnail_path, format, resolution, download_date, file_size, author"
+
+# 히스토리 검색 대상 열 (FTS5 색인)
+SEARCH_COLUMNS = ('title', 'author', 'url', 'file_path')
+
+# 쓰기를 모아 한 번에 커밋하는 간격 (초)
+COMMIT_INTERVAL = 0.5
+
+# 커밋하지 않은 쓰기가 이만큼 쌓이면 간격을 기다리지 않고 커밋
+MAX_PENDING_WRITES = 200
+
+# 다른 프로세스(GUI와 함께 실행한 cli.py 등)가 쓰는 중일 때 기다리는 최대 시간 (초)
+BUSY_TIMEOUT = 10
+
+# WAL 파일이 이 크기를 넘으면 커밋 스레드가 데이터베이스 파일에 옮김 (체크포인트)
+CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+
+def search_terms(text):
+    """검색어를 공백으로 나눈 단어 목록"""
+    return [term for term in text.split() if term]
+
+
+def fts_query(text):
+    """검색어를 FTS5 MATCH 식으로 변환 (모든 단어를 접두어로 포함하는 행, 특수 문자는 그대로 검색)"""
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in search_terms(text))
+
+
+class Database:
+    """데이터베이스 관리 클래스
+    
+    WAL 모드의 연결 하나를 잠금으로 보호하므로 어느 스레드에서나 호출할 수 있다. 쓰기는 바로
+    실행되어 같은 연결의 조회에는 곧바로 보이지만, 커밋은 백그라운드 스레드가 COMMIT_INTERVAL마다
+    모아서 한 번에 하므로 완료가 몰려도 호출한 스레드(GUI 등)가 디스크 동기화를 기다리지 않는다.
+    비정상 종료 시에는 마지막 COMMIT_INTERVAL 동안의 쓰기가 사라질 수 있다.
+    메타데이터/썸네일 캐시도 query()와 write()로 이 연결을 함께 쓰므로, 커밋하지 않은 트랜잭션이
+    열려 있어도 같은 프로세스 안에서 쓰기 잠금을 기다리는 곳이 없다. WAL 커밋은 동기화하지 않아
+    잠금을 잡는 시간이 짧고, 동기화가 필요한 체크포인트는 커밋 스레드가 별도 연결로 잠금 없이 한다.
+    """
+    def __init__(self, db_path=None, commit_interval=COMMIT_INTERVAL):
+        self.db_path = db_path or DEFAULT_DB_PATH
+        self.commit_interval = commit_interval
+        self.conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._pending_writes = 0
+        self._checkpoint_conn = None
+        self._write_event = threading.Event()
+        self._stop = threading.Event()
+        self.create_tables()
+        self._committer = threading.Thread(target=self._commit_loop, name="db-commit", daemon=True)
+        self._committer.start()
+    
+    def create_tables(self):
+        cursor = self.conn.cursor()
+        
+        # 읽기와 쓰기가 서로 막지 않도록 WAL 사용 (WAL에서는 NORMAL로도 손상되지 않음)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        # 커밋하면서 체크포인트를 하지 않도록 자동 체크포인트를 끄고 커밋 스레드에서 따로 함
+        cursor.execute("PRAGMA wal_autocheckpoint=0")
+        
+        # 설정 테이블
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            id INTEGER PRIMARY KEY,
+            download_path TEXT,
+            theme TEXT,
+            max_concurrent_downloads INTEGER
+        )
+        ''')
+        
+        # 이전 버전 데이터베이스에 속도 제한 설정 열 추가 (KB/s, 0은 무제한)
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(settings)")]
+        if 'rate_limit' not in columns:
+            cursor.execute("ALTER TABLE settings ADD COLUMN rate_limit INTEGER DEFAULT 0")
+        if 'rate_schedule' not in columns:
+            cursor.execute("ALTER TABLE settings ADD COLUMN rate_schedule TEXT DEFAULT ''")
+        if 'fsync_policy' not in columns:
+            cursor.execute(f"ALTER TABLE settings ADD COLUMN fsync_policy TEXT DEFAULT '{DEFAULT_FSYNC}'")
+        # 동시 다운로드 수 자동 조정 여부와 그 범위
+        if 'auto_concurrency' not in columns:
+            cursor.execute("ALTER TABLE settings ADD COLUMN auto_concurrency INTEGER DEFAULT 0")
+        if 'auto_min_downloads' not in columns:
+            cursor.execute(f"ALTER TABLE settings ADD COLUMN auto_min_downloads INTEGER DEFAULT {AUTO_MIN_DOWNLOADS}")
+        if 'auto_max_downloads' not in columns:
+            cursor.execute(f"ALTER TABLE settings ADD COLUMN auto_max_downloads INTEGER DEFAULT {AUTO_MAX_DOWNLOADS}")
+        
+        # 다운로드 히스토리 테이블
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS download_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id TEXT,
+            title TEXT,
+            url TEXT,
+            file_path TEXT,
+            thumbnail_path TEXT,
+            format TEXT,
+            resolution TEXT,
+            download_date TIMESTAMP,
+            file_size INTEGER
+        )
+        ''')
+        
+        # 히스토리를 최신순으로 나누어 읽기 위한 인덱스
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_history_date ON download_history (download_date DESC, id DESC)
+        ''')
+        
+        # 이전 버전 데이터베이스에 채널명, 이미 받은 파일을 찾기 위한 itag와 내용 해시 열 추가
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(download_history)")]
+        if 'author' not in columns:
+            cursor.execute("ALTER TABLE download_history ADD COLUMN author TEXT")
+        if 'itag' not in columns:
+            cursor.execute("ALTER TABLE download_history ADD COLUMN itag INTEGER")
+        if 'content_hash' not in columns:
+            cursor.execute("ALTER TABLE download_history ADD COLUMN content_hash TEXT")
+        
+        # 같은 영상/포맷으로 받은 파일 조회용 인덱스 (영상별 조회도 이 인덱스 사용), 포맷별 조회용 인덱스
+        cursor.execute("DROP INDEX IF EXISTS idx_history_video_id")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_video ON download_history (video_id, itag, format)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_format ON download_history (format)")
+        
+        # 히스토리 전문 검색 색인 (FTS5를 지원하지 않는 SQLite에서는 LIKE로 검색)
+        self.fts = self._create_search_index(cursor)
+        
+        # 중단된 다운로드 테이블 (재시작 시 이어받기용)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pending_downloads (
+            download_id TEXT PRIMARY KEY,
+            url TEXT,
+            itag INTEGER,
+            download_path TEXT,
+            filename TEXT,
+            title TEXT,
+            created_date TIMESTAMP
+        )
+        ''')
+        
+        # 이전 버전 데이터베이스에 변환 형식 열 추가 (mp3 등, 없으면 변환하지 않음)
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(pending_downloads)")]
+        if 'convert' not in columns:
+            cursor.execute("ALTER TABLE pending_downloads ADD COLUMN convert TEXT")
+        
+        # 기본 설정이 없으면 추가
+        cursor.execute("SELECT COUNT(*) FROM settings")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute('''
+            INSERT INTO settings (id, download_path, theme, max_concurrent_downloads)
+            VALUES (1, ?, 'system', 3)
+            ''', (DEFAULT_DOWNLOAD_PATH,))
+        
+        self.conn.commit()
+    
+    def _create_search_index(self, cursor):
+        """download_history를 내용으로 쓰는 FTS5 색인과 동기화 트리거 생성 (지원하지 않으면 False)"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='history_search'"
+        ).fetchone()
+        columns = ", ".join(SEARCH_COLUMNS)
+        new_columns = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+        old_columns = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+        try:
+            cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS history_search USING fts5(
+                {columns}, content='download_history', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+            )
+            ''')
+        except sqlite3.OperationalError:
+            return False
+        
+        # 히스토리 행이 추가/삭제/수정되면 색인도 같은 트랜잭션에서 갱신
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS history_search_insert AFTER INSERT ON download_history BEGIN
+            INSERT INTO history_search (rowid, {columns}) VALUES (new.id, {new_columns});
+        END
+        ''')
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS history_search_delete AFTER DELETE ON download_history BEGIN
+            INSERT INTO history_search (history_search, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+        END
+        ''')
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS history_search_update AFTER UPDATE ON download_history BEGIN
+            INSERT INTO history_search (history_search, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+            INSERT INTO history_search (rowid, {columns}) VALUES (new.id, {new_columns});
+        END
+        ''')
+        
+        # 색인이 없던 데이터베이스는 기존 히스토리로 색인을 채움
+        if not exists:
+            cursor.execute("INSERT INTO history_search (history_search) VALUES ('rebuild')")
+        return True
+    
+    def get_settings(self):
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+            SELECT download_path, theme, max_concurrent_downloads, rate_limit, rate_schedule, fsync_policy,
+                   auto_concurrency, auto_min_downloads, auto_max_downloads
+            FROM settings WHERE id=1
+            ''')
+            row = cursor.fetchone()
+        return {
+            'download_path': row[0],
+            'theme': row[1],
+            'max_concurrent_downloads': row[2],
+            'rate_limit': row[3] or 0,
+            'rate_schedule': row[4] or '',
+            'fsync_policy': row[5] or DEFAULT_FSYNC,
+            'auto_concurrency': bool(row[6]),
+            'auto_min_downloads': row[7] or AUTO_MIN_DOWNLOADS,
+            'auto_max_downloads': row[8] or AUTO_MAX_DOWNLOADS
+        }
+    
+    def update_settings(self, download_path=None, theme=None, max_concurrent_downloads=None,
+                        rate_limit=None, rate_schedule=None, fsync_policy=None, auto_concurrency=None,
+                        auto_min_downloads=None, auto_max_downloads=None):
+        with self._lock:
+            current = self.get_settings()
+            
+            if download_path is not None:
+                current['download_path'] = download_path
+            if theme is not None:
+                current['theme'] = theme
+            if max_concurrent_downloads is not None:
+                current['max_concurrent_downloads'] = max_concurrent_downloads
+            if rate_limit is not None:
+                current['rate_limit'] = rate_limit
+            if rate_schedule is not None:
+                current['rate_schedule'] = rate_schedule
+            if fsync_policy is not None:
+                current['fsync_policy'] = fsync_policy
+            if auto_concurrency is not None:
+                current['auto_concurrency'] = auto_concurrency
+            if auto_min_downloads is not None:
+                current['auto_min_downloads'] = auto_min_downloads
+            if auto_max_downloads is not None:
+                current['auto_max_downloads'] = auto_max_downloads
+            
+            self.write('''
+            UPDATE settings SET 
+                download_path=?, 
+                theme=?, 
+                max_concurrent_downloads=?,
+                rate_limit=?,
+                rate_schedule=?,
+                fsync_policy=?,
+                auto_concurrency=?,
+                auto_min_downloads=?,
+                auto_max_downloads=?
+            WHERE id=1
+            ''', (current['download_path'], current['theme'], current['max_concurrent_downloads'],
+                  current['rate_limit'], current['rate_schedule'], current['fsync_policy'],
+                  int(current['auto_concurrency']), current['auto_min_downloads'], current['auto_max_downloads']))
+    
+    def add_to_history(self, video_id, title, url, file_path, thumbnail_path, format, resolution, file_size,
+                       author=None, itag=None, content_hash=None):
+        with get_metrics().phase('history'):
+            cursor = self.write('''
+            INSERT INTO download_history 
+            (video_id, title, url, file_path, thumbnail_path, format, resolution, download_date, file_size, author,
+             itag, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'), ?, ?, ?, ?)
+            ''', (video_id, title, url, file_path, thumbnail_path, format, resolution, file_size, author,
+                  itag, content_hash))
+        return cursor.lastrowid
+    
+    def get_history(self):
+        return self.query(f'''
+        SELECT {HISTORY_COLUMNS}
+        FROM download_history
+        ORDER BY download_date DESC, id DESC
+        ''')
+    
+    def get_history_page(self, limit, before=None, search=None):
+        """최신순으로 limit개의 히스토리 행 반환
+        
+        before에 이전 페이지 마지막 행의 (download_date, id)를 넘기면 그 다음 행부터 읽는다.
+        OFFSET 대신 인덱스 위치에서 이어 읽으므로 뒤쪽 페이지도 빠르다. 조건을 행 값 비교로 써야
+        SQLite가 인덱스에서 그 위치를 바로 찾는다 (OR로 풀어 쓰면 앞의 행을 모두 훑음).
+        search를 넘기면 제목, 채널명, URL, 파일 경로에 모든 단어(접두어)가 들어 있는 행만
+        추가된 순서(id)의 역순으로 읽는다. 색인을 id 역순으로 훑다가 limit개를 채우면 멈추므로
+        일치하는 행이 많아도 빠르다.
+        """
+        if search_terms(search or ""):
+            return self._search_page(limit, before, search)
+        if before is None:
+            return self.query(f'''
+            SELECT {HISTORY_COLUMNS}
+            FROM download_history
+            ORDER BY download_date DESC, id DESC
+            LIMIT ?
+            ''', (limit,))
+        return self.query(f'''
+        SELECT {HISTORY_COLUMNS}
+        FROM download_history
+        WHERE (download_date, id) < (?, ?)
+        ORDER BY download_date DESC, id DESC
+        LIMIT ?
+        ''', (before[0], before[1], limit))
+    
+    def get_history_item(self, history_id, search=None):
+        """history_id의 히스토리 행 (search를 넘기면 검색어에 맞지 않을 때 None)"""
+        conditions, params = self._search_condition(search)
+        where = " AND ".join(["id=?"] + conditions)
+        rows = self.query(f"SELECT {HISTORY_COLUMNS} FROM download_history WHERE {where}", [history_id] + params)
+        return rows[0] if rows else None
+    
+    def find_downloads(self, video_id, itag, format):
+        """같은 영상, itag, 형식으로 받은 파일의 (파일 경로, 크기, 내용 해시) 목록 (최신순, 해시가 있는 기록만)"""
+        return self.query('''
+        SELECT file_path, file_size, content_hash
+        FROM download_history
+        WHERE video_id=? AND itag=? AND format=? AND content_hash IS NOT NULL
+        ORDER BY id DESC
+        ''', (video_id, itag, format))
+    
+    def get_history_files(self, search=None):
+        """무결성 검사용 (id, 제목, 파일 경로, 크기, 내용 해시) 목록 (최신순)"""
+        conditions, params = self._search_condition(search)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self.query(f'''
+        SELECT id, title, file_path, file_size, content_hash
+        FROM download_history
+        {where}
+        ORDER BY id DESC
+        ''', params)
+    
+    def count_history(self):
+        return self.query("SELECT COUNT(*) FROM download_history")[0][0]
+    
+    def remove_from_history(self, history_id):
+        self.write("DELETE FROM download_history WHERE id=?", (history_id,))
+    
+    def add_pending_download(self, download_id, url, itag, download_path, filename, title, convert=None):
+        self.write('''
+        INSERT OR REPLACE INTO pending_downloads
+        (download_id, url, itag, download_path, filename, title, convert, created_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+        ''', (download_id, url, itag, download_path, filename, title, convert))
+    
+    def get_pending_downloads(self):
+        return self.query('''
+        SELECT download_id, url, itag, download_path, filename, title, convert
+        FROM pending_downloads
+        ORDER BY created_date
+        ''')
+    
+    def remove_pending_download(self, download_id):
+        self.write("DELETE FROM pending_downloads WHERE download_id=?", (download_id,))
+    
+    def flush(self):
+        """모아 둔 쓰기를 바로 커밋"""
+        with self._lock:
+            if self._pending_writes:
+                self.conn.commit()
+                self._pending_writes = 0
+    
+    def close(self):
+        """남은 쓰기를 커밋하고 연결 종료"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._write_event.set()
+        self._committer.join()
+        with self._lock:
+            self.flush()
+            self.conn.close()
+        if self._checkpoint_conn:
+            self._checkpoint_conn.close()
+    
+    def _search_page(self, limit, before, search):
+        """검색어에 맞는 히스토리 행을 id 역순으로 limit개 반환"""
+        conditions, params = self._search_condition(search)
+        if self.fts:
+            # 일치하는 id를 색인에서 필요한 만큼만 꺼낸 뒤 행을 읽음
+            match = "history_search MATCH ?" + (" AND rowid < ?" if before is not None else "")
+            return self.query(f'''
+            SELECT {HISTORY_COLUMNS}
+            FROM download_history
+            WHERE id IN (
+                SELECT rowid FROM history_search WHERE {match} ORDER BY rowid DESC LIMIT ?
+            )
+            ORDER BY id DESC
+            ''', [fts_query(search)] + ([before[1]] if before is not None else []) + [limit])
+        if before is not None:
+            conditions.append("id < ?")
+            params.append(before[1])
+        return self.query(f'''
+        SELECT {HISTORY_COLUMNS}
+        FROM download_history
+        WHERE {' AND '.join(conditions)}
+        ORDER BY id DESC
+        LIMIT ?
+        ''', params + [limit])
+    
+    def _search_condition(self, search):
+        """검색어에 해당하는 WHERE 조건 목록과 인자 (검색어가 없으면 빈 목록)"""
+        terms = search_terms(search or "")
+        if not terms:
+            return [], []
+        if self.fts:
+            return ["id IN (SELECT rowid FROM history_search WHERE history_search MATCH ?)"], [fts_query(search)]
+        # FTS5가 없으면 단어마다 검색 대상 열 중 하나에 포함되는지 확인
+        conditions, params = [], []
+        for term in terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions.append("(" + " OR ".join(f"{column} LIKE ? ESCAPE '\\'" for column in SEARCH_COLUMNS) + ")")
+            params += [pattern] * len(SEARCH_COLUMNS)
+        return conditions, params
+    
+    def query(self, sql, params=()):
+        """조회 결과의 모든 행 반환 (아직 커밋하지 않은 쓰기도 보임)"""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+    
+    def write(self, sql, params=()):
+        """쓰기를 실행하고 커밋은 백그라운드 스레드에 맡김 (같은 연결의 조회에는 바로 보임)"""
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            self._pending_writes += 1
+            if self._pending_writes >= MAX_PENDING_WRITES:
+                self.conn.commit()
+                self._pending_writes = 0
+        self._write_event.set()
+        return cursor
+    
+    def _commit_loop(self):
+        """쓰기가 생기면 commit_interval 동안 더 모은 뒤 한 트랜잭션으로 커밋 (커밋 스레드)"""
+        while not self._stop.is_set():
+            self._write_event.wait()
+            self._stop.wait(self.commit_interval)
+            self._write_event.clear()
+            try:
+                self.flush()
+                self._checkpoint()
+            except sqlite3.Error:
+                # 다른 연결이 오래 잠그고 있으면 잠시 뒤 다시 시도
+                self._write_event.set()
+    
+    def _checkpoint(self):
+        """WAL 파일이 커졌으면 데이터베이스 파일에 옮김 (커밋 스레드, 조회와 쓰기를 막지 않음)"""
+        try:
+            if os.path.getsize(self.db_path + '-wal') < CHECKPOINT_BYTES:
+                return
+        except OSError:
+            return
+        if self._checkpoint_conn is None:
+            self._checkpoint_conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        # PASSIVE는 읽거나 쓰는 연결을 기다리지 않고 옮길 수 있는 만큼만 옮김 (이미 옮겼으면 바로 끝남)
+        self._checkpoint_conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
@@ -0,0 +1,153 @@
+import os
+import shutil
+import threading
+
+from core.integrity import tree_digest
+
+try:
+    import fcntl
+except ImportError:
+    # Windows에는 reflink가 없으므로 하드 링크나 복사 사용
+    fcntl = None
+
+# 리눅스에서 파일 내용을 복사하지 않고 공유하는 ioctl (Btrfs, XFS 등)
+FICLONE = 0x40049409
+
+# 링크/복사 중인 파일의 접미사
+PART_SUFFIX = '.part'
+
+
+def _reflink(source, target):
+    """source의 내용을 공유하는 target 생성 (지원하지 않는 파일 시스템이면 False)"""
+    if fcntl is None:
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        if os.path.exists(target):
+            os.remove(target)
+        return False
+
+
+def clone_file(source, target, copy=True):
+    """source를 target에 reflink, 하드 링크, 복사 순으로 시도하여 만들고 사용한 방법 반환
+    
+    reflink는 내용을 공유하지만 한쪽을 고쳐도 다른 쪽이 바뀌지 않는다. 하드 링크는 같은
+    파일을 가리키므로 같은 파일 시스템에서만 가능하다. 임시 파일에 만든 뒤 이름을 바꾸므로
+    target에는 완성된 파일만 보인다. target에 이미 파일이 있으면 덮어쓰지 않고 FileExistsError를 낸다.
+    copy가 False이면 복사하지 않고 reflink와 하드 링크가 안 되면 None을 반환한다.
+    """
+    directory = os.path.dirname(target)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    part_path = target + PART_SUFFIX
+    if os.path.exists(part_path):
+        os.remove(part_path)
+    
+    if _reflink(source, part_path):
+        method = 'reflink'
+    else:
+        try:
+            os.link(source, part_path)
+            method = 'hardlink'
+        except OSError:
+            # 다른 드라이브이거나 링크를 지원하지 않는 파일 시스템
+            if not copy:
+                return None
+            shutil.copy2(source, part_path)
+            method = 'copy'
+    if os.path.exists(target):
+        # 만드는 사이에 다른 파일이 생김
+        os.remove(part_path)
+        raise FileExistsError(target)
+    os.replace(part_path, target)
+    return method
+
+
+def free_path(path):
+    """path가 비어 있으면 그대로, 아니면 "이름 (n).확장자" 중 비어 있는 경로 반환"""
+    base, extension = os.path.splitext(path)
+    index = 1
+    while os.path.exists(path):
+        path = f"{base} ({index}){extension}"
+        index += 1
+    return path
+
+
+class DuplicateIndex:
+    """이미 받은 파일을 찾아 다시 받지 않고 재사용하는 색인
+    
+    download_history의 (video_id, itag, format) 색인으로 후보를 찾고, 파일이 남아 있으며 크기와
+    내용 해시(블록 트리 해시)가 기록과 같은 것만 사용한다. 해시는 (경로, 크기, 수정 시각)별로
+    기억해 두어 같은 파일을 여러 번 확인해도 한 번만 읽는다. 작업자 스레드에서 호출한다.
+    """
+    def __init__(self, db):
+        self.db = db
+        self._digests = {}
+        self._lock = threading.Lock()
+    
+    def digest(self, path, offline=False):
+        """파일 내용 해시 (바뀌지 않은 파일은 기억해 둔 값 사용, offline이면 모를 때 읽지 않고 None)"""
+        key = self._key(path)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None and not offline:
+            digest = tree_digest(path)
+            with self._lock:
+                self._digests[key] = digest
+        return digest
+    
+    def remember(self, path, digest):
+        """받으면서 계산한 해시를 기억해 두어 다시 읽지 않음"""
+        key = self._key(path)
+        with self._lock:
+            self._digests[key] = digest
+    
+    @staticmethod
+    def _key(path):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+    
+    def find(self, video_id, itag, format, offline=False):
+        """재사용할 수 있는 기존 파일의 (경로, 내용 해시) (없으면 None)
+        
+        offline이면 파일 내용을 읽지 않고 해시를 기억해 둔 파일만 확인한다.
+        """
+        for file_path, file_size, content_hash in self.db.find_downloads(video_id, itag, format):
+            try:
+                if os.path.getsize(file_path) != file_size or self.digest(file_path, offline) != content_hash:
+                    continue
+            except OSError:
+                # 지워졌거나 옮겨진 파일
+                continue
+            return file_path, content_hash
+        return None
+    
+    def reuse(self, video_id, itag, format, target_path, offline=False):
+        """기존 파일이 있으면 target_path에 만들고 (방법, 내용 해시, 경로) 반환 (없으면 None)
+        
+        이미 target_path에 있는 파일이면 방법은 'existing'이고, target_path에 다른 파일이지만 내용(크기와
+        해시)이 같은 파일이 있으면 그대로 두고 방법은 'kept'이다. 내용이 다른 파일이 있으면 덮어쓰지
+        않고 "이름 (n).확장자"로 만든다. offline이면 파일 내용을 읽거나 복사하지 않으며, 그래야만
+        확인하거나 만들 수 있으면 None을 반환한다 (GUI 스레드에서 대기열에 넣기 전에 확인할 때).
+        """
+        found = self.find(video_id, itag, format, offline)
+        if found is None:
+            return None
+        source, content_hash = found
+        if os.path.exists(target_path):
+            if os.path.samefile(source, target_path):
+                return 'existing', content_hash, target_path
+            if os.path.getsize(target_path) == os.path.getsize(source):
+                digest = self.digest(target_path, offline)
+                if digest is None:
+                    return None
+                if digest == content_hash:
+                    return 'kept', content_hash, target_path
+            target_path = free_path(target_path)
+        method = clone_file(source, target_path, copy=not offline)
+        if method is None:
+            return None
+        return method, content_hash, target_path
@@ -0,0 +1,288 @@
+import os
+from urllib.error import HTTPError
+
+from core.adaptive import AdaptiveDownloader
+from core.concurrency import get_concurrency
+from core.integrity import tree_digest
+from core.metadata_cache import find_format
+from core.metrics import get_metrics, url_host
+from core.ratelimit import get_rate_limiter
+from core.segmented import SegmentedDownloader, DownloadCancelled
+from core.thumbnails import HISTORY_SIZE
+from core.transcode import FOLLOW_DOWNLOAD, TranscodeJob, transcode_path
+from core.youtube import cached_video_info, resolve_video_info
+
+
+class DownloadJob:
+    """영상 하나를 받는 작업 (GUI와 CLI가 함께 사용)
+    
+    WorkerPool에 넣을 수 있도록 run()과 cancel()을 가진다. 콜백은 모두 선택 사항이며
+    작업 스레드(진행 상황은 네트워크 스레드)에서 호출된다.
+      on_progress(bytes_downloaded, total_size)
+      on_completed(download_info)
+      on_error(message)
+      on_transcode(status, percentage): 다 받은 뒤의 변환 대기('queued')와 진행('active') 상황
+    convert(mp3, m4a, opus)를 지정하면 받은 파일을 transcoder(TranscodePool)에서 변환하며,
+    run()은 다운로드가 끝나면 바로 반환하고 on_completed는 변환이 끝난 뒤 호출된다.
+    download_info['content_hash']에는 받은 파일의 블록 트리 해시(core.integrity)가 들어 있다.
+    duplicates(DuplicateIndex)를 넘기면 같은 영상/포맷으로 받아 둔 파일이 있을 때 받지 않고
+    그 파일을 링크한다 (download_info['reused']에 방법 기록, 저장 위치에 다른 파일이 있으면 새 이름 사용).
+    대기열에 넣기 전에 reuse_cached()로 먼저 확인하고, run()에서는 영상 정보를 가져온 뒤 다시 확인한다.
+    """
+    def __init__(self, url, itag, download_path, filename=None, metadata_cache=None,
+                 on_progress=None, on_completed=None, on_error=None, thumbnail_cache=None, rate_key=None,
+                 convert=None, transcoder=None, on_transcode=None, duplicates=None, fsync=None):
+        self.url = url
+        self.itag = itag
+        self.download_path = download_path
+        self.filename = filename
+        self.metadata_cache = metadata_cache
+        self.thumbnail_cache = thumbnail_cache
+        # 속도 제한기에서 이 다운로드를 구분하는 키 (configure()로 개별 제한/가중치 지정)
+        self.rate_key = rate_key
+        self.convert = convert
+        self.transcoder = transcoder
+        self.duplicates = duplicates
+        # 받은 파일을 디스크에 동기화하는 정책 (core.storage, None이면 기본값)
+        self.fsync = fsync
+        self.on_progress = on_progress
+        self.on_completed = on_completed
+        self.on_error = on_error
+        self.on_transcode = on_transcode
+        self.cancelled = False
+        self.segmented = None
+        self.transcode = None
+        self._transcode_started = False
+        self.result = None
+        self.error = None
+    
+    def run(self):
+        metrics = get_metrics()
+        try:
+            with metrics.phase('job'):
+                self.result = self.download()
+        except Exception as e:
+            self._cancel_transcode()
+            metrics.inc('downloads_total', result='cancelled' if self.cancelled else 'failed')
+            if self.cancelled:
+                return
+            self.error = str(e)
+            if self.on_error:
+                self.on_error(self.error)
+            return
+        finally:
+            if self.rate_key:
+                get_rate_limiter().remove(self.rate_key)
+        metrics.inc('downloads_total', result='reused' if self.result.get('reused') else 'completed')
+        if self.transcode:
+            # 변환은 변환 대기열에서 진행하고 이 작업자는 바로 다음 다운로드를 받음
+            if self._transcode_started:
+                self._report_transcode('active', self.transcode.percentage)
+                self.transcode.source_ready()
+            else:
+                self.transcode.source_ready()
+                self._start_transcode()
+            return
+        if self.on_completed:
+            self.on_completed(self.result)
+    
+    def reuse_cached(self):
+        """대기열에 넣기 전에 받아 둔 같은 파일을 찾아 재사용하고 찾았으면 True 반환
+        
+        캐시에 있는 영상 정보와 이미 알고 있는 해시만 쓰고 파일 내용이나 네트워크를 읽지 않으므로
+        GUI 스레드에서 호출할 수 있다. 찾으면 on_completed를 바로 호출하며 run()은 호출하지 않는다.
+        못 찾으면 run()이 영상 정보를 가져와 파일을 읽어서 다시 확인한다.
+        """
+        if self.duplicates is None or self.metadata_cache is None:
+            return False
+        metrics = get_metrics()
+        info = cached_video_info(self.url, self.metadata_cache)
+        if info is None:
+            return False
+        with metrics.phase('reuse'):
+            result = self.reuse_existing(info, offline=True)
+        if result is None:
+            return False
+        self.result = result
+        if self.rate_key:
+            get_rate_limiter().remove(self.rate_key)
+        metrics.inc('downloads_total', result='reused')
+        if self.on_completed:
+            self.on_completed(result)
+        return True
+    
+    def download(self):
+        """다운로드를 수행하고 히스토리에 기록할 정보를 반환 (실패하면 예외 발생)"""
+        metrics = get_metrics()
+        # 정보 가져오기 단계에서 캐시된 스트림 정보를 그대로 사용
+        with metrics.phase('resolve'):
+            info = resolve_video_info(self.url, self.metadata_cache)
+        
+        # 같은 영상/포맷을 이미 받았으면 다시 받지 않고 기존 파일 사용 (대기열에 넣기 전
+        # reuse_cached()에서 캐시만으로 확인하지 못한 경우)
+        with metrics.phase('reuse'):
+            reused = self.reuse_existing(info)
+        if reused:
+            return reused
+        try:
+            with metrics.phase('transfer'):
+                file_path, format_info = self.download_stream(info)
+        except HTTPError as e:
+            # 캐시된 스트림 URL이 거부되면 정보를 새로 가져와 한 번 더 시도
+            if e.code not in (403, 404, 410) or self.cancelled:
+                raise
+            with metrics.phase('resolve'):
+                info = resolve_video_info(self.url, self.metadata_cache, refresh=True)
+            with metrics.phase('transfer'):
+                file_path, format_info = self.download_stream(info)
+        
+        # 변환할 파일은 변환이 끝난 뒤 결과 파일의 해시를 기록
+        content_hash = None
+        if not self.transcode:
+            with metrics.phase('hash'):
+                content_hash = self.content_hash(file_path, getattr(self.segmented, 'content_hash', None))
+        return self.build_result(info, format_info, file_path, format_info['extension'], content_hash)
+    
+    def content_hash(self, file_path, digest=None):
+        """파일의 블록 트리 해시 (받으면서 계산한 값이 없으면 파일을 읽어 계산)"""
+        if digest is None:
+            # ffmpeg가 만든 파일(합치기, 변환)은 받은 데이터와 내용이 달라 따로 읽음
+            digest = tree_digest(file_path)
+        if self.duplicates:
+            self.duplicates.remember(file_path, digest)
+        return digest
+    
+    def build_result(self, info, format_info, file_path, format, content_hash=None, reused=None, offline=False):
+        """히스토리에 기록할 정보 (offline이면 캐시에 없는 썸네일은 받지 않음)"""
+        # 히스토리에 표시할 썸네일은 다운로드 폴더가 아닌 썸네일 캐시에 저장 (같은 영상은 다시 받지 않음)
+        thumbnail_path = None
+        if self.thumbnail_cache:
+            with get_metrics().phase('thumbnail'):
+                if offline:
+                    thumbnail_path = self.thumbnail_cache.get(info['id'], HISTORY_SIZE)
+                else:
+                    thumbnail_path = self.thumbnail_cache.fetch(info['id'], info['thumbnail_url'], HISTORY_SIZE)
+        
+        return {
+            'video_id': info['id'],
+            'title': info['title'],
+            'author': info.get('author'),
+            'url': self.url,
+            'itag': self.itag,
+            'file_path': file_path,
+            'thumbnail_path': thumbnail_path,
+            'format': format,
+            'resolution': format_info.get('resolution') or format_info.get('abr'),
+            'file_size': os.path.getsize(file_path),
+            'content_hash': content_hash,
+            'reused': reused
+        }
+    
+    def reuse_existing(self, info, offline=False):
+        """받아 둔 같은 파일이 있으면 저장 위치에 링크하고 히스토리 정보 반환 (없으면 None)
+        
+        offline이면 파일 내용을 읽거나 복사하지 않고 네트워크도 쓰지 않는다 (DuplicateIndex.reuse).
+        """
+        format_info = find_format(info, self.itag)
+        if self.duplicates is None or format_info is None:
+            return None
+        file_path = self.output_path(format_info)
+        format = format_info['extension']
+        if self.convert:
+            file_path = transcode_path(file_path, self.convert)
+            format = self.convert
+        reused = self.duplicates.reuse(info['id'], self.itag, format, file_path, offline)
+        if reused is None:
+            return None
+        method, content_hash, file_path = reused
+        return self.build_result(info, format_info, file_path, format, content_hash, method, offline)
+    
+    def output_path(self, format_info):
+        """저장할 파일 경로 (사용자 지정 파일명 또는 기본값)"""
+        output_filename = self.filename if self.filename else format_info['default_filename']
+        return os.path.join(self.download_path, output_filename)
+    
+    def download_stream(self, info):
+        """선택한 itag의 스트림을 받아 (파일 경로, 포맷 정보) 반환"""
+        format_info = find_format(info, self.itag)
+        if format_info is None:
+            raise ValueError(f"선택한 포맷(itag {self.itag})을 찾을 수 없습니다")
+        file_path = self.output_path(format_info)
+        
+        if format_info.get('progressive', True):
+            # 여러 연결로 구간을 나누어 병렬 다운로드 (같은 영상/포맷이면 받은 구간부터 이어받음)
+            # 구간 수는 자동 모드에서 호스트별로 조정된 값 (꺼져 있으면 기본값)
+            self.segmented = SegmentedDownloader(
+                format_info['url'], file_path, format_info['file_size'],
+                segments=get_concurrency().segments(url_host(format_info['url'])),
+                progress_callback=self.on_progress,
+                resume_key=f"{info['id']}:{self.itag}",
+                rate_key=self.rate_key, fsync=self.fsync
+            )
+        else:
+            # 영상 전용 스트림은 짝이 되는 음성 스트림과 동시에 받아 합침
+            audio_info = find_format(info, format_info['audio_itag'])
+            if audio_info is None:
+                raise ValueError(f"합칠 음성 포맷(itag {format_info['audio_itag']})을 찾을 수 없습니다")
+            self.segmented = AdaptiveDownloader(
+                format_info['url'], format_info['video_size'], audio_info['url'], audio_info['file_size'],
+                file_path, format_info['extension'],
+                progress_callback=self.on_progress,
+                resume_key=f"{info['id']}:{self.itag}",
+                rate_key=self.rate_key, fsync=self.fsync
+            )
+        if self.convert and self.transcode is None:
+            self.transcode = TranscodeJob(
+                file_path, self.convert, duration=info.get('length'),
+                partial_path=getattr(self.segmented, 'part_path', None),
+                available=lambda: self.segmented.contiguous_bytes(),
+                on_progress=lambda percentage: self._report_transcode('active', percentage),
+                on_completed=self._on_transcoded,
+                on_error=self.on_error
+            )
+            # 변환 작업자가 비어 있으면 받은 앞부분부터 바로 변환 시작 (구간 분할 다운로드만 가능)
+            if (FOLLOW_DOWNLOAD and isinstance(self.segmented, SegmentedDownloader)
+                    and self.transcoder.has_idle_worker()):
+                self.segmented.flush_chunks = True
+                self._start_transcode()
+        if self.cancelled:
+            raise DownloadCancelled("Download cancelled")
+        self.segmented.download()
+        return file_path, format_info
+    
+    def cancel(self):
+        self.cancelled = True
+        if self.segmented:
+            self.segmented.cancel()
+        self._cancel_transcode()
+    
+    @property
+    def transcode_id(self):
+        """변환 대기열에서 이 작업을 구분하는 키 (같은 파일로 변환하는 다른 다운로드와 겹치지 않도록 다운로드 ID 사용)"""
+        return self.rate_key or f"transcode-{id(self)}"
+    
+    def _start_transcode(self):
+        if self._transcode_started:
+            return
+        self._transcode_started = True
+        self._report_transcode('queued', 0)
+        self.transcoder.submit(self.transcode_id, self.transcode,
+                               on_start=lambda: self._report_transcode('active', 0))
+    
+    def _cancel_transcode(self):
+        if self.transcode:
+            self.transcoder.cancel(self.transcode_id)
+            self.transcode.cancel()
+    
+    def _report_transcode(self, status, percentage):
+        # 받는 동안 미리 시작한 변환은 알리지 않고 다 받은 뒤부터 변환 상황을 알림
+        if self.on_transcode and self.result is not None:
+            self.on_transcode(status, percentage)
+    
+    def _on_transcoded(self, output_path):
+        """변환 완료 (변환 작업자 스레드)"""
+        self.result = dict(self.result, file_path=output_path, format=self.convert,
+                           file_size=os.path.getsize(output_path),
+                           content_hash=self.content_hash(output_path))
+        if self.on_completed:
+            self.on_completed(self.result)
@@ -0,0 +1,143 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from core.journal import BLOCK_DIGEST_SIZE, BLOCK_SIZE
+
+# 블록별 해시와 전체 해시의 크기 (바이트)
+DIGEST_SIZE = BLOCK_DIGEST_SIZE
+
+# 전체 해시 계산에 쓰는 구분자 (블록 해시를 그대로 이어 붙인 다른 값과 구별)
+TREE_PERSON = b'ytdl-tree'
+
+# 검사 결과
+OK = 'ok'
+MISSING = 'missing'
+TRUNCATED = 'truncated'
+SIZE_MISMATCH = 'size_mismatch'
+CORRUPTED = 'corrupted'
+UNKNOWN = 'unknown'
+
+
+def block_hasher():
+    """블록 하나의 해시 객체"""
+    return hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+
+def combine_digests(digests, total_size):
+    """블록 해시들(파일 순서)과 전체 크기로 파일 해시(16진수) 계산"""
+    root = hashlib.blake2b(digest_size=DIGEST_SIZE, person=TREE_PERSON)
+    root.update(total_size.to_bytes(8, 'little'))
+    for digest in digests:
+        root.update(digest)
+    return root.hexdigest()
+
+
+class TreeHasher:
+    """앞에서부터 차례로 쓰는 데이터의 블록 트리 해시 (단일 연결 다운로드용)
+    
+    BLOCK_SIZE 블록마다 BLAKE2b 해시를 구하고, 블록 해시들을 다시 해시하여 파일 해시로 쓴다.
+    블록 단위로 나누어 계산해도 같은 값이 나오므로 구간을 나누어 받는 다운로드와 병렬 검사에서
+    같은 해시를 쓸 수 있다.
+    """
+    def __init__(self, block_size=BLOCK_SIZE):
+        self.block_size = block_size
+        self.digests = []
+        self.total_size = 0
+        self._block = block_hasher()
+        self._block_bytes = 0
+    
+    def update(self, data):
+        view = memoryview(data)
+        while view:
+            size = min(len(view), self.block_size - self._block_bytes)
+            self._block.update(view[:size])
+            self._block_bytes += size
+            self.total_size += size
+            view = view[size:]
+            if self._block_bytes == self.block_size:
+                self.digests.append(self._block.digest())
+                self._block = block_hasher()
+                self._block_bytes = 0
+    
+    def hexdigest(self):
+        digests = list(self.digests)
+        if self._block_bytes:
+            digests.append(self._block.digest())
+        return combine_digests(digests, self.total_size)
+
+
+def tree_digest(path, block_size=BLOCK_SIZE):
+    """파일을 앞에서부터 읽어 블록 트리 해시 계산"""
+    hasher = TreeHasher(block_size)
+    with open(path, 'rb') as f:
+        while True:
+            data = f.read(block_size)
+            if not data:
+                break
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _hash_block(path, start, size):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(size)
+    hasher = block_hasher()
+    hasher.update(data)
+    return hasher.digest(), len(data)
+
+
+def verify_files(entries, workers=None, block_size=BLOCK_SIZE, on_result=None):
+    """(키, 파일 경로, 기록된 크기, 기록된 해시) 목록을 검사하여 (키, 결과) 목록 반환
+    
+    모든 파일의 블록을 작업자 스레드들에 나누어 해시하므로 큰 파일 하나도 여러 코어에서
+    검사된다 (hashlib은 해시하는 동안 GIL을 놓음). 결과는 OK, MISSING, TRUNCATED(기록보다 작음),
+    SIZE_MISMATCH(기록보다 큼), CORRUPTED(내용이 다름), UNKNOWN(기록된 해시 없음) 중 하나이다.
+    on_result(키, 결과)는 파일 하나의 검사가 끝날 때마다 호출된다.
+    """
+    results = []
+    
+    def report(key, status):
+        results.append((key, status))
+        if on_result:
+            on_result(key, status)
+    
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1, thread_name_prefix="verify") as executor:
+        pending = []
+        for key, path, size, content_hash in entries:
+            try:
+                actual_size = os.path.getsize(path)
+            except OSError:
+                report(key, MISSING)
+                continue
+            if size is not None and actual_size < size:
+                report(key, TRUNCATED)
+            elif size is not None and actual_size > size:
+                report(key, SIZE_MISMATCH)
+            elif not content_hash:
+                report(key, UNKNOWN)
+            else:
+                blocks = [executor.submit(_hash_block, path, start, min(block_size, actual_size - start))
+                          for start in range(0, actual_size, block_size)]
+                pending.append((key, actual_size, content_hash, blocks))
+        
+        # 블록 해시는 이미 모두 작업자에 넣었으므로 파일 순서대로 결과를 모음
+        for key, actual_size, content_hash, blocks in pending:
+            try:
+                digests = []
+                read = 0
+                for block in blocks:
+                    digest, length = block.result()
+                    digests.append(digest)
+                    read += length
+            except OSError:
+                report(key, MISSING)
+                continue
+            if read < actual_size:
+                report(key, TRUNCATED)
+            elif combine_digests(digests, actual_size) != content_hash:
+                report(key, CORRUPTED)
+            else:
+                report(key, OK)
+    return results
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+
+# 저널 파일 형식 버전
+JOURNAL_VERSION = 1
+
+# 검증 단위 블록 크기 (구간은 항상 블록 경계에서 시작)
+BLOCK_SIZE = 4 * 1024 * 1024
+
+# 저널을 디스크에 기록하는 최소 간격 (초)
+SAVE_INTERVAL = 1.0
+
+# 블록별 BLAKE2b 해시 크기 (core.integrity의 블록 트리 해시와 같아야 함)
+BLOCK_DIGEST_SIZE = 32
+
+
+class SegmentJournal:
+    """부분 다운로드 파일 옆에 완료된 블록과 체크섬을 기록하는 저널
+    
+    블록마다 CRC32를 저장해 두고, 이어받기 전에 실제 파일 내용과 비교해
+    검증된 블록만 완료로 인정한다. 파일 해시에 쓰는 블록별 BLAKE2b 해시는 메모리에만 두고,
+    이어받을 때는 검증하면서 다시 계산한다.
+    """
+    def __init__(self, path, resume_key, total_size, block_size=BLOCK_SIZE):
+        self.path = path
+        self.resume_key = resume_key
+        self.total_size = total_size
+        self.block_size = block_size
+        self.blocks = {}
+        self.digests = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+    
+    @classmethod
+    def load(cls, path, resume_key, total_size, block_size=BLOCK_SIZE):
+        """기존 저널을 불러오고, 다른 파일의 저널이면 빈 저널을 반환"""
+        journal = cls(path, resume_key, total_size, block_size)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return journal
+        
+        if (data.get('version') == JOURNAL_VERSION
+                and data.get('resume_key') == resume_key
+                and data.get('total_size') == total_size
+                and data.get('block_size') == block_size):
+            journal.blocks = {int(index): crc for index, crc in data.get('blocks', {}).items()}
+        return journal
+    
+    @property
+    def block_count(self):
+        return (self.total_size + self.block_size - 1) // self.block_size
+    
+    def block_range(self, index):
+        """블록의 [start, end] 바이트 범위"""
+        start = index * self.block_size
+        return start, min(start + self.block_size, self.total_size) - 1
+    
+    def completed_bytes(self):
+        with self._lock:
+            indexes = list(self.blocks)
+        return sum(end - start + 1 for start, end in map(self.block_range, indexes))
+    
+    def contiguous_bytes(self):
+        """파일 앞부분부터 끊김 없이 완료된 바이트 수 (완료된 블록은 이미 디스크에 기록됨)"""
+        with self._lock:
+            index = 0
+            while index in self.blocks:
+                index += 1
+        return min(index * self.block_size, self.total_size)
+    
+    def is_complete(self):
+        with self._lock:
+            return len(self.blocks) == self.block_count
+    
+    def mark_done(self, index, crc, digest=None):
+        """블록 완료 기록 (저장은 save_if_due에서 모아서 수행)"""
+        with self._lock:
+            self.blocks[index] = crc
+            if digest is not None:
+                self.digests[index] = digest
+            self._dirty = True
+    
+    def block_digests(self):
+        """모든 블록의 해시 (파일 순서, 해시가 없는 블록이 있으면 None)"""
+        with self._lock:
+            if len(self.digests) != self.block_count:
+                return None
+            return [self.digests[index] for index in range(self.block_count)]
+    
+    def reset(self):
+        with self._lock:
+            self.blocks.clear()
+            self.digests.clear()
+            self._dirty = True
+    
+    def verify(self, part_path):
+        """부분 파일을 읽어 체크섬이 맞지 않는 블록을 완료 목록에서 제외 (맞는 블록은 해시 계산)"""
+        if not os.path.exists(part_path) or os.path.getsize(part_path) != self.total_size:
+            self.reset()
+            return 0
+        
+        with self._lock:
+            indexes = sorted(self.blocks)
+        invalid = []
+        digests = {}
+        with open(part_path, 'rb') as f:
+            for index in indexes:
+                start, end = self.block_range(index)
+                f.seek(start)
+                data = f.read(end - start + 1)
+                if zlib.crc32(data) != self.blocks[index]:
+                    invalid.append(index)
+                else:
+                    digests[index] = hashlib.blake2b(data, digest_size=BLOCK_DIGEST_SIZE).digest()
+        
+        with self._lock:
+            for index in invalid:
+                self.blocks.pop(index, None)
+            self.digests.update(digests)
+            self._dirty = self._dirty or bool(invalid)
+        return len(indexes) - len(invalid)
+    
+    def missing_ranges(self):
+        """아직 받지 않은 연속 블록 구간 목록 [(첫 블록, 마지막 블록), ...]"""
+        with self._lock:
+            done = set(self.blocks)
+        ranges = []
+        run_start = None
+        for index in range(self.block_count):
+            if index in done:
+                if run_start is not None:
+                    ranges.append((run_start, index - 1))
+                    run_start = None
+            elif run_start is None:
+                run_start = index
+        if run_start is not None:
+            ranges.append((run_start, self.block_count - 1))
+        return ranges
+    
+    def save_if_due(self):
+        if self._dirty and time.monotonic() - self._last_save >= SAVE_INTERVAL:
+            self.save()
+    
+    def save(self):
+        """저널을 임시 파일에 쓴 뒤 교체하여 원자적으로 저장"""
+        with self._save_lock:
+            with self._lock:
+                data = {
+                    'version': JOURNAL_VERSION,
+                    'resume_key': self.resume_key,
+                    'total_size': self.total_size,
+                    'block_size': self.block_size,
+                    'blocks': {str(index): crc for index, crc in sorted(self.blocks.items())}
+                }
+                self._dirty = False
+                self._last_save = time.monotonic()
+            
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+    
+    def remove(self):
+        for path in (self.path, self.path + '.tmp'):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,94 @@
+from urllib.parse import urlparse
+
+from core.concurrency import AUTO_MAX_DOWNLOADS, AUTO_MIN_DOWNLOADS, get_concurrency
+from core.scheduler import WorkerPool
+
+
+class DownloadManager:
+    """다운로드 작업을 관리하는 클래스
+    
+    다운로드마다 스레드를 만들지 않고, 고정 크기 작업자 풀이 우선순위 큐에서 작업을 꺼내 실행한다.
+    자동 모드에서는 ConcurrencyController가 처리량과 스로틀 응답을 보고 풀 크기를 정한다.
+    """
+    def __init__(self, max_concurrent_downloads=3, per_host_limit=None):
+        self.max_concurrent_downloads = max_concurrent_downloads
+        # 대기 중이거나 실행 중인 다운로드
+        self.active_downloads = {}
+        self.pool = WorkerPool(
+            max_workers=max_concurrent_downloads,
+            per_host_limit=per_host_limit,
+            name="download"
+        )
+    
+    def add_download(self, download_id, downloader, update_callback, priority=0):
+        """다운로드 작업 추가
+        
+        update_callback은 대기열에 들어갈 때 'queued'로, 작업자가 실행을 시작할 때
+        'active'로 호출된다. 'active' 호출은 작업자 스레드에서 일어난다.
+        """
+        self.active_downloads[download_id] = downloader
+        update_callback('queued')
+        self.pool.submit(
+            download_id,
+            downloader,
+            priority=priority,
+            host=urlparse(downloader.url).hostname,
+            on_start=lambda: update_callback('active')
+        )
+    
+    def remove_download(self, download_id):
+        """다운로드 작업 제거 (대기 중이면 큐에서 빼고, 실행 중이면 취소)"""
+        if download_id in self.active_downloads:
+            downloader = self.active_downloads.pop(download_id)
+            if not self.pool.cancel(download_id):
+                # 다운로드는 끝났지만 변환 등 후속 단계가 남은 작업
+                downloader.cancel()
+    
+    def download_completed(self, download_id):
+        """다운로드 완료 처리 (다음 작업은 작업자 풀이 알아서 시작)"""
+        self.active_downloads.pop(download_id, None)
+    
+    def set_max_concurrent_downloads(self, max_downloads):
+        """최대 동시 다운로드 수 설정 (실행 중인 다운로드는 중단하지 않음, 자동 모드에서는 끌 때 적용)"""
+        self.max_concurrent_downloads = max_downloads
+        if not self.auto_concurrency:
+            self.pool.resize(max_downloads)
+    
+    @property
+    def auto_concurrency(self):
+        controller = get_concurrency()
+        return controller.enabled and controller.pool is self.pool
+    
+    def set_auto_concurrency(self, enabled, min_downloads=AUTO_MIN_DOWNLOADS, max_downloads=AUTO_MAX_DOWNLOADS):
+        """자동 모드 켜기/끄기 (켜면 [min_downloads, max_downloads] 안에서 조정, 끄면 설정한 수로 돌아감)"""
+        controller = get_concurrency()
+        if enabled:
+            if self.auto_concurrency:
+                controller.set_bounds(min_downloads, max_downloads)
+            else:
+                controller.start(self.pool, min_downloads, max_downloads)
+        elif self.auto_concurrency:
+            controller.stop()
+            self.pool.resize(self.max_concurrent_downloads)
+    
+    def set_host_limit(self, host, limit):
+        """호스트별 최대 동시 다운로드 수 설정"""
+        self.pool.set_host_limit(host, limit)
+    
+    def get_stats(self):
+        """대기열 길이와 대기 시간 통계 (자동 모드이면 조정 상태 포함)"""
+        stats = self.pool.stats()
+        if self.auto_concurrency:
+            stats['auto'] = get_concurrency().stats()
+        return stats
+    
+    def clear_all(self):
+        """모든 다운로드 작업 취소 (받은 구간은 이어받을 수 있도록 남겨 둠, 자동 조정도 멈춤)"""
+        self.set_auto_concurrency(False)
+        for download_id in list(self.active_downloads):
+            self.pool.cancel(download_id)
+        
+        # 진행 중이던 구간과 저널이 디스크에 기록될 때까지 잠시 대기
+        self.pool.wait_for_running(timeout=5)
+        
+        self.active_downloads.clear()
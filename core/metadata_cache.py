@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+# 메모리에 보관할 최대 항목 수
+DEFAULT_CAPACITY = 256
+
+# 메타데이터 유효 시간 (초)
+DEFAULT_TTL = 6 * 60 * 60
+
+# 스트림 URL 만료 시각보다 이만큼 일찍 캐시를 버림 (다운로드 도중 만료 방지)
+EXPIRE_MARGIN = 10 * 60
+
+
+def stream_expire_time(url):
+    """googlevideo 스트림 URL의 expire 파라미터 (없으면 None)"""
+    try:
+        return int(parse_qs(urlsplit(url).query)['expire'][0])
+    except (KeyError, ValueError, IndexError):
+        return None
+
+
+def iter_formats(info):
+    """info의 모든 비디오/오디오 포맷 항목"""
+    for group in ('video_formats', 'audio_formats'):
+        for formats in info.get(group, {}).values():
+            yield from formats
+
+
+def find_format(info, itag):
+    """itag에 해당하는 포맷 항목 (없으면 None)"""
+    for format_info in iter_formats(info):
+        if format_info['itag'] == itag:
+            return format_info
+    return None
+
+
+class MetadataCache:
+    """video_id를 키로 하는 영상 정보 캐시 (메모리 LRU + SQLite)
+
+    info 딕셔너리에는 스트림 URL이 들어 있으므로, TTL과 별개로 가장 먼저 만료되는
+    스트림 URL의 expire 시각이 지나면 항목을 버린다.
+    SQLite에는 db(Database)의 연결로 기록하므로 커밋은 Database의 커밋 스레드가 모아서 한다.
+    """
+    def __init__(self, db, capacity=DEFAULT_CAPACITY, ttl=DEFAULT_TTL):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.db = db
+        self.db.write('''
+        CREATE TABLE IF NOT EXISTS video_metadata (
+            video_id TEXT PRIMARY KEY,
+            info TEXT,
+            expires_at REAL
+        )
+        ''')
+
+        # 통계
+        self.hits = 0
+        self.misses = 0
+
+    def expires_at(self, info, now=None):
+        """항목 만료 시각 (TTL과 스트림 URL 만료 중 빠른 쪽)"""
+        expires = (now or time.time()) + self.ttl
+        for format_info in iter_formats(info):
+            expire = stream_expire_time(format_info.get('url') or '')
+            if expire:
+                expires = min(expires, expire - EXPIRE_MARGIN)
+        return expires
+
+    def get(self, video_id):
+        """유효한 info 반환 (없거나 만료되었으면 None)"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(video_id)
+            if entry is None:
+                rows = self.db.query(
+                    "SELECT info, expires_at FROM video_metadata WHERE video_id=?", (video_id,)
+                )
+                if rows:
+                    entry = (json.loads(rows[0][0]), rows[0][1])
+                    self._remember(video_id, entry)
+            else:
+                self._memory.move_to_end(video_id)
+
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    self._forget(video_id)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, video_id, info):
+        entry = (info, self.expires_at(info))
+        with self._lock:
+            self._remember(video_id, entry)
+            self.db.write(
+                "INSERT OR REPLACE INTO video_metadata (video_id, info, expires_at) VALUES (?, ?, ?)",
+                (video_id, json.dumps(info), entry[1])
+            )
+
+    def invalidate(self, video_id):
+        with self._lock:
+            self._forget(video_id)
+
+    def purge_expired(self):
+        """만료된 항목을 SQLite에서 정리"""
+        with self._lock:
+            self.db.write("DELETE FROM video_metadata WHERE expires_at <= ?", (time.time(),))
+
+    def _remember(self, video_id, entry):
+        self._memory[video_id] = entry
+        self._memory.move_to_end(video_id)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def _forget(self, video_id):
+        self._memory.pop(video_id, None)
+        self.db.write("DELETE FROM video_metadata WHERE video_id=?", (video_id,))
@@ -0,0 +1,258 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from core import tracing
+
+# Prometheus 측정값 이름 접두어
+PREFIX = 'ytdl_'
+
+# 시간 측정값의 히스토그램 구간 경계 (초)
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+# 기록 파일에 요약을 남기는 간격 (초), 파일 하나의 최대 크기와 보관할 이전 파일 수
+LOG_INTERVAL = 60
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 5
+
+# 측정값 서버 포트와 기록 파일 경로를 지정하는 환경 변수 (GUI는 이 값으로만 켬)
+PORT_ENV = 'YTDL_METRICS_PORT'
+LOG_ENV = 'YTDL_METRICS_LOG'
+
+# 측정값 설명 (Prometheus HELP)
+DESCRIPTIONS = {
+    'phase_seconds': "작업 단계별 소요 시간",
+    'queue_wait_seconds': "작업자 풀 대기열에서 기다린 시간",
+    'downloads_total': "끝난 다운로드 수 (결과별)",
+    'bytes_total': "호스트별 받은 바이트",
+    'retries_total': "호스트별 다시 시도한 요청 수",
+    'throttled_total': "호스트별 스로틀 응답 수 (HTTP 429/403)",
+    'metadata_cache_total': "영상 정보 캐시 조회 수 (hit/miss)",
+    'event_loop_lag_seconds': "GUI 이벤트 루프 하트비트가 늦어진 시간",
+    'ui_stalls_total': "GUI 이벤트 루프가 멈춤 기준을 넘긴 횟수",
+}
+
+
+def url_host(url):
+    """URL의 호스트 이름 (호스트별 측정값의 라벨)"""
+    return urlsplit(url).hostname or 'unknown'
+
+
+class _Histogram:
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+    
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for index, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+                break
+
+
+class Metrics:
+    """프로세스 전체가 공유하는 카운터와 시간 히스토그램
+    
+    어느 스레드에서나 호출할 수 있다. 라벨은 키워드 인자로 넘기며 (이름, 라벨) 조합마다 값이 따로
+    쌓인다. prometheus()는 Prometheus 텍스트 형식, snapshot()은 JSON으로 바꿀 수 있는 딕셔너리를
+    반환한다.
+    """
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+    
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+    
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(seconds)
+    
+    @contextmanager
+    def timer(self, name, **labels):
+        """with 블록의 실행 시간을 기록 (예외로 끝나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+    
+    @contextmanager
+    def phase(self, phase):
+        """작업 단계 하나의 시간을 phase_seconds{phase=...}에 기록하는 with 블록 (추적 중이면 구간도 기록)"""
+        with self.timer('phase_seconds', phase=phase), tracing.span(phase, 'phase'):
+            yield
+    
+    def counters(self, name):
+        """이름이 name인 카운터들의 {라벨 튜플: 값}"""
+        with self._lock:
+            return {labels: value for (counter, labels), value in self._counters.items() if counter == name}
+    
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started_at = time.time()
+    
+    def snapshot(self):
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), 'count': histogram.count,
+                           'sum': round(histogram.sum, 6), 'max': round(histogram.max, 6),
+                           'avg': round(histogram.sum / histogram.count, 6) if histogram.count else 0.0}
+                          for (name, labels), histogram in sorted(self._histograms.items())]
+        return {'started_at': self.started_at, 'counters': counters, 'timers': histograms}
+    
+    def prometheus(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = [(key, histogram.count, histogram.sum, list(histogram.buckets))
+                          for key, histogram in sorted(self._histograms.items())]
+        lines = []
+        described = set()
+        
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in DESCRIPTIONS:
+                    lines.append(f"# HELP {PREFIX}{name} {DESCRIPTIONS[name]}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f"{PREFIX}{name}{_labels(labels)} {value}")
+        for (name, labels), count, total, buckets in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{PREFIX}{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + "}"
+
+
+class MetricsLog:
+    """측정값 요약을 일정 간격으로 JSON 한 줄씩 기록하는 파일 (크기가 넘으면 이전 파일로 돌림)"""
+    def __init__(self, path, metrics=None, interval=LOG_INTERVAL, max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+        # 기록 파일을 켤 때만 불러옴 (시작 시간 단축)
+        from logging.handlers import RotatingFileHandler
+        self.metrics = metrics or get_metrics()
+        self.interval = interval
+        self.handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-log", daemon=True)
+        self._thread.start()
+    
+    def write(self):
+        import logging
+        record = dict(self.metrics.snapshot(), time=time.time())
+        self.handler.handle(logging.makeLogRecord({'msg': json.dumps(record, ensure_ascii=False)}))
+    
+    def close(self):
+        """마지막 요약을 기록하고 파일을 닫음"""
+        self._stop.set()
+        self._thread.join()
+        self.write()
+        self.handler.close()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+
+def _handler_class(metrics):
+    # http.server는 측정값 서버를 켤 때만 불러옴 (시작 시간 단축)
+    from http.server import BaseHTTPRequestHandler
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+        
+        def do_GET(self):
+            path = urlsplit(self.path).path
+            if path == '/metrics':
+                self.send_text(200, metrics.prometheus(), 'text/plain; version=0.0.4; charset=utf-8')
+            elif path == '/metrics.json':
+                self.send_text(200, json.dumps(metrics.snapshot(), ensure_ascii=False), 'application/json; charset=utf-8')
+            else:
+                self.send_text(404, "not found\n", 'text/plain; charset=utf-8')
+        
+        def send_text(self, status, text, content_type):
+            body = text.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+    
+    return MetricsHandler
+
+
+class MetricsServer:
+    """GET /metrics (Prometheus)와 GET /metrics.json을 제공하는 로컬 HTTP 서버"""
+    def __init__(self, port, host='127.0.0.1', metrics=None):
+        from http.server import ThreadingHTTPServer
+        handler = _handler_class(metrics or get_metrics())
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+    
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def start_exporters(address=None, log_path=None):
+    """측정값 서버와 기록 파일을 켜고 종료할 때 close()할 객체 목록 반환
+    
+    address는 '포트' 또는 '호스트:포트'이다 (호스트가 없으면 이 컴퓨터에서만 접속 가능).
+    인자가 없으면 환경 변수(PORT_ENV, LOG_ENV)를 사용하며, 둘 다 없으면 아무것도 켜지 않는다.
+    """
+    address = address or os.environ.get(PORT_ENV)
+    log_path = log_path or os.environ.get(LOG_ENV)
+    exporters = []
+    if address:
+        host, _, port = str(address).rpartition(':')
+        exporters.append(MetricsServer(int(port), host or '127.0.0.1'))
+    if log_path:
+        exporters.append(MetricsLog(log_path))
+    return exporters
+
+
+_metrics = Metrics()
+
+
+def get_metrics():
+    """앱 전체가 공유하는 측정값"""
+    return _metrics
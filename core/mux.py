@@ -0,0 +1,133 @@
+# 영상 전용/음성 전용(DASH) 스트림을 ffmpeg로 하나의 파일로 합치는 함수들
+import os
+import shutil
+import subprocess
+import tempfile
+
+# ffmpeg 실행 파일 (환경 변수로 경로 지정 가능)
+FFMPEG_ENV = 'FFMPEG_BINARY'
+
+# 받는 즉시 파이프로 넘겨 합칠 수 있는지 (Windows는 추가 파이프를 자식 프로세스에 넘길 수 없어 임시 파일 사용)
+STREAMING_MUX = os.name != 'nt'
+
+# 파이프에 한 번에 쓰는 최대 크기
+PIPE_WRITE_SIZE = 64 * 1024
+
+
+class MuxError(Exception):
+    """ffmpeg로 합치기에 실패했을 때 발생하는 예외"""
+
+
+def ffmpeg_path():
+    """ffmpeg 실행 파일 경로 (없으면 None)"""
+    return shutil.which(os.environ.get(FFMPEG_ENV) or 'ffmpeg')
+
+
+def _command(inputs, output_path, container):
+    ffmpeg = ffmpeg_path()
+    if ffmpeg is None:
+        raise MuxError("영상과 음성을 합치려면 ffmpeg가 필요합니다")
+    command = [ffmpeg, '-hide_banner', '-loglevel', 'error', '-nostdin', '-y']
+    for source in inputs:
+        command += ['-i', source]
+    # 다시 인코딩하지 않고 첫 입력의 영상과 두 번째 입력의 음성만 담음
+    command += ['-map', '0:v:0', '-map', '1:a:0', '-c', 'copy']
+    if container == 'mp4':
+        command += ['-movflags', '+faststart']
+    command += ['-f', container, output_path]
+    return command
+
+
+def mux_files(video_path, audio_path, output_path, container='mp4'):
+    """받아 둔 영상/음성 파일을 합쳐 output_path에 저장"""
+    result = subprocess.run(_command([video_path, audio_path], output_path, container),
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise MuxError(f"ffmpeg 오류: {result.stderr.decode('utf-8', 'replace').strip()}")
+
+
+class PipeSink:
+    """ffmpeg 입력 파이프의 쓰기 쪽"""
+    def __init__(self, fd):
+        self.fd = fd
+    
+    def write(self, data):
+        """data를 모두 쓸 때까지 대기 (ffmpeg가 읽는 속도에 맞춰짐)"""
+        view = memoryview(data)
+        try:
+            while view:
+                written = os.write(self.fd, view[:PIPE_WRITE_SIZE])
+                view = view[written:]
+        except OSError as e:
+            # ffmpeg가 먼저 종료됨 (네트워크 오류로 보고 다시 시도하지 않도록 구분)
+            raise MuxError(f"ffmpeg 입력 파이프가 닫혔습니다: {e}") from e
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class StreamMuxer:
+    """두 파이프로 영상과 음성을 받으면서 바로 합치는 ffmpeg 프로세스 (POSIX 전용)
+    
+    video/audio에 받은 순서대로 쓰고 둘 다 닫은 뒤 finish()를 호출한다. 임시 파일을 만들지
+    않으며, 파이프가 차면 쓰기가 대기하므로 메모리 사용량도 일정하다. 입력은 앞에서부터
+    읽을 수 있는 형식(DASH의 조각난 MP4, WebM)이어야 한다.
+    """
+    def __init__(self, output_path, container='mp4'):
+        self.output_path = output_path
+        self.stderr = None
+        # 오류 출력은 임시 파일로 받음 (파이프로 받으면 입력을 다 쓰기 전에는 읽지 않으므로 오류 출력이
+        # 파이프 버퍼를 채웠을 때 ffmpeg가 입력을 읽지 않고 멈추고 쓰는 쪽도 함께 멈춤)
+        self._errors = tempfile.TemporaryFile()
+        video_read, video_write = os.pipe()
+        audio_read, audio_write = os.pipe()
+        try:
+            self.process = subprocess.Popen(
+                _command([f'pipe:{video_read}', f'pipe:{audio_read}'], output_path, container),
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=self._errors,
+                pass_fds=(video_read, audio_read)
+            )
+        except BaseException:
+            for fd in (video_write, audio_write):
+                os.close(fd)
+            self._errors.close()
+            raise
+        finally:
+            # 읽기 쪽은 ffmpeg만 가지고 있어야 ffmpeg 종료 시 쓰기가 실패함
+            os.close(video_read)
+            os.close(audio_read)
+        self.video = PipeSink(video_write)
+        self.audio = PipeSink(audio_write)
+    
+    def finish(self):
+        """ffmpeg 종료를 기다리고 실패하면 MuxError 발생"""
+        self.video.close()
+        self.audio.close()
+        message = self.wait()
+        if self.process.returncode != 0:
+            raise MuxError(f"ffmpeg 오류: {message}")
+    
+    def wait(self):
+        """ffmpeg 종료를 기다리고 오류 출력 반환"""
+        if self.stderr is None:
+            self.process.wait()
+            self._errors.seek(0)
+            self.stderr = self._errors.read().decode('utf-8', 'replace').strip()
+            self._errors.close()
+        return self.stderr
+    
+    def kill(self):
+        """ffmpeg를 바로 종료 (파이프 쓰기에서 대기 중인 쪽은 MuxError로 깨어남)"""
+        if self.process.poll() is None:
+            self.process.kill()
+    
+    def abort(self):
+        """ffmpeg를 중단하고 만들던 파일 삭제 (파이프에 쓰는 쪽이 모두 끝난 뒤 호출)"""
+        self.kill()
+        self.wait()
+        self.video.close()
+        self.audio.close()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
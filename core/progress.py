@@ -0,0 +1,127 @@
+import math
+import threading
+import time
+
+# 화면 등에 진행 상황을 알리는 간격 (초)
+REPORT_INTERVAL = 0.25
+
+# 속도 이동 평균의 시간 상수 (초, 클수록 완만하게 변함)
+SPEED_TIME_CONSTANT = 3.0
+
+
+def format_eta(seconds):
+    """남은 시간을 '1:05' 또는 '1:02:03' 형태로 표시"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+class DownloadProgress:
+    """다운로드 하나의 바이트 카운터와 표본으로 계산한 속도"""
+    def __init__(self, total=0):
+        self.downloaded = 0
+        self.total = total
+        self.speed = 0.0
+        self._last_bytes = None
+        self._last_time = None
+    
+    @property
+    def eta(self):
+        """남은 시간 (초, 알 수 없으면 None)"""
+        if not self.total or self.speed <= 0:
+            return None
+        return max(0, self.total - self.downloaded) / self.speed
+    
+    @property
+    def percentage(self):
+        if not self.total:
+            return 0
+        return min(100, int(self.downloaded / self.total * 100))
+    
+    def sample(self, now):
+        if self._last_time is None:
+            # 데이터가 들어오기 시작한 첫 표본은 기준점만 잡음 (이어받은 크기가 속도에 섞이지 않도록)
+            if not self.downloaded:
+                return
+            self._last_bytes = self.downloaded
+            self._last_time = now
+            return
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return
+        rate = (self.downloaded - self._last_bytes) / elapsed
+        # 표본 간격과 무관하게 같은 정도로 평활되도록 시간 기반 가중치 사용
+        weight = 1 - math.exp(-elapsed / SPEED_TIME_CONSTANT)
+        self.speed += weight * (rate - self.speed)
+        self._last_bytes = self.downloaded
+        self._last_time = now
+    
+    def as_dict(self):
+        return {
+            'downloaded': self.downloaded,
+            'total': self.total,
+            'percentage': self.percentage,
+            'speed': self.speed,
+            'eta': self.eta,
+        }
+
+
+class ProgressTracker:
+    """여러 다운로드의 진행 상황을 모아 일정 간격으로 표본을 만드는 객체
+    
+    update()는 청크마다 네트워크 스레드에서 호출되며 숫자만 기록한다. 화면이나 API는
+    sample()로 다운로드별/전체 진행률, 이동 평균 속도, 남은 시간을 한꺼번에 가져간다.
+    """
+    def __init__(self):
+        self._downloads = {}
+        self._lock = threading.Lock()
+        self._snapshot = {'downloads': {}, 'total': self._summary([])}
+    
+    def register(self, download_id, total=0):
+        with self._lock:
+            self._downloads[download_id] = DownloadProgress(total)
+    
+    def update(self, download_id, downloaded, total):
+        progress = self._downloads.get(download_id)
+        if progress is not None:
+            progress.downloaded = downloaded
+            progress.total = total
+    
+    def remove(self, download_id):
+        with self._lock:
+            self._downloads.pop(download_id, None)
+    
+    def sample(self, now=None):
+        """지금 시점의 표본을 만들어 반환"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for progress in self._downloads.values():
+                progress.sample(now)
+            downloads = {download_id: progress.as_dict() for download_id, progress in self._downloads.items()}
+            self._snapshot = {'downloads': downloads, 'total': self._summary(downloads.values())}
+            return self._snapshot
+    
+    def snapshot(self):
+        """마지막 표본 (새로 계산하지 않음)"""
+        with self._lock:
+            return self._snapshot
+    
+    @staticmethod
+    def _summary(downloads):
+        downloads = list(downloads)
+        downloaded = sum(d['downloaded'] for d in downloads)
+        total = sum(d['total'] for d in downloads)
+        speed = sum(d['speed'] for d in downloads)
+        return {
+            'active': len(downloads),
+            'downloaded': downloaded,
+            'total': total,
+            'percentage': min(100, int(downloaded / total * 100)) if total else 0,
+            'speed': speed,
+            'eta': max(0, total - downloaded) / speed if total and speed > 0 else None,
+        }
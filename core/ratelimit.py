@@ -0,0 +1,190 @@
+import asyncio
+import re
+import threading
+import time
+from datetime import datetime
+
+# 최근 이 시간 안에 데이터를 받은 다운로드만 대역폭을 나눠 가짐 (초)
+ACTIVE_WINDOW = 1.0
+
+# 다운로드별 할당 속도를 다시 계산하는 최대 간격 (초, 시간대 제한 반영 포함)
+RECOMPUTE_INTERVAL = 0.5
+
+# 쉬었다가 한꺼번에 받을 수 있는 양 (할당 속도 기준 초)
+BURST_SECONDS = 0.5
+
+# 한 번에 기다리는 최대 시간 (제한이 바뀌면 이 간격 안에 반영됨)
+MAX_SLEEP = 0.25
+
+_SCHEDULE_LINE = re.compile(r'^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s+(\d+)$')
+
+
+def parse_schedule(text):
+    """'09:00-18:00 500' 형식(줄마다 시간대와 KB/s)의 시간대별 제한을 (시작 분, 끝 분, bytes/s) 목록으로 변환
+    
+    끝 시각이 시작보다 이르면 자정을 넘는 시간대로 본다. 빈 줄과 # 주석은 무시한다.
+    """
+    entries = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        match = _SCHEDULE_LINE.match(line)
+        if not match:
+            raise ValueError(f"{number}번째 줄의 형식이 잘못되었습니다: {line}")
+        start_hour, start_minute, end_hour, end_minute, limit = map(int, match.groups())
+        if start_hour > 23 or end_hour > 24 or start_minute > 59 or end_minute > 59:
+            raise ValueError(f"{number}번째 줄의 시각이 잘못되었습니다: {line}")
+        entries.append((start_hour * 60 + start_minute, end_hour * 60 + end_minute, limit * 1000))
+    return entries
+
+
+class _Flow:
+    """다운로드 하나의 토큰 버킷"""
+    def __init__(self, limit=None, weight=1.0):
+        self.limit = limit
+        self.weight = weight
+        self.rate = limit
+        self.tokens = 0.0
+        self.refilled = time.monotonic()
+        self.last_active = 0.0
+    
+    def refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(self.tokens + (now - self.refilled) * self.rate, self.rate * BURST_SECONDS)
+        self.refilled = now
+
+
+class RateLimiter:
+    """모든 다운로드가 함께 쓰는 토큰 버킷 속도 제한기
+    
+    전체 제한(시간대별 제한이 있으면 그 값)을 현재 받고 있는 다운로드들에 가중치 비율로 나누고,
+    다운로드별 제한보다 남는 몫은 나머지 다운로드에 다시 나눈다. acquire()는 Transport의
+    이벤트 루프에서 호출하며, 제한 설정은 어느 스레드에서 바꿔도 진행 중인 전송에 바로 반영된다.
+    속도 단위는 bytes/s이고 None은 무제한이다.
+    """
+    def __init__(self, limit=None):
+        self.limit = limit
+        self.schedule = []
+        self._flows = {}
+        self._lock = threading.Lock()
+        self._dirty = True
+        self._computed_at = 0.0
+    
+    def set_limit(self, limit):
+        """전체 제한 변경"""
+        with self._lock:
+            self.limit = limit or None
+            self._dirty = True
+    
+    def set_schedule(self, entries):
+        """시간대별 전체 제한 설정 (parse_schedule의 결과, 해당 시간대가 아니면 전체 제한 사용)"""
+        with self._lock:
+            self.schedule = list(entries)
+            self._dirty = True
+    
+    def configure(self, key, limit=None, weight=1.0):
+        """다운로드별 제한과 가중치 설정"""
+        with self._lock:
+            flow = self._flows.get(key)
+            if flow is None:
+                flow = self._flows[key] = _Flow()
+            flow.limit = limit or None
+            flow.weight = max(0.01, weight)
+            self._dirty = True
+    
+    def remove(self, key):
+        with self._lock:
+            if self._flows.pop(key, None):
+                self._dirty = True
+    
+    def effective_limit(self, now=None):
+        """지금 적용되는 전체 제한"""
+        now = now or datetime.now()
+        minute = now.hour * 60 + now.minute
+        for start, end, limit in self.schedule:
+            if start <= minute < end or (end < start and (minute >= start or minute < end)):
+                return limit
+        return self.limit
+    
+    async def acquire(self, key, size):
+        """size 바이트를 받은 뒤 호출하여 할당 속도를 넘지 않도록 대기"""
+        now = time.monotonic()
+        flow = self._flows.get(key)
+        if flow is None:
+            with self._lock:
+                flow = self._flows.setdefault(key, _Flow())
+        idle = now - flow.last_active >= ACTIVE_WINDOW
+        flow.last_active = now
+        if idle or self._dirty or now - self._computed_at >= RECOMPUTE_INTERVAL:
+            self._recompute(now)
+        if flow.rate is None:
+            return
+        
+        flow.refill(now)
+        flow.tokens -= size
+        while flow.tokens < 0:
+            rate = flow.rate
+            if rate is None:
+                flow.tokens = 0.0
+                return
+            await asyncio.sleep(min(-flow.tokens / rate, MAX_SLEEP))
+            now = time.monotonic()
+            # 기다리는 동안에도 받고 있는 다운로드로 취급
+            flow.last_active = now
+            if self._dirty or now - self._computed_at >= RECOMPUTE_INTERVAL:
+                self._recompute(now)
+            flow.refill(now)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'limit': self.effective_limit(),
+                'rates': {key: flow.rate for key, flow in self._flows.items()},
+            }
+    
+    def _recompute(self, now):
+        """현재 받고 있는 다운로드에 전체 제한을 가중치대로 나눔 (남는 몫은 다시 분배)"""
+        with self._lock:
+            self._dirty = False
+            self._computed_at = now
+            total = self.effective_limit()
+            active = [flow for flow in self._flows.values() if now - flow.last_active < ACTIVE_WINDOW]
+            if total is None:
+                for flow in self._flows.values():
+                    flow.rate = flow.limit
+                return
+            
+            remaining = float(total)
+            pending = list(active)
+            while pending:
+                weights = sum(flow.weight for flow in pending)
+                capped = [flow for flow in pending
+                          if flow.limit is not None and flow.limit <= remaining * flow.weight / weights]
+                if not capped:
+                    for flow in pending:
+                        flow.rate = remaining * flow.weight / weights
+                    break
+                for flow in capped:
+                    flow.rate = flow.limit
+                    remaining -= flow.limit
+                    pending.remove(flow)
+            
+            # 쉬고 있는 다운로드는 다시 시작할 때 새로 계산되므로 우선 최소 몫만 줌
+            for flow in self._flows.values():
+                if flow not in active:
+                    share = total * flow.weight / (sum(f.weight for f in active) + flow.weight)
+                    flow.rate = share if flow.limit is None else min(flow.limit, share)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """앱 전체가 공유하는 속도 제한기"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
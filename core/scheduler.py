@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+from core import tracing
+from core.metrics import get_metrics
+
+# 대기 시간 평균을 계산할 최근 작업 수
+WAIT_SAMPLE_SIZE = 200
+
+
+class ScheduledJob:
+    """작업자 풀에 들어간 작업 하나"""
+    def __init__(self, job_id, task, priority, host, on_start=None):
+        self.job_id = job_id
+        self.task = task
+        self.priority = priority
+        self.host = host
+        self.on_start = on_start
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.cancelled = False
+
+
+class WorkerPool:
+    """우선순위 큐에서 작업을 꺼내 실행하는 고정 크기 작업자 풀
+    
+    task는 run()과 cancel() 메서드를 가진 객체이다. 전체 동시 실행 수(max_workers)와
+    호스트별 동시 실행 수(per_host_limit)를 따로 제한하며, 실행 중에 resize()로
+    크기를 바꿔도 이미 실행 중인 작업은 끝까지 진행된다. 작업자 스레드는 처음 작업이 들어올 때
+    만들어지므로 쓰지 않는 풀은 시작 시간을 늘리지 않는다.
+    """
+    def __init__(self, max_workers=3, per_host_limit=None, name="worker"):
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = per_host_limit
+        self.host_limits = {}
+        self.name = name
+        
+        self._cond = threading.Condition()
+        self._queue = []
+        self._queued = {}
+        self._running = {}
+        self._host_active = {}
+        self._workers = set()
+        self._counter = itertools.count()
+        self._shutdown = False
+        
+        # 통계
+        self._wait_samples = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self._max_wait = 0.0
+        self._started = 0
+        self._completed = 0
+        self._failed = 0
+    
+    def submit(self, job_id, task, priority=0, host=None, on_start=None):
+        """작업 추가 (priority가 클수록 먼저 실행)
+        
+        on_start는 작업자 스레드에서 작업 시작 직전에 호출된다.
+        """
+        job = ScheduledJob(job_id, task, priority, host, on_start)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("작업자 풀이 종료되었습니다")
+            self._queued[job_id] = job
+            heapq.heappush(self._queue, (-priority, next(self._counter), job))
+            self._spawn_workers()
+            self._cond.notify()
+            tracing.begin('queued', job_id, self.name, priority=priority, host=host)
+            self._trace_load()
+        return job
+    
+    def cancel(self, job_id):
+        """대기 중인 작업은 큐에서 빼고, 실행 중인 작업에는 취소를 요청"""
+        with self._cond:
+            job = self._queued.pop(job_id, None)
+            if job:
+                job.cancelled = True
+                tracing.end('queued', job_id, self.name, cancelled=True)
+                self._trace_load()
+                return True
+            job = self._running.get(job_id)
+        if job:
+            job.task.cancel()
+            return True
+        return False
+    
+    def resize(self, max_workers):
+        """작업자 수 변경 (줄이는 경우 남는 작업자는 현재 작업을 마친 뒤 종료)"""
+        with self._cond:
+            self.max_workers = max(1, max_workers)
+            self._cond.notify_all()
+            # 아직 작업이 들어온 적 없는 풀은 첫 작업이 들어올 때 만듦
+            if self._workers:
+                self._spawn_workers()
+    
+    def set_host_limit(self, host, limit):
+        """특정 호스트의 동시 실행 수 제한 (None이면 기본값 사용)"""
+        with self._cond:
+            if limit is None:
+                self.host_limits.pop(host, None)
+            else:
+                self.host_limits[host] = max(1, limit)
+            self._cond.notify_all()
+    
+    def wait_for_running(self, timeout=None):
+        """실행 중인 작업이 모두 끝날 때까지 대기"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._running:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+    
+    def shutdown(self, cancel_running=False):
+        """대기 중인 작업을 버리고 작업자 종료"""
+        with self._cond:
+            self._shutdown = True
+            for job in self._queued.values():
+                job.cancelled = True
+                tracing.end('queued', job.job_id, self.name, cancelled=True)
+            self._queued.clear()
+            self._queue.clear()
+            running = list(self._running.values())
+            self._cond.notify_all()
+        if cancel_running:
+            for job in running:
+                job.task.cancel()
+    
+    def stats(self):
+        """큐 길이, 실행 수, 대기 시간 통계"""
+        with self._cond:
+            waits = list(self._wait_samples)
+            queued = list(self._queued.values())
+            now = time.monotonic()
+            return {
+                'workers': len(self._workers),
+                'max_workers': self.max_workers,
+                'queue_depth': len(queued),
+                'running': len(self._running),
+                'running_per_host': dict(self._host_active),
+                'started': self._started,
+                'completed': self._completed,
+                'failed': self._failed,
+                'avg_wait': sum(waits) / len(waits) if waits else 0.0,
+                'max_wait': self._max_wait,
+                'oldest_queued_wait': max((now - job.enqueued_at for job in queued), default=0.0),
+            }
+    
+    def _host_limit(self, host):
+        return self.host_limits.get(host, self.per_host_limit)
+    
+    def _host_available(self, host):
+        limit = self._host_limit(host)
+        return limit is None or self._host_active.get(host, 0) < limit
+    
+    def _pop_runnable(self):
+        """호스트 제한에 걸리지 않는 가장 우선순위 높은 작업을 꺼냄 (잠금 상태에서 호출)"""
+        skipped = []
+        job = None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            candidate = entry[2]
+            if candidate.cancelled:
+                continue
+            if self._host_available(candidate.host):
+                job = candidate
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+        return job
+    
+    def _trace_load(self):
+        """실행 중인 작업 수, 쉬는 작업자 수, 대기 수를 추적 타임라인에 기록 (잠금 상태에서 호출)"""
+        running = len(self._running)
+        tracing.counter(f"{self.name} pool", running=running, idle=max(0, self.max_workers - running),
+                        queued=len(self._queued))
+    
+    def _spawn_workers(self):
+        """작업자 수를 max_workers까지 채움 (잠금은 RLock이라 잠금 상태에서도 호출 가능)"""
+        with self._cond:
+            while len(self._workers) < self.max_workers and not self._shutdown:
+                worker = threading.Thread(target=self._worker_loop, name=f"{self.name}-{next(self._counter)}", daemon=True)
+                self._workers.add(worker)
+                worker.start()
+    
+    def _worker_loop(self):
+        current = threading.current_thread()
+        while True:
+            with self._cond:
+                while True:
+                    # 풀이 줄었거나 종료되면 남는 작업자는 빠짐
+                    if self._shutdown or len(self._workers) > self.max_workers:
+                        self._workers.discard(current)
+                        self._cond.notify_all()
+                        return
+                    job = self._pop_runnable()
+                    if job:
+                        break
+                    self._cond.wait()
+                
+                if self._queued.get(job.job_id) is job:
+                    del self._queued[job.job_id]
+                job.started_at = time.monotonic()
+                wait = job.started_at - job.enqueued_at
+                self._wait_samples.append(wait)
+                self._max_wait = max(self._max_wait, wait)
+                self._started += 1
+                self._running[job.job_id] = job
+                self._host_active[job.host] = self._host_active.get(job.host, 0) + 1
+                tracing.end('queued', job.job_id, self.name)
+                self._trace_load()
+            get_metrics().observe('queue_wait_seconds', wait, pool=self.name)
+            
+            failed = False
+            try:
+                with tracing.span(str(job.job_id), self.name, host=job.host):
+                    if job.on_start:
+                        job.on_start()
+                    job.task.run()
+            except Exception:
+                failed = True
+            finally:
+                with self._cond:
+                    self._running.pop(job.job_id, None)
+                    self._host_active[job.host] -= 1
+                    if not self._host_active[job.host]:
+                        del self._host_active[job.host]
+                    if failed:
+                        self._failed += 1
+                    else:
+                        self._completed += 1
+                    self._trace_load()
+                    self._cond.notify_all()
@@ -0,0 +1,432 @@
+import asyncio
+import io
+import os
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+
+from core import tracing
+from core.concurrency import DEFAULT_SEGMENTS
+from core.integrity import TreeHasher, block_hasher, combine_digests
+from core.journal import SegmentJournal, BLOCK_SIZE
+from core.metrics import get_metrics, url_host
+from core.ratelimit import get_rate_limiter
+from core.storage import (DEFAULT_FSYNC, FSYNC_BLOCK, WRITE_BUFFER_SIZE, allocated_bytes, commit_file,
+                          ensure_free_space, preallocate)
+from core.transport import get_transport
+
+# 한 번의 Range 요청으로 받을 최대 크기 (pytube 기본값과 동일, 스로틀링 회피)
+REQUEST_RANGE_SIZE = 9 * 1024 * 1024
+
+# 소켓에서 한 번에 읽는 크기
+READ_SIZE = 64 * 1024
+
+# 다운로드 중인 파일과 저널 파일의 접미사
+PART_SUFFIX = '.part'
+JOURNAL_SUFFIX = '.part.json'
+
+
+# 다시 시도할 수 있는 네트워크 오류
+NETWORK_ERRORS = (HTTPError, OSError, asyncio.TimeoutError, asyncio.IncompleteReadError)
+
+# 서버가 요청을 제한할 때 보내는 응답 (동시 연결 수를 줄이라는 신호로 throttled_total에 셈)
+THROTTLE_CODES = (403, 429)
+
+
+class DownloadCancelled(Exception):
+    """다운로드가 취소되었을 때 발생하는 예외"""
+
+
+class Segment:
+    """파일의 한 바이트 구간 [start, end]"""
+    def __init__(self, index, start, end):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.downloaded = 0
+        # 디스크에 기록되어 다른 곳에서 읽어도 되는 위치
+        self.flushed = start
+        # 현재 받고 있는 블록의 누적 체크섬과 해시
+        self.block_crc = 0
+        self.block_hash = block_hasher()
+    
+    @property
+    def size(self):
+        return self.end - self.start + 1
+    
+    @property
+    def offset(self):
+        """다음에 받아야 할 파일 오프셋"""
+        return self.start + self.downloaded
+    
+    @property
+    def done(self):
+        return self.downloaded >= self.size
+
+
+def plan_segments(journal, segments):
+    """저널에서 받지 않은 블록들을 블록 경계에 맞춘 최대 segments개의 구간으로 나눔"""
+    runs = journal.missing_ranges()
+    while runs and len(runs) < segments:
+        # 가장 긴 구간을 반으로 나눔
+        longest = max(range(len(runs)), key=lambda i: runs[i][1] - runs[i][0])
+        first, last = runs[longest]
+        if first == last:
+            break
+        middle = (first + last) // 2
+        runs[longest:longest + 1] = [(first, middle), (middle + 1, last)]
+    
+    result = []
+    for index, (first, last) in enumerate(sorted(runs)):
+        start = journal.block_range(first)[0]
+        end = journal.block_range(last)[1]
+        result.append(Segment(index, start, end))
+    return result
+
+
+async def open_range(transport, url, start, end, headers=None, timeout=30):
+    """[start, end] 구간을 GET으로 요청 (start가 None이면 전체, 오류 응답은 HTTPError)"""
+    headers = dict(headers or {})
+    if start is not None:
+        headers['Range'] = f"bytes={start}-{end}"
+    response = await transport.open('GET', url, headers, timeout=timeout)
+    if response.status >= 400:
+        response.close()
+        raise HTTPError(url, response.status, response.reason, None, io.BytesIO())
+    return response
+
+
+def partial_paths(file_path):
+    """다운로드 중 사용하는 (부분 파일, 저널) 경로"""
+    return file_path + PART_SUFFIX, file_path + JOURNAL_SUFFIX
+
+
+class SegmentedDownloader:
+    """여러 HTTP 연결로 바이트 구간을 병렬 다운로드하는 클래스
+    
+    구간들은 공유 Transport의 이벤트 루프에서 코루틴으로 받으므로 구간마다 스레드를 만들지 않는다.
+    받는 동안에는 '<파일명>.part'에 쓰고 완료된 블록을 '<파일명>.part.json' 저널에 기록한다.
+    같은 resume_key로 다시 시작하면 검증된 블록은 건너뛰고 남은 구간만 Range 요청으로 받는다.
+    서버가 Range 요청을 지원하지 않거나 전체 크기를 모르면 단일 연결로 처음부터 받는다.
+    progress_callback(bytes_downloaded, total_size)는 네트워크 스레드에서 호출된다.
+    받는 속도는 공유 속도 제한기에서 rate_key(기본값은 resume_key)의 몫으로 제한된다.
+    받으면서 블록마다 해시를 계산하므로, 다 받으면 파일을 다시 읽지 않고 content_hash에
+    블록 트리 해시(core.integrity)가 들어 있다.
+    시작할 때 여유 공간을 확인하고 전체 크기를 미리 할당하며, 청크는 WRITE_BUFFER_SIZE씩 모아 쓴다.
+    다 받으면 fsync 정책(core.storage)에 따라 동기화한 뒤 최종 파일명으로 바꾼다.
+    파일 쓰기, 체크섬/해시 계산, 저널 기록, fsync는 이 다운로드의 디스크 스레드에서 수행하므로
+    디스크가 느려도 다른 다운로드와 썸네일을 받는 네트워크 스레드는 멈추지 않는다. 구간마다
+    쓰기는 하나만 대기하고 그동안 받은 데이터는 연결의 수신 버퍼에 쌓이므로, 디스크가 느리면
+    받는 속도도 그에 맞춰 줄어든다.
+    """
+    def __init__(self, url, file_path, total_size, segments=DEFAULT_SEGMENTS,
+                 progress_callback=None, headers=None, timeout=30, retries=3, resume_key=None,
+                 transport=None, rate_limiter=None, rate_key=None, fsync=DEFAULT_FSYNC):
+        self.url = url
+        self.file_path = file_path
+        self.part_path, self.journal_path = partial_paths(file_path)
+        self.total_size = total_size or 0
+        self.segments = max(1, segments)
+        self.progress_callback = progress_callback
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.retries = retries
+        self.resume_key = resume_key or url
+        self.transport = transport or get_transport()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.rate_key = rate_key or self.resume_key
+        self.fsync = fsync or DEFAULT_FSYNC
+        self.host = url_host(url)
+        self.metrics = get_metrics()
+        
+        self.cancelled = False
+        self.bytes_downloaded = 0
+        self.resumed_bytes = 0
+        self.content_hash = None
+        self.journal = None
+        # 받는 도중 앞부분을 읽는 곳(변환 등)이 있으면 쓸 때마다 디스크에 기록
+        self.flush_chunks = False
+        self._active_segments = []
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def cancel(self):
+        """다운로드 취소 (받은 구간은 저널과 함께 남겨 둠)"""
+        self.cancelled = True
+    
+    def download(self):
+        """다운로드 수행 후 파일 경로 반환"""
+        directory = os.path.dirname(self.file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        if self.total_size <= 0 or not self.supports_range():
+            self._run(self._download_single(), 1)
+            self._finalize()
+            return self.file_path
+        
+        self.journal = SegmentJournal.load(self.journal_path, self.resume_key, self.total_size, BLOCK_SIZE)
+        if self.journal.blocks and self.journal.verify(self.part_path):
+            # 검증된 블록은 다시 받지 않음 (남은 부분에 필요한 공간만 확인)
+            self.resumed_bytes = self.journal.completed_bytes()
+            ensure_free_space(self.part_path, self.total_size - max(self.resumed_bytes, allocated_bytes(self.part_path)))
+        else:
+            # 새로 시작: 다른 다운로드와 섞여 조각나지 않도록 전체 크기만큼 미리 할당
+            self.journal.reset()
+            ensure_free_space(self.part_path, self.total_size - allocated_bytes(self.part_path))
+            with open(self.part_path, 'wb') as f:
+                preallocate(f, self.total_size)
+        self.journal.save()
+        
+        self.bytes_downloaded = self.resumed_bytes
+        segments = plan_segments(self.journal, self.segments)
+        self._active_segments = segments
+        
+        errors = []
+        if segments:
+            errors = self._run(self._download_segments(segments), len(segments))
+        
+        # 실패하거나 취소되어도 그때까지 받은 블록은 기록해 둠
+        self.journal.save()
+        
+        if errors:
+            # 취소 예외보다 실제 원인을 우선 전달
+            failures = [e for e in errors if not isinstance(e, DownloadCancelled)]
+            raise (failures or errors)[0]
+        
+        if not self.journal.is_complete():
+            raise IOError(f"다운로드 크기 불일치: {self.journal.completed_bytes()}/{self.total_size}")
+        
+        digests = self.journal.block_digests()
+        if digests is not None:
+            self.content_hash = combine_digests(digests, self.total_size)
+        self._finalize()
+        return self.file_path
+    
+    def contiguous_bytes(self):
+        """부분 파일 앞부분에서 읽어도 되는 바이트 수 (받는 도중 따라 읽는 용도)"""
+        journal = self.journal
+        if not journal:
+            return 0
+        position = journal.contiguous_bytes()
+        # 완료된 블록 바로 뒤를 받고 있는 구간은 디스크에 기록된 곳까지 이어서 읽을 수 있음
+        for segment in self._active_segments:
+            if segment.start <= position < segment.flushed:
+                position = segment.flushed
+        return position
+    
+    def supports_range(self):
+        """서버가 Range 요청을 지원하는지 확인"""
+        async def probe():
+            async with await self._open(0, 0) as response:
+                await response.read_all(self.timeout)
+                return response.status == 206
+        try:
+            return self.transport.run(probe())
+        except NETWORK_ERRORS:
+            return False
+    
+    def _finalize(self):
+        """부분 파일을 fsync 정책에 따라 동기화한 뒤 최종 파일명으로 바꾸고 저널 삭제"""
+        commit_file(self.part_path, self.file_path, self.fsync)
+        if self.journal:
+            self.journal.remove()
+        elif os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+    
+    def _run(self, coro, workers):
+        """coro를 네트워크 스레드에서 실행 (디스크 작업은 workers개의 디스크 스레드에서 수행)"""
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="disk")
+        try:
+            return self.transport.run(coro)
+        finally:
+            self._executor.shutdown()
+    
+    def _disk(self, func, *args):
+        """디스크 작업을 디스크 스레드에 맡기고 기다릴 수 있는 Future 반환 (이벤트 루프 안에서 호출)"""
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+    
+    async def _open(self, start, end):
+        return await open_range(self.transport, self.url, start, end, self.headers, self.timeout)
+    
+    def _add_progress(self, size):
+        self.metrics.inc('bytes_total', size, host=self.host)
+        with self._lock:
+            self.bytes_downloaded += size
+            downloaded = self.bytes_downloaded
+        if self.progress_callback:
+            self.progress_callback(downloaded, self.total_size)
+    
+    def _write(self, f, segment, chunk):
+        """청크를 쓰고, 블록이 끝날 때마다 체크섬을 저널에 기록 (디스크 스레드)"""
+        f.write(chunk)
+        position = segment.offset
+        view = memoryview(chunk)
+        while view:
+            index = position // BLOCK_SIZE
+            block_end = self.journal.block_range(index)[1]
+            size = min(len(view), block_end - position + 1)
+            segment.block_crc = zlib.crc32(view[:size], segment.block_crc)
+            segment.block_hash.update(view[:size])
+            position += size
+            view = view[size:]
+            if position > block_end:
+                # 저널이 블록을 완료로 기록하기 전에 데이터를 먼저 내보냄
+                f.flush()
+                if self.fsync == FSYNC_BLOCK:
+                    os.fsync(f.fileno())
+                self.journal.mark_done(index, segment.block_crc, segment.block_hash.digest())
+                segment.block_crc = 0
+                segment.block_hash = block_hasher()
+        segment.downloaded += len(chunk)
+        if self.flush_chunks:
+            f.flush()
+            segment.flushed = segment.offset
+        self.journal.save_if_due()
+    
+    async def _download_segments(self, segments):
+        """모든 구간을 동시에 받고 발생한 예외 목록 반환"""
+        async def run(segment):
+            try:
+                # 구간들은 한 스레드에서 겹쳐 실행되므로 비동기 구간으로 기록
+                with tracing.async_span('segment', 'segment', index=segment.index, start=segment.offset, end=segment.end):
+                    await self._download_segment(segment)
+            except BaseException:
+                # 한 구간이 실패하면 나머지도 중단
+                self.cancelled = True
+                raise
+        results = await asyncio.gather(*(run(segment) for segment in segments), return_exceptions=True)
+        return [result for result in results if isinstance(result, BaseException)]
+    
+    async def _download_segment(self, segment):
+        """한 구간을 REQUEST_RANGE_SIZE 단위의 Range 요청으로 나누어 받음"""
+        attempts = 0
+        f = await self._disk(open, self.part_path, 'r+b', WRITE_BUFFER_SIZE)
+        try:
+            while not segment.done:
+                if self.cancelled:
+                    raise DownloadCancelled("Download cancelled")
+                start = segment.offset
+                end = min(segment.end, start + REQUEST_RANGE_SIZE - 1)
+                try:
+                    await self._receive_range(f, segment, start, end)
+                    if segment.offset <= end:
+                        raise IOError("연결이 도중에 끊어졌습니다")
+                    attempts = 0
+                except DownloadCancelled:
+                    raise
+                except NETWORK_ERRORS as e:
+                    # 받은 위치부터 다시 시도
+                    attempts += 1
+                    self.metrics.inc('retries_total', host=self.host)
+                    if isinstance(e, HTTPError) and e.code in THROTTLE_CODES:
+                        self.metrics.inc('throttled_total', host=self.host)
+                    if attempts > self.retries or (isinstance(e, HTTPError) and e.code < 500 and e.code != 429):
+                        raise
+                    await asyncio.sleep(min(2 ** attempts, 10))
+        finally:
+            # 버퍼에 남은 데이터도 디스크 스레드에서 내보냄
+            await self._disk(f.close)
+    
+    async def _receive_range(self, f, segment, start, end):
+        """[start, end]를 요청해 받은 청크를 WRITE_BUFFER_SIZE씩 모아 디스크 스레드에서 씀
+        
+        모은 데이터를 쓰는 동안 다음 데이터를 받고, 앞의 쓰기가 끝나지 않았으면 더 모으지 않는다
+        (구간마다 쓰기는 하나만 대기하므로 디스크가 느리면 받는 속도도 맞춰 줄어듦). 진행률은 쓰기를
+        맡길 때 더하며, 돌아올 때는 모든 쓰기가 끝나 segment.offset이 실제로 기록된 위치를 가리킨다.
+        """
+        pending = None
+        batch = []
+        batch_size = 0
+        received = start
+        try:
+            async with await self._open(start, end) as response:
+                if response.status != 206:
+                    raise IOError(f"Range 요청이 거부되었습니다 (HTTP {response.status})")
+                await self._disk(f.seek, start)
+                while True:
+                    if self.cancelled:
+                        raise DownloadCancelled("Download cancelled")
+                    chunk = await response.read(min(READ_SIZE, end - received + 1), self.timeout)
+                    if chunk:
+                        batch.append(chunk)
+                        batch_size += len(chunk)
+                        received += len(chunk)
+                    finished = not chunk or received > end
+                    # 모은 크기가 WRITE_BUFFER_SIZE를 넘으면 내보냄 (경계에 맞춰 자르지 않으며 블록 경계는 _write가 나눔)
+                    if batch and (finished or batch_size >= WRITE_BUFFER_SIZE):
+                        if pending:
+                            await pending
+                        pending = self._disk(self._write, f, segment, b''.join(batch))
+                        self._add_progress(batch_size)
+                        batch = []
+                        batch_size = 0
+                    if finished:
+                        break
+                    await self.rate_limiter.acquire(self.rate_key, len(chunk))
+        finally:
+            if pending:
+                await pending
+    
+    async def _download_single(self):
+        """Range 요청 없이 단일 연결로 전체 파일을 받음 (이어받기 불가)"""
+        async with await self._open(None, None) as response:
+            if not self.total_size:
+                self.total_size = int(response.headers.get('content-length') or 0)
+            hasher = TreeHasher(BLOCK_SIZE)
+            f = await self._disk(self._create_part)
+            pending = None
+            batch = []
+            batch_size = 0
+            try:
+                # 구간 다운로드와 같이 WRITE_BUFFER_SIZE를 넘을 때까지 모아 디스크 스레드에서 씀
+                while True:
+                    if self.cancelled:
+                        raise DownloadCancelled("Download cancelled")
+                    chunk = await response.read(READ_SIZE, self.timeout)
+                    if chunk:
+                        batch.append(chunk)
+                        batch_size += len(chunk)
+                    if batch and (not chunk or batch_size >= WRITE_BUFFER_SIZE):
+                        if pending:
+                            await pending
+                        pending = self._disk(self._write_single, f, hasher, b''.join(batch))
+                        self._add_progress(batch_size)
+                        batch = []
+                        batch_size = 0
+                    if not chunk:
+                        break
+                    await self.rate_limiter.acquire(self.rate_key, len(chunk))
+                if pending:
+                    await pending
+                    pending = None
+                # 길이 없이 연결을 닫는 응답은 중간에 끊겨도 오류가 나지 않으므로 알려진 크기와 비교
+                # (부분 파일은 완성된 파일로 옮기지 않고 남겨 둠)
+                if self.total_size and hasher.total_size != self.total_size:
+                    raise IOError(f"다운로드 크기 불일치: {hasher.total_size}/{self.total_size}")
+                # 미리 할당한 크기보다 적게 받았으면 남는 부분을 잘라냄
+                await self._disk(f.truncate, hasher.total_size)
+            finally:
+                if pending:
+                    await pending
+                await self._disk(f.close)
+            self.content_hash = hasher.hexdigest()
+    
+    def _create_part(self):
+        """단일 연결 다운로드의 부분 파일을 새로 열고 전체 크기를 알면 미리 할당 (디스크 스레드)"""
+        if self.total_size:
+            ensure_free_space(self.part_path, self.total_size)
+        f = open(self.part_path, 'wb', buffering=WRITE_BUFFER_SIZE)
+        if self.total_size:
+            try:
+                preallocate(f, self.total_size)
+            except BaseException:
+                f.close()
+                raise
+        return f
+    
+    def _write_single(self, f, hasher, chunk):
+        """단일 연결로 받은 청크를 쓰고 해시 계산 (디스크 스레드)"""
+        f.write(chunk)
+        hasher.update(chunk)
@@ -0,0 +1,76 @@
+import errno
+import os
+import shutil
+
+# 받은 데이터를 디스크에 동기화(fsync)하는 정책
+FSYNC_NONE = 'none'      # 운영체제에 맡김 (가장 빠르지만 정전 시 최근 데이터가 사라질 수 있음)
+FSYNC_FINISH = 'finish'  # 완료한 파일을 동기화한 뒤 최종 파일명으로 바꿈
+FSYNC_BLOCK = 'block'    # 블록이 끝날 때마다 동기화 (이어받을 때 다시 받는 양이 가장 적음)
+FSYNC_POLICIES = (FSYNC_NONE, FSYNC_FINISH, FSYNC_BLOCK)
+DEFAULT_FSYNC = FSYNC_FINISH
+
+# 작은 청크를 모아 한 번에 쓰는 크기 (이 크기를 넘으면 내보내므로 쓰기는 조금 더 클 수 있고
+# 블록 경계에 맞지 않음, 블록 경계는 쓰는 쪽이 청크를 나누어 처리)
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def allocated_bytes(path):
+    """파일이 디스크에서 실제로 차지하는 크기 (없으면 0)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 0
+    # Windows에는 st_blocks가 없으므로 파일 크기 사용
+    blocks = getattr(stat, 'st_blocks', None)
+    return stat.st_size if blocks is None else min(stat.st_size, blocks * 512)
+
+
+def ensure_free_space(path, required):
+    """path가 있는 드라이브에 required 바이트가 남아 있는지 확인 (부족하면 IOError)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        free = shutil.disk_usage(directory).free
+    except OSError:
+        # 여유 공간을 알 수 없는 파일 시스템은 쓰면서 확인
+        return
+    if required > free:
+        raise IOError(f"저장 공간이 부족합니다 (필요 {required / 1000000:.1f}MB, 남은 공간 {free / 1000000:.1f}MB)")
+
+
+def preallocate(f, size):
+    """열린 파일에 size 바이트를 미리 할당 (조각나지 않도록 한 번에 확보, 지원하지 않으면 크기만 맞춤)"""
+    f.truncate(size)
+    if size <= 0 or not hasattr(os, 'posix_fallocate'):
+        return
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except OSError as e:
+        if e.errno == errno.ENOSPC:
+            raise IOError(f"저장 공간이 부족합니다 (필요 {size / 1000000:.1f}MB)") from e
+        # 네트워크 드라이브 등 미리 할당을 지원하지 않는 파일 시스템은 크기만 맞춘 채로 사용
+
+
+def sync_directory(path):
+    """path가 들어 있는 폴더의 항목 변경(파일명 바꾸기)을 디스크에 기록 (POSIX만)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def commit_file(part_path, file_path, fsync=DEFAULT_FSYNC):
+    """다 받은 임시 파일을 정책에 따라 동기화한 뒤 최종 파일명으로 바꿈
+    
+    파일명을 바꾸는 것은 원자적이므로 최종 파일명에는 완성된 파일만 보인다.
+    """
+    if fsync != FSYNC_NONE:
+        with open(part_path, 'r+b') as f:
+            os.fsync(f.fileno())
+    os.replace(part_path, file_path)
+    if fsync != FSYNC_NONE:
+        sync_directory(file_path)
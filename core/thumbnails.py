@@ -0,0 +1,159 @@
+import hashlib
+import os
+import threading
+import time
+
+from core.transport import get_transport
+
+# 썸네일 캐시 폴더 (다운로드 폴더가 아닌 앱 데이터 폴더)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".youtube_downloader", "thumbnails")
+
+# 캐시 폴더 최대 크기 (넘으면 가장 오래 쓰지 않은 이미지부터 삭제)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# 미리 줄여서 저장하는 크기 (히스토리 목록, 정보 미리보기)
+HISTORY_SIZE = (120, 68)
+PREVIEW_SIZE = (240, 180)
+THUMBNAIL_SIZES = (HISTORY_SIZE, PREVIEW_SIZE)
+
+# 마지막 사용 시각을 데이터베이스에 다시 기록하는 최소 간격 (초)
+TOUCH_INTERVAL = 60 * 60
+
+
+def thumbnail_url(video_id):
+    """썸네일 URL을 모를 때(히스토리 기록 등) 사용하는 기본 썸네일 주소"""
+    return f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+
+
+class ThumbnailCache:
+    """video_id로 찾는 내용 주소 기반 썸네일 캐시
+    
+    이미지는 내용의 해시로 저장하므로 같은 영상을 여러 번 받거나 다른 영상이 같은 이미지를
+    쓰더라도 한 번만 저장된다. scaler(data, width, height)가 있으면 THUMBNAIL_SIZES 크기로
+    줄인 JPEG만 저장하고, 없으면(GUI가 없는 환경) 원본을 저장한다. 색인은 db(Database)의 연결로
+    기록하므로 커밋은 Database의 커밋 스레드가 모아서 한다.
+    """
+    def __init__(self, db, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, scaler=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.scaler = scaler
+        self._touched = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        
+        self.db = db
+        self.db.write('''
+        CREATE TABLE IF NOT EXISTS thumbnail_index (
+            video_id TEXT PRIMARY KEY,
+            digest TEXT
+        )
+        ''')
+        self.db.write('''
+        CREATE TABLE IF NOT EXISTS thumbnail_files (
+            digest TEXT PRIMARY KEY,
+            size INTEGER,
+            last_used REAL
+        )
+        ''')
+    
+    def variant_path(self, digest, size=None):
+        name = f"{digest}_{size[0]}x{size[1]}.jpg" if size else f"{digest}.jpg"
+        return os.path.join(self.cache_dir, digest[:2], name)
+    
+    def get(self, video_id, size):
+        """캐시된 썸네일 파일 경로 (없으면 None)"""
+        with self._lock:
+            rows = self.db.query("SELECT digest FROM thumbnail_index WHERE video_id=?", (video_id,))
+            if not rows:
+                return None
+            digest = rows[0][0]
+            path = self.variant_path(digest, size)
+            if not os.path.exists(path):
+                # 원본만 있으면(GUI 없이 받은 경우) 지금 줄여서 저장
+                original = self.variant_path(digest)
+                if not os.path.exists(original):
+                    return None
+                if self.scaler is None:
+                    path = original
+                else:
+                    with open(original, 'rb') as f:
+                        data = self.scaler(f.read(), *size)
+                    self._write(path, data)
+                    self._add_size(digest, len(data))
+            self._touch(digest)
+            return path
+    
+    def put(self, video_id, data):
+        """이미지를 저장하고 video_id와 연결 (같은 내용이 이미 있으면 다시 저장하지 않음)"""
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        with self._lock:
+            exists = self.db.query("SELECT 1 FROM thumbnail_files WHERE digest=?", (digest,))
+            if not exists:
+                total = 0
+                if self.scaler is None:
+                    self._write(self.variant_path(digest), data)
+                    total = len(data)
+                else:
+                    for size in THUMBNAIL_SIZES:
+                        scaled = self.scaler(data, *size)
+                        self._write(self.variant_path(digest, size), scaled)
+                        total += len(scaled)
+                self.db.write(
+                    "INSERT INTO thumbnail_files (digest, size, last_used) VALUES (?, ?, ?)",
+                    (digest, total, time.time())
+                )
+            self.db.write(
+                "INSERT OR REPLACE INTO thumbnail_index (video_id, digest) VALUES (?, ?)",
+                (video_id, digest)
+            )
+            self._evict(keep=digest)
+        return digest
+    
+    def fetch(self, video_id, url, size):
+        """캐시에 없으면 받아서 저장한 뒤 파일 경로 반환 (작업 스레드에서 호출)"""
+        path = self.get(video_id, size)
+        if path is None:
+            self.put(video_id, get_transport().fetch(url))
+            path = self.get(video_id, size)
+        return path
+    
+    def total_bytes(self):
+        with self._lock:
+            return self.db.query("SELECT COALESCE(SUM(size), 0) FROM thumbnail_files")[0][0]
+    
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def _add_size(self, digest, size):
+        self.db.write("UPDATE thumbnail_files SET size=size+? WHERE digest=?", (size, digest))
+    
+    def _touch(self, digest):
+        # 목록을 스크롤할 때마다 기록하지 않도록 일정 간격으로만 갱신
+        now = time.time()
+        if now - self._touched.get(digest, 0) < TOUCH_INTERVAL:
+            return
+        self._touched[digest] = now
+        self.db.write("UPDATE thumbnail_files SET last_used=? WHERE digest=?", (now, digest))
+    
+    def _evict(self, keep):
+        """최대 크기를 넘으면 가장 오래 쓰지 않은 이미지부터 삭제 (잠금 상태에서 호출)"""
+        total = self.db.query("SELECT COALESCE(SUM(size), 0) FROM thumbnail_files")[0][0]
+        if total <= self.max_bytes:
+            return
+        rows = self.db.query(
+            "SELECT digest, size FROM thumbnail_files WHERE digest != ? ORDER BY last_used", (keep,)
+        )
+        for digest, size in rows:
+            if total <= self.max_bytes:
+                break
+            for path in [self.variant_path(digest)] + [self.variant_path(digest, s) for s in THUMBNAIL_SIZES]:
+                if os.path.exists(path):
+                    os.remove(path)
+            self.db.write("DELETE FROM thumbnail_files WHERE digest=?", (digest,))
+            self.db.write("DELETE FROM thumbnail_index WHERE digest=?", (digest,))
+            self._touched.pop(digest, None)
+            total -= size
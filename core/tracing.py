@@ -0,0 +1,180 @@
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# 추적 파일 경로를 지정하는 환경 변수 (GUI는 이 값으로만 켬)
+TRACE_ENV = 'YTDL_TRACE'
+
+# 메모리에 모아 둘 최대 이벤트 수 (넘으면 이후 이벤트는 버리고 개수만 셈)
+MAX_EVENTS = 1000000
+
+_NULL = nullcontext()
+
+
+class Tracer:
+    """작업 단계를 Chrome trace event 형식의 구간으로 모아 JSON 파일로 저장
+    
+    저장한 파일은 Perfetto(ui.perfetto.dev)나 chrome://tracing에서 열 수 있다. 스레드마다 한 줄에
+    span()으로 감싼 구간이 겹쳐 그려지고, 스레드를 넘나드는 구간(대기열 대기, 구간 다운로드)은
+    begin()/end()로 기록한 비동기 구간으로 따로 그려진다. 시각은 시작한 때부터의 마이크로초이다.
+    """
+    def __init__(self, path, max_events=MAX_EVENTS):
+        self.path = path
+        self.max_events = max_events
+        self.pid = os.getpid()
+        self.started = time.perf_counter()
+        self.dropped = 0
+        self._events = []
+        self._threads = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def now(self):
+        return (time.perf_counter() - self.started) * 1000000
+    
+    def new_id(self):
+        """비동기 구간의 고유 ID"""
+        return next(self._ids)
+    
+    def add(self, event):
+        thread = threading.current_thread()
+        tid = thread.native_id
+        event['pid'] = self.pid
+        event['tid'] = tid
+        with self._lock:
+            if tid not in self._threads:
+                # 스레드 이름을 붙여 두어야 타임라인에서 작업자 스레드를 구별할 수 있음
+                self._threads[tid] = thread.name
+                self._events.append({'ph': 'M', 'name': 'thread_name', 'pid': self.pid, 'tid': tid,
+                                     'args': {'name': thread.name}})
+            if len(self._events) >= self.max_events:
+                self.dropped += 1
+                return
+            self._events.append(event)
+    
+    @contextmanager
+    def span(self, name, cat, args):
+        """현재 스레드에서 with 블록이 실행된 구간 (예외로 끝나도 기록)"""
+        started = self.now()
+        try:
+            yield
+        finally:
+            event = {'ph': 'X', 'name': name, 'cat': cat, 'ts': started, 'dur': self.now() - started}
+            if args:
+                event['args'] = args
+            self.add(event)
+    
+    def begin(self, name, id, cat, args):
+        event = {'ph': 'b', 'name': name, 'cat': cat, 'id': str(id), 'ts': self.now()}
+        if args:
+            event['args'] = args
+        self.add(event)
+    
+    def end(self, name, id, cat, args):
+        event = {'ph': 'e', 'name': name, 'cat': cat, 'id': str(id), 'ts': self.now()}
+        if args:
+            event['args'] = args
+        self.add(event)
+    
+    def counter(self, name, values):
+        self.add({'ph': 'C', 'name': name, 'ts': self.now(), 'args': values})
+    
+    def save(self):
+        """모은 이벤트를 파일에 기록 (임시 파일에 쓴 뒤 바꾸므로 기록 도중에도 이전 파일이 남음)"""
+        with self._lock:
+            events = list(self._events)
+            dropped = self.dropped
+        data = {'traceEvents': events, 'displayTimeUnit': 'ms',
+                'otherData': {'dropped_events': dropped}}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+    
+    def close(self):
+        self.save()
+
+
+_tracer = None
+
+
+def start_tracing(path=None):
+    """추적을 켜고 Tracer 반환 (path가 없으면 TRACE_ENV를 사용하며, 둘 다 없으면 None)"""
+    global _tracer
+    path = path or os.environ.get(TRACE_ENV)
+    if not path:
+        return None
+    _tracer = Tracer(path)
+    return _tracer
+
+
+def stop_tracing():
+    """추적을 끄고 모은 이벤트를 파일에 기록"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer:
+        tracer.close()
+    return tracer
+
+
+def get_tracer():
+    """켜져 있는 Tracer (꺼져 있으면 None)"""
+    return _tracer
+
+
+def span(name, cat='job', **args):
+    """현재 스레드에서 with 블록이 실행된 구간을 기록 (추적이 꺼져 있으면 아무것도 하지 않음)"""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL
+    return tracer.span(name, cat, args)
+
+
+def begin(name, id, cat='job', **args):
+    """스레드를 넘나드는 구간의 시작 (같은 name, id, cat의 end()로 끝남)"""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.begin(name, id, cat, args)
+
+
+def end(name, id, cat='job', **args):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.end(name, id, cat, args)
+
+
+@contextmanager
+def async_span(name, cat='job', **args):
+    """asyncio 작업처럼 한 스레드에서 서로 겹쳐 실행되는 구간을 비동기 구간으로 기록"""
+    tracer = _tracer
+    if tracer is None:
+        yield
+        return
+    id = tracer.new_id()
+    tracer.begin(name, id, cat, args)
+    try:
+        yield
+    finally:
+        tracer.end(name, id, cat, {})
+
+
+def counter(name, **values):
+    """타임라인에 그릴 값 (예: 실행 중인 작업 수)"""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.counter(name, values)
+
+
+def traced(cat='gui'):
+    """메서드가 실행된 구간을 기록하는 데코레이터 (GUI 이벤트 처리기가 화면을 멈추게 하는지 확인할 때)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(func.__qualname__, cat):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,235 @@
+import os
+import subprocess
+import tempfile
+import threading
+
+from core.metrics import get_metrics
+from core.mux import ffmpeg_path
+from core.scheduler import WorkerPool
+
+# 음성 변환 형식 (키: (확장자, ffmpeg 출력 형식, 인코더 옵션))
+AUDIO_FORMATS = {
+    'mp3': ('mp3', 'mp3', ['-c:a', 'libmp3lame', '-q:a', '2']),
+    'm4a': ('m4a', 'ipod', ['-c:a', 'aac', '-b:a', '192k']),
+    'opus': ('opus', 'opus', ['-c:a', 'libopus', '-b:a', '128k']),
+}
+
+# 받고 있는 파일을 따라 읽을 때 새 데이터를 확인하는 간격 (초)
+FOLLOW_INTERVAL = 0.2
+
+# ffmpeg에 한 번에 넘기는 크기
+FEED_SIZE = 256 * 1024
+
+# 변환 중인 파일의 접미사
+PART_SUFFIX = '.part'
+
+# 받는 도중에 변환을 시작할 수 있는지 (Windows는 열려 있는 파일의 이름을 바꿀 수 없어 다 받은 뒤 시작)
+FOLLOW_DOWNLOAD = os.name != 'nt'
+
+
+class TranscodeError(Exception):
+    """ffmpeg 변환에 실패했을 때 발생하는 예외"""
+
+
+def transcode_path(file_path, target):
+    """file_path를 target 형식으로 변환한 파일 경로"""
+    return os.path.splitext(file_path)[0] + '.' + AUDIO_FORMATS[target][0]
+
+
+class TranscodeJob:
+    """받은 파일의 음성을 ffmpeg로 변환하는 작업 (TranscodePool의 작업자에서 실행)
+    
+    source_path의 다운로드가 끝나기 전에 시작하면 partial_path(받고 있는 파일)를 available()이
+    알려 주는 곳까지 따라 읽으며 ffmpeg에 넘기고, source_ready()가 호출되면 끝까지 넘긴다.
+    변환이 끝나면 원본 파일을 지운다. 콜백은 작업자 스레드에서 호출된다.
+      on_progress(percentage): 변환 진행률 (길이를 모르면 -1)
+      on_completed(output_path)
+      on_error(message)
+    """
+    def __init__(self, source_path, target, duration=None, partial_path=None, available=None,
+                 on_progress=None, on_completed=None, on_error=None):
+        self.source_path = source_path
+        self.target = target
+        self.output_path = transcode_path(source_path, target)
+        self.duration = duration
+        self.partial_path = partial_path
+        self.available = available
+        self.on_progress = on_progress
+        self.on_completed = on_completed
+        self.on_error = on_error
+        self.complete = False
+        self.cancelled = False
+        self.process = None
+        self.percentage = 0
+        self._cond = threading.Condition()
+    
+    def source_ready(self):
+        """다운로드 완료 (source_path에 전체 파일이 있음)"""
+        with self._cond:
+            self.complete = True
+            self._cond.notify_all()
+    
+    def cancel(self):
+        with self._cond:
+            self.cancelled = True
+            self._cond.notify_all()
+            process = self.process
+        if process and process.poll() is None:
+            process.kill()
+    
+    def run(self):
+        try:
+            with get_metrics().phase('transcode'):
+                self.transcode()
+        except Exception as e:
+            if self.cancelled:
+                return
+            if self.on_error:
+                self.on_error(str(e))
+            return
+        if self.cancelled:
+            return
+        if self.on_completed:
+            self.on_completed(self.output_path)
+    
+    def transcode(self):
+        """변환을 수행하고 출력 파일 경로 반환 (취소되면 None, 실패하면 예외 발생)"""
+        if ffmpeg_path() is None:
+            raise TranscodeError("음성을 변환하려면 ffmpeg가 필요합니다")
+        part_path = self.output_path + PART_SUFFIX
+        
+        # 아직 받고 있으면 받은 앞부분부터 파이프로 넘김
+        follow = not self.complete
+        returncode, stderr = self._run_ffmpeg(follow, part_path)
+        if follow and returncode and not self.cancelled:
+            # 앞부분만으로는 읽을 수 없는 파일(메타데이터가 뒤에 있는 MP4 등)은 다 받은 뒤 다시 변환
+            with self._cond:
+                while not self.complete and not self.cancelled:
+                    self._cond.wait()
+            returncode, stderr = self._run_ffmpeg(False, part_path)
+        
+        if self.cancelled or returncode:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            if self.cancelled:
+                return None
+            raise TranscodeError(f"ffmpeg 오류: {stderr}")
+        
+        os.replace(part_path, self.output_path)
+        if os.path.abspath(self.source_path) != os.path.abspath(self.output_path):
+            os.remove(self.source_path)
+        return self.output_path
+    
+    def _run_ffmpeg(self, follow, part_path):
+        """ffmpeg를 실행하고 (종료 코드, 오류 출력) 반환"""
+        _, container, codec = AUDIO_FORMATS[self.target]
+        # 오류 출력은 임시 파일로 받음 (파이프로 받으면 진행 상황을 읽는 동안 오류 출력이 파이프 버퍼를
+        # 채웠을 때 ffmpeg와 서로 기다리며 멈춤)
+        with tempfile.TemporaryFile() as errors:
+            with self._cond:
+                if self.cancelled:
+                    return -1, ""
+                command = [ffmpeg_path(), '-hide_banner', '-loglevel', 'error', '-y',
+                           '-i', 'pipe:0' if follow else self.source_path,
+                           '-map', '0:a:0', '-vn'] + codec + ['-progress', 'pipe:1', '-nostats', '-f', container, part_path]
+                self.process = subprocess.Popen(
+                    command,
+                    stdin=subprocess.PIPE if follow else subprocess.DEVNULL,
+                    stdout=subprocess.PIPE, stderr=errors
+                )
+            
+            feeder = None
+            if follow:
+                feeder = threading.Thread(target=self._feed, name="transcode-feed", daemon=True)
+                feeder.start()
+            try:
+                for line in self.process.stdout:
+                    self._parse_progress(line.decode('ascii', 'replace').strip())
+                self.process.wait()
+            finally:
+                if feeder:
+                    feeder.join()
+                self.process.stdout.close()
+            errors.seek(0)
+            stderr = errors.read().decode('utf-8', 'replace').strip()
+        return self.process.returncode, stderr
+    
+    def _parse_progress(self, line):
+        """ffmpeg -progress 출력 한 줄 처리"""
+        key, _, value = line.partition('=')
+        if key == 'out_time_us' and value.isdigit():
+            if self.duration:
+                percentage = min(99, int(int(value) / 1000000 / self.duration * 100))
+            else:
+                percentage = -1
+        elif key == 'progress' and value == 'end':
+            percentage = 100
+        else:
+            return
+        if percentage != self.percentage:
+            self.percentage = percentage
+            if self.on_progress:
+                self.on_progress(percentage)
+    
+    def _feed(self):
+        """받고 있는 파일을 받은 곳까지 따라 읽으며 ffmpeg 입력으로 넘김 (작업 스레드)"""
+        stdin = self.process.stdin
+        f = None
+        try:
+            position = 0
+            while True:
+                with self._cond:
+                    if self.cancelled or self.process.poll() is not None:
+                        return
+                    complete = self.complete
+                    limit = None if complete else self.available()
+                    if limit is not None and position >= limit:
+                        self._cond.wait(FOLLOW_INTERVAL)
+                        continue
+                if f is None:
+                    # 받은 데이터가 생긴 뒤에 열고, 다운로드가 끝나 최종 파일명으로 바뀌어도
+                    # 열어 둔 파일은 계속 읽을 수 있음 (POSIX)
+                    f = open(self.source_path if complete else self.partial_path, 'rb')
+                data = f.read(FEED_SIZE if limit is None else min(FEED_SIZE, limit - position))
+                if not data:
+                    return
+                stdin.write(data)
+                position += len(data)
+        except (OSError, ValueError):
+            # ffmpeg가 먼저 종료됨 (원인은 ffmpeg 종료 코드와 오류 출력으로 보고)
+            pass
+        finally:
+            if f:
+                f.close()
+            try:
+                stdin.close()
+            except OSError:
+                pass
+
+
+class TranscodePool:
+    """CPU 코어 수만큼 ffmpeg 변환 프로세스를 동시에 실행하는 변환 대기열
+    
+    다운로드 작업자와 별개이므로 변환이 다운로드 자리를 차지하지 않는다.
+    """
+    def __init__(self, max_workers=None):
+        self.pool = WorkerPool(max_workers=max_workers or os.cpu_count() or 1, name="transcode")
+    
+    def has_idle_worker(self):
+        """지금 추가하면 바로 시작할 수 있는지"""
+        stats = self.pool.stats()
+        return stats['queue_depth'] == 0 and stats['running'] < stats['max_workers']
+    
+    def submit(self, job_id, job, on_start=None):
+        self.pool.submit(job_id, job, on_start=on_start)
+    
+    def cancel(self, job_id):
+        return self.pool.cancel(job_id)
+    
+    def stats(self):
+        """변환 대기열 길이와 실행 수"""
+        return self.pool.stats()
+    
+    def shutdown(self):
+        """대기 중인 변환을 버리고 실행 중인 ffmpeg 종료"""
+        self.pool.shutdown(cancel_running=True)
@@ -0,0 +1,530 @@
+import asyncio
+import base64
+import concurrent.futures
+import gzip
+import io
+import socket
+import ssl
+import threading
+import time
+import zlib
+from collections import defaultdict
+from email.message import Message
+from urllib.error import HTTPError
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+# 호스트별 최대 동시 연결 수 기본값
+DEFAULT_PER_HOST_LIMIT = 8
+
+# 놀고 있는 연결을 유지하는 시간 (초)
+IDLE_TIMEOUT = 30.0
+
+# 최대 리다이렉트 횟수
+MAX_REDIRECTS = 5
+
+DEFAULT_TIMEOUT = 30.0
+
+# 응답 한 줄(헤더 등)의 최대 길이
+READ_LIMIT = 1024 * 1024
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Accept-Encoding': 'identity',
+}
+
+
+class HttpResponse:
+    """상태, 헤더만 읽은 HTTP 응답 (본문은 read()로 읽음)"""
+    def __init__(self, url, status, reason, headers, connection, pool, has_body=True, keep_alive=True):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self._connection = connection
+        self._pool = pool
+        self._remaining = None
+        self._chunked = False
+        self._chunk_left = 0
+        self._eof = False
+        self._reusable = False
+        
+        if not has_body:
+            self._remaining = 0
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            self._chunked = True
+        elif 'content-length' in headers:
+            self._remaining = int(headers['content-length'])
+        # 본문 끝을 알 수 없으면 연결을 닫아야 끝나므로 재사용 불가
+        self._reusable = keep_alive and (self._chunked or self._remaining is not None)
+        if self._remaining == 0:
+            self._finish()
+    
+    def _finish(self):
+        self._eof = True
+        if self._connection:
+            self._pool.release(self._connection, self._reusable)
+            self._connection = None
+    
+    async def read(self, size=-1, timeout=DEFAULT_TIMEOUT):
+        """본문을 최대 size 바이트 읽음 (끝이면 b'')"""
+        if self._eof:
+            return b''
+        try:
+            data = await asyncio.wait_for(self._read(size), timeout)
+        except BaseException:
+            self.close()
+            raise
+        if not data and not self._eof:
+            self._finish()
+        return data
+    
+    async def _read(self, size):
+        reader = self._connection.reader
+        if self._chunked:
+            return await self._read_chunked(reader, size)
+        
+        if self._remaining is None:
+            # 길이를 모르면 연결이 닫힐 때까지 읽음
+            data = await reader.read(size if size > 0 else -1)
+            if not data:
+                self._finish()
+            return data
+        
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = await reader.read(size)
+        if not data:
+            self._reusable = False
+            raise ConnectionError("서버가 응답 도중 연결을 닫았습니다")
+        self._remaining -= len(data)
+        if self._remaining <= 0:
+            self._finish()
+        return data
+    
+    async def _read_chunked(self, reader, size):
+        if self._chunk_left == 0:
+            line = await reader.readline()
+            length = int(line.split(b';', 1)[0].strip() or b'0', 16)
+            if length == 0:
+                # 트레일러 헤더 건너뛰기
+                while (await reader.readline()).strip():
+                    pass
+                self._finish()
+                return b''
+            self._chunk_left = length
+        if size < 0 or size > self._chunk_left:
+            size = self._chunk_left
+        data = await reader.readexactly(size)
+        self._chunk_left -= len(data)
+        if self._chunk_left == 0:
+            await reader.readexactly(2)
+        return data
+    
+    async def read_all(self, timeout=DEFAULT_TIMEOUT):
+        chunks = []
+        while True:
+            data = await self.read(256 * 1024, timeout=timeout)
+            if not data:
+                break
+            chunks.append(data)
+        body = b''.join(chunks)
+        encoding = self.headers.get('content-encoding', '').lower()
+        if encoding == 'gzip':
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+        return body
+    
+    def close(self):
+        """본문을 다 읽지 않고 닫으면 연결은 재사용하지 않음"""
+        if self._connection:
+            self._reusable = False
+            self._finish()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+class _Connection:
+    def __init__(self, key, reader, writer):
+        self.key = key
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+        self.reused = False
+    
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+def parse_proxy(proxy):
+    """프록시 URL의 (호스트, 포트, Proxy-Authorization 값) (인증 정보가 없으면 값은 None)"""
+    if '://' not in proxy:
+        proxy = 'http://' + proxy
+    parts = urlsplit(proxy)
+    if parts.scheme.lower() != 'http' or not parts.hostname:
+        raise ValueError(f"지원하지 않는 프록시입니다: {proxy}")
+    authorization = None
+    if parts.username is not None:
+        credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+        authorization = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+    return parts.hostname, parts.port or 80, authorization
+
+
+async def open_tunnel(proxy_host, proxy_port, host, port, authorization=None):
+    """프록시에 CONNECT로 host:port까지의 터널을 열고 연결된 소켓 반환
+    
+    TLS는 반환한 소켓 위에서 시작한다 (asyncio.open_connection(sock=...)).
+    """
+    loop = asyncio.get_running_loop()
+    error = None
+    for family, type_, proto, _, address in await loop.getaddrinfo(proxy_host, proxy_port, type=socket.SOCK_STREAM):
+        sock = socket.socket(family, type_, proto)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, address)
+            break
+        except OSError as e:
+            sock.close()
+            error = e
+    else:
+        raise error or ConnectionError(f"프록시에 연결할 수 없습니다: {proxy_host}")
+    
+    try:
+        request = f"CONNECT {host}:{port} HTTP/1.1\r\nHost: {host}:{port}\r\n"
+        if authorization:
+            request += f"Proxy-Authorization: {authorization}\r\n"
+        await loop.sock_sendall(sock, (request + "\r\n").encode('latin-1'))
+        # 터널이 열리기 전에는 프록시만 말하므로 빈 줄까지만 읽으면 됨
+        response = b''
+        while b'\r\n\r\n' not in response:
+            data = await loop.sock_recv(sock, 4096)
+            if not data:
+                raise ConnectionError("프록시가 연결을 닫았습니다")
+            response += data
+            if len(response) > READ_LIMIT:
+                raise ConnectionError("프록시 응답이 너무 깁니다")
+        status_line = response.split(b'\r\n', 1)[0].decode('latin-1')
+        status = (status_line.split(' ', 2) + [''])[1]
+        if status != '200':
+            raise ConnectionError(f"프록시가 터널을 열지 않았습니다: {status_line}")
+        return sock
+    except BaseException:
+        sock.close()
+        raise
+
+
+class ConnectionPool:
+    """호스트별 keep-alive 연결 풀 (이벤트 루프 스레드에서만 사용)
+    
+    연결 키는 (scheme, 호스트, 포트, 프록시 URL)이다. 프록시를 거치는 https 연결은 CONNECT로
+    연 터널 위에서 TLS를 시작하고, http 연결은 프록시에 연결한다 (요청은 전체 URL로 보냄).
+    """
+    def __init__(self, per_host_limit=DEFAULT_PER_HOST_LIMIT, idle_timeout=IDLE_TIMEOUT):
+        self.per_host_limit = per_host_limit
+        self.idle_timeout = idle_timeout
+        self._idle = defaultdict(list)
+        self._semaphores = {}
+        self._ssl_context = ssl.create_default_context()
+        
+        # 통계
+        self.opened = 0
+        self.reused = 0
+    
+    def _semaphore(self, key):
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self.per_host_limit)
+        return self._semaphores[key]
+    
+    async def acquire(self, key, timeout):
+        """연결 하나를 빌림 (호스트별 제한을 넘으면 반납될 때까지 대기)"""
+        await self._semaphore(key).acquire()
+        try:
+            idle = self._idle[key]
+            now = time.monotonic()
+            while idle:
+                connection = idle.pop()
+                if now - connection.last_used < self.idle_timeout and not connection.reader.at_eof():
+                    connection.reused = True
+                    self.reused += 1
+                    return connection
+                connection.close()
+            
+            reader, writer = await asyncio.wait_for(self._connect(key, timeout), timeout)
+            self.opened += 1
+            return _Connection(key, reader, writer)
+        except BaseException:
+            self._semaphore(key).release()
+            raise
+    
+    async def _connect(self, key, timeout):
+        scheme, host, port, proxy = key
+        tls = scheme == 'https'
+        if proxy is None:
+            return await asyncio.open_connection(
+                host, port,
+                ssl=self._ssl_context if tls else None,
+                server_hostname=host if tls else None,
+                limit=READ_LIMIT
+            )
+        proxy_host, proxy_port, authorization = parse_proxy(proxy)
+        if not tls:
+            return await asyncio.open_connection(proxy_host, proxy_port, limit=READ_LIMIT)
+        sock = await open_tunnel(proxy_host, proxy_port, host, port, authorization)
+        try:
+            return await asyncio.open_connection(
+                sock=sock, ssl=self._ssl_context, server_hostname=host, limit=READ_LIMIT
+            )
+        except BaseException:
+            sock.close()
+            raise
+    
+    def release(self, connection, reusable):
+        if reusable:
+            connection.last_used = time.monotonic()
+            self._idle[connection.key].append(connection)
+        else:
+            connection.close()
+        self._semaphore(connection.key).release()
+    
+    def close(self):
+        for connections in self._idle.values():
+            for connection in connections:
+                connection.close()
+        self._idle.clear()
+
+
+class Transport:
+    """백그라운드 스레드 하나에서 asyncio 이벤트 루프를 돌리며 모든 HTTP 요청을 처리
+    
+    다른 스레드에서는 submit()/run()으로 코루틴을 맡기고 결과를 받는다.
+    """
+    def __init__(self, per_host_limit=DEFAULT_PER_HOST_LIMIT):
+        self.loop = asyncio.new_event_loop()
+        self.pool = None
+        self.per_host_limit = per_host_limit
+        self._proxies = {}
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name="network", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.pool = ConnectionPool(self.per_host_limit)
+        self._ready.set()
+        self.loop.run_forever()
+    
+    def in_loop_thread(self):
+        return threading.current_thread() is self._thread
+    
+    def submit(self, coro):
+        """코루틴을 이벤트 루프에 맡기고 concurrent.futures.Future 반환"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def run(self, coro, timeout=None):
+        """코루틴을 실행하고 결과가 나올 때까지 현재 스레드에서 대기 (시간이 지나면 코루틴을 취소)"""
+        if self.in_loop_thread():
+            raise RuntimeError("이벤트 루프 스레드에서는 run()을 호출할 수 없습니다")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except (concurrent.futures.TimeoutError, KeyboardInterrupt):
+            # 남겨 두면 코루틴이 빌린 연결과 호스트별 자리를 계속 잡고 있음
+            future.cancel()
+            raise
+    
+    def proxy_for(self, scheme, host):
+        """scheme 요청에 쓸 프록시 URL (없으면 None, 이벤트 루프 스레드)
+        
+        urllib과 같이 HTTP_PROXY/HTTPS_PROXY/NO_PROXY 환경 변수(Windows/macOS는 시스템 설정)를
+        따른다. 호스트마다 처음 한 번만 확인한다.
+        """
+        key = (scheme, host)
+        if key not in self._proxies:
+            proxy = getproxies().get(scheme)
+            if proxy and proxy_bypass(host):
+                proxy = None
+            self._proxies[key] = proxy or None
+        return self._proxies[key]
+    
+    async def open(self, method, url, headers=None, data=None, timeout=DEFAULT_TIMEOUT):
+        """요청을 보내고 헤더까지 읽은 HttpResponse 반환 (리다이렉트 자동 처리)"""
+        for _ in range(MAX_REDIRECTS + 1):
+            response = await self._open_once(method, url, headers, data, timeout)
+            if response.status in (301, 302, 303, 307, 308) and 'location' in response.headers:
+                await response.read_all(timeout)
+                url = urljoin(url, response.headers['location'])
+                if response.status == 303:
+                    method, data = 'GET', None
+                continue
+            return response
+        raise HTTPError(url, 310, "리다이렉트가 너무 많습니다", None, None)
+    
+    async def _open_once(self, method, url, headers, data, timeout):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ('http', 'https'):
+            raise ValueError(f"지원하지 않는 URL입니다: {url}")
+        port = parts.port or (443 if scheme == 'https' else 80)
+        proxy = self.proxy_for(scheme, parts.hostname)
+        key = (scheme, parts.hostname, port, proxy)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        
+        request_headers = dict(DEFAULT_HEADERS)
+        request_headers.update(headers or {})
+        if proxy and scheme == 'http':
+            # 프록시에는 전체 URL로 요청 (https는 터널 안에서 보통 요청)
+            path = parts._replace(fragment='').geturl()
+            authorization = parse_proxy(proxy)[2]
+            if authorization:
+                request_headers['Proxy-Authorization'] = authorization
+        request_headers['Host'] = parts.netloc.rsplit('@', 1)[-1]
+        request_headers.setdefault('Connection', 'keep-alive')
+        if data is not None:
+            request_headers['Content-Length'] = str(len(data))
+        head = f"{method} {path} HTTP/1.1\r\n" + ''.join(
+            f"{name}: {value}\r\n" for name, value in request_headers.items()) + "\r\n"
+        
+        for attempt in range(2):
+            connection = await self.pool.acquire(key, timeout)
+            try:
+                connection.writer.write(head.encode('latin-1') + (data or b''))
+                await asyncio.wait_for(connection.writer.drain(), timeout)
+                status_line = await asyncio.wait_for(connection.reader.readline(), timeout)
+                if not status_line:
+                    raise ConnectionResetError("서버가 연결을 닫았습니다")
+                response_headers = await asyncio.wait_for(self._read_headers(connection.reader), timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError) as e:
+                self.pool.release(connection, False)
+                # 재사용한 연결이 서버 쪽에서 이미 닫혔으면 새 연결로 한 번 더 시도
+                if connection.reused and attempt == 0:
+                    continue
+                raise ConnectionError(str(e)) from e
+            except BaseException:
+                self.pool.release(connection, False)
+                raise
+            
+            version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+            status = int(status)
+            connection_header = response_headers.get('connection', '').lower()
+            if version == 'HTTP/1.0':
+                keep_alive = connection_header == 'keep-alive'
+            else:
+                keep_alive = connection_header != 'close'
+            has_body = method != 'HEAD' and status not in (204, 304) and status >= 200
+            return HttpResponse(url, status, reason, response_headers, connection, self.pool, has_body, keep_alive)
+    
+    async def _read_headers(self, reader):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+    
+    async def request(self, method, url, headers=None, data=None, timeout=DEFAULT_TIMEOUT):
+        """본문까지 모두 읽어 (HttpResponse, bytes) 반환 (4xx/5xx는 HTTPError)"""
+        response = await self.open(method, url, headers, data, timeout)
+        body = await response.read_all(timeout)
+        if response.status >= 400:
+            raise HTTPError(response.url, response.status, response.reason, _to_message(response.headers), io.BytesIO(body))
+        return response, body
+    
+    def fetch(self, url, headers=None, timeout=DEFAULT_TIMEOUT):
+        """다른 스레드에서 URL 내용을 받아 bytes로 반환"""
+        return self.run(self.request('GET', url, headers, timeout=timeout), timeout * 2)[1]
+    
+    def fetch_async(self, url, headers=None, timeout=DEFAULT_TIMEOUT):
+        """URL 내용을 받는 Future 반환 (결과는 bytes)"""
+        async def fetch():
+            return (await self.request('GET', url, headers, timeout=timeout))[1]
+        return self.submit(fetch())
+    
+    def stats(self):
+        return {'opened': self.pool.opened, 'reused': self.pool.reused}
+
+
+def _to_message(headers):
+    message = Message()
+    for name, value in headers.items():
+        message[name] = value
+    return message
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """프로세스 전체에서 공유하는 Transport 반환"""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport()
+        return _transport
+
+
+class PooledResponse:
+    """urlopen() 결과처럼 쓸 수 있도록 감싼 응답 (pytube 호환용)"""
+    def __init__(self, response, body):
+        self.url = response.url
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = _to_message(response.headers)
+        self._body = io.BytesIO(body)
+    
+    def read(self, size=-1):
+        return self._body.read(size)
+    
+    def info(self):
+        return self.headers
+    
+    def getcode(self):
+        return self.status
+    
+    def geturl(self):
+        return self.url
+    
+    def close(self):
+        self._body.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+
+def install_pytube_adapter():
+    """pytube의 모든 HTTP 요청이 공유 연결 풀을 거치도록 교체"""
+    import json
+    from pytube import request as pytube_request
+    
+    def execute_request(url, method=None, headers=None, data=None, timeout=None):
+        base_headers = {"User-Agent": "Mozilla/5.0", "accept-language": "en-US,en"}
+        if headers:
+            base_headers.update(headers)
+        if data and not isinstance(data, bytes):
+            data = bytes(json.dumps(data), encoding="utf-8")
+        if not url.lower().startswith("http"):
+            raise ValueError("Invalid URL")
+        if not isinstance(timeout, (int, float)):
+            timeout = DEFAULT_TIMEOUT
+        
+        transport = get_transport()
+        method = method or ('POST' if data else 'GET')
+        response, body = transport.run(transport.request(method, url, base_headers, data, timeout), timeout * 2)
+        return PooledResponse(response, body)
+    
+    pytube_request._execute_request = execute_request
@@ -0,0 +1,144 @@
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+from core.metrics import get_metrics
+
+# 멈춤으로 기록할 기준 (초), 하트비트 간격 (초)
+DEFAULT_THRESHOLD = 0.1
+HEARTBEAT_INTERVAL = 0.02
+
+# 이 시간이 넘도록 풀리지 않는 멈춤은 끝나기를 기다리지 않고 중간 보고를 남김 (초)
+HANG_REPORT = 10
+
+# 멈춤 하나에서 기록할 최대 스택 깊이
+STACK_LIMIT = 40
+
+# 기록 파일 위치와 크기 (넘으면 이전 파일로 돌림)
+DEFAULT_LOG_PATH = os.path.join(os.path.expanduser("~"), ".youtube_downloader", "stalls.log")
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+# 멈춤 기준(ms, 0이면 끔)과 기록 파일 경로를 지정하는 환경 변수
+THRESHOLD_ENV = 'YTDL_STALL_MS'
+LOG_ENV = 'YTDL_STALL_LOG'
+
+
+class StallWatchdog:
+    """이벤트 루프(GUI 스레드)가 멈춘 시간을 재고 멈춘 동안의 스택을 기록
+    
+    감시할 스레드는 interval마다 beat()를 호출한다. 도우미 스레드는 마지막 beat() 뒤로
+    threshold가 지나도록 다음 호출이 없으면 감시 대상 스레드의 파이썬 스택을 주기적으로 수집하고,
+    멈춤이 풀리면 걸린 시간과 가장 많이 수집된 스택을 기록 파일에 남긴다. beat() 사이의 지연은
+    event_loop_lag_seconds로, 멈춘 횟수는 ui_stalls_total로 측정값에도 기록된다.
+    """
+    def __init__(self, threshold=DEFAULT_THRESHOLD, interval=HEARTBEAT_INTERVAL, log_path=DEFAULT_LOG_PATH,
+                 thread_id=None):
+        self.threshold = threshold
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.metrics = get_metrics()
+        self.stalls = 0
+        self.log_path = log_path
+        # 기록 파일은 처음 멈췄을 때 엶 (시작 시간 단축)
+        self.handler = None
+        self._log_lock = threading.Lock()
+        
+        self._lock = threading.Lock()
+        self._last_beat = time.monotonic()
+        self._samples = Counter()
+        self._stalled_at = None
+        self._reported = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stall-watchdog", daemon=True)
+        self._thread.start()
+    
+    def beat(self):
+        """감시 대상 스레드에서 interval마다 호출"""
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._last_beat
+            self._last_beat = now
+            samples, self._samples = self._samples, Counter()
+            stalled_at, self._stalled_at = self._stalled_at, None
+            reported, self._reported = self._reported, False
+        self.metrics.observe('event_loop_lag_seconds', max(0.0, elapsed - self.interval))
+        if stalled_at is not None:
+            self.stalls += 1
+            self.metrics.inc('ui_stalls_total')
+            self._write(elapsed, samples, ended=True, reported=reported)
+    
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        if self.handler:
+            self.handler.close()
+    
+    def _run(self):
+        # 멈춤을 놓치지 않도록 기준의 절반 간격으로 확인
+        period = max(0.005, self.threshold / 2)
+        while not self._stop.wait(period):
+            now = time.monotonic()
+            with self._lock:
+                elapsed = now - self._last_beat
+                if elapsed < self.threshold + self.interval:
+                    continue
+                if self._stalled_at is None:
+                    self._stalled_at = self._last_beat
+            stack = self._capture()
+            with self._lock:
+                # 수집하는 동안 멈춤이 풀렸으면 버림
+                if self._stalled_at is None:
+                    continue
+                if stack:
+                    self._samples[stack] += 1
+                report = elapsed >= HANG_REPORT and not self._reported
+                if report:
+                    self._reported = True
+                    samples = Counter(self._samples)
+            if report:
+                self._write(elapsed, samples, ended=False)
+    
+    def _capture(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return None
+        return tuple(traceback.format_stack(frame, limit=STACK_LIMIT))
+    
+    def _write(self, elapsed, samples, ended, reported=False):
+        if ended and reported:
+            # 스택은 중간 보고에 이미 남겼으므로 걸린 시간만 기록
+            message = f"이벤트 루프 멈춤 끝남: {elapsed * 1000:.0f}ms"
+        else:
+            state = "" if ended else " (아직 멈춰 있음)"
+            message = f"이벤트 루프 멈춤 {elapsed * 1000:.0f}ms{state}, 스택 샘플 {sum(samples.values())}개"
+            if samples:
+                stack, count = samples.most_common(1)[0]
+                message += f", 가장 많이 수집된 스택 ({count}회):\n" + "".join(stack).rstrip()
+        import logging
+        with self._log_lock:
+            if self.handler is None:
+                from logging.handlers import RotatingFileHandler
+                os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+                self.handler = RotatingFileHandler(self.log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                                   encoding='utf-8')
+                self.handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            self.handler.handle(logging.makeLogRecord({'msg': message}))
+
+
+def start_watchdog(threshold=None, log_path=None):
+    """현재 스레드를 감시하는 StallWatchdog 반환 (기준이 0이면 None)
+    
+    인자가 없으면 환경 변수(THRESHOLD_ENV는 ms 단위, LOG_ENV)를 사용하고, 환경 변수도 없으면 기본값을 사용한다.
+    """
+    if threshold is None:
+        try:
+            threshold = float(os.environ.get(THRESHOLD_ENV, DEFAULT_THRESHOLD * 1000)) / 1000
+        except ValueError:
+            threshold = DEFAULT_THRESHOLD
+    if threshold <= 0:
+        return None
+    return StallWatchdog(threshold, log_path=log_path or os.environ.get(LOG_ENV) or DEFAULT_LOG_PATH)
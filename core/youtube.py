@@ -0,0 +1,127 @@
+# pytube로 YouTube 영상 정보를 가져오는 함수들 (pytube는 처음 사용할 때 불러옴)
+import threading
+
+from core.metrics import get_metrics
+
+_adapter_lock = threading.Lock()
+_adapter_installed = False
+
+
+def create_youtube(url):
+    """공유 연결 풀을 사용하는 pytube YouTube 객체 생성"""
+    global _adapter_installed
+    from pytube import YouTube
+    
+    # pytube의 요청도 공유 연결 풀을 사용 (같은 호스트에 대한 TCP/TLS 연결 재사용)
+    with _adapter_lock:
+        if not _adapter_installed:
+            from core.transport import install_pytube_adapter
+            install_pytube_adapter()
+            _adapter_installed = True
+    return YouTube(url)
+
+
+def build_video_info(yt):
+    """YouTube 객체에서 화면 표시와 다운로드에 필요한 정보를 모아 딕셔너리로 반환
+    
+    포맷 항목에는 스트림 URL과 기본 파일명도 들어 있어 다운로드 시 스트림을 다시 조회하지 않는다.
+    """
+    thumbnail_url = yt.thumbnail_url
+    
+    # 이용 가능한 스트림 정보 수집 (720p를 넘는 화질은 영상 전용(DASH) 스트림만 있음)
+    video_streams = yt.streams.filter(type='video').order_by('resolution').desc()
+    audio_streams = yt.streams.filter(only_audio=True).order_by('abr').desc()
+    
+    # 영상 전용 스트림과 합칠 음성 (같은 컨테이너 중 가장 높은 음질, 없으면 전체 중 가장 높은 음질)
+    best_audio = {}
+    for stream in audio_streams:
+        best_audio.setdefault(stream.subtype, stream)
+    fallback_audio = audio_streams.first()
+    
+    video_formats = {}
+    for stream in video_streams:
+        format_info = {
+            'itag': stream.itag,
+            'mime_type': stream.mime_type,
+            'extension': stream.subtype,
+            'fps': stream.fps,
+            'file_size': stream.filesize,
+            'progressive': stream.is_progressive,
+            'resolution': stream.resolution,
+            'url': stream.url,
+            'default_filename': stream.default_filename
+        }
+        if not stream.is_progressive:
+            audio = best_audio.get(stream.subtype) or fallback_audio
+            if audio is None:
+                continue
+            # 받을 때는 음성 포맷(audio_itag)을 함께 받아 합치므로 크기는 두 스트림의 합
+            format_info['audio_itag'] = audio.itag
+            format_info['video_size'] = stream.filesize
+            format_info['file_size'] = stream.filesize + audio.filesize
+        if stream.resolution not in video_formats:
+            video_formats[stream.resolution] = []
+        video_formats[stream.resolution].append(format_info)
+    
+    audio_formats = {}
+    for stream in audio_streams:
+        if stream.abr not in audio_formats:
+            audio_formats[stream.abr] = []
+        audio_formats[stream.abr].append({
+            'itag': stream.itag,
+            'mime_type': stream.mime_type,
+            'extension': stream.subtype,
+            'file_size': stream.filesize,
+            'abr': stream.abr,
+            'url': stream.url,
+            'default_filename': stream.default_filename
+        })
+    
+    return {
+        'id': yt.video_id,
+        'title': yt.title,
+        'description': yt.description,
+        'author': yt.author,
+        'length': yt.length,
+        'publish_date': str(yt.publish_date) if yt.publish_date else "Unknown",
+        'views': yt.views,
+        'rating': yt.rating,
+        'thumbnail_url': thumbnail_url,
+        'video_formats': video_formats,
+        'audio_formats': audio_formats
+    }
+
+
+def cached_video_info(url, metadata_cache):
+    """캐시에 있는 정보 반환 (없으면 None, YouTube에는 요청하지 않음)"""
+    from pytube import extract
+    from pytube.exceptions import RegexMatchError
+    
+    try:
+        video_id = extract.video_id(url)
+    except RegexMatchError:
+        # 잘못된 주소는 작업을 실행할 때 resolve_video_info가 오류로 알림
+        return None
+    return metadata_cache.get(video_id)
+
+
+def resolve_video_info(url, metadata_cache=None, refresh=False):
+    """캐시에 있으면 캐시의 정보를, 없으면 YouTube에서 새로 가져온 정보를 반환"""
+    from pytube import extract
+    
+    metrics = get_metrics()
+    video_id = extract.video_id(url)
+    if metadata_cache and not refresh:
+        info = metadata_cache.get(video_id)
+        metrics.inc('metadata_cache_total', result='miss' if info is None else 'hit')
+        if info is not None:
+            return info
+    
+    # YouTube 객체 생성과 스트림 정보 조회(시청 페이지, 플레이어 데이터 요청)를 따로 측정
+    with metrics.phase('youtube'):
+        yt = create_youtube(url)
+    with metrics.phase('streams'):
+        info = build_video_info(yt)
+    if metadata_cache:
+        metadata_cache.put(info['id'], info)
+    return info
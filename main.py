@@ -1,11 +1,8 @@
 import sys
 import os
-import json
 import threading
-import time
-import shutil
-from datetime import datetime
-from pathlib import Path
+import uuid
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 # PyQt6를 사용하여 현대적인 UI 구현
@@ -13,19 +10,49 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QH
                             QLineEdit, QPushButton, QLabel, QComboBox, QProgressBar, 
                             QListWidget, QListWidgetItem, QFileDialog, QMenu, QSystemTrayIcon, 
                             QSplitter, QTabWidget, QScrollArea, QFrame, QSlider, QSpacerItem,
-                            QSizePolicy, QCheckBox, QMessageBox, QToolButton)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QUrl, QTimer, QPoint
-from PyQt6.QtGui import QIcon, QPixmap, QAction, QPalette, QColor, QFont, QDesktopServices
+                            QSizePolicy, QCheckBox, QMessageBox, QToolButton, QDialog,
+                            QDialogButtonBox, QPlainTextEdit, QListView, QStyledItemDelegate, QStyle,
+                            QSpinBox, QInputDialog)
+from PyQt6.QtCore import (Qt, QObject, QThread, pyqtSignal, QSize, QUrl, QTimer, QPoint, QByteArray,
+                          QAbstractListModel, QModelIndex, QRect, QBuffer, QIODevice)
+from PyQt6.QtGui import (QIcon, QPixmap, QAction, QPalette, QColor, QFont, QDesktopServices, QPixmapCache,
+                         QImage)
 
-# pytube를 사용하여 YouTube 동영상 다운로드
-from pytube import YouTube
-from pytube.exceptions import RegexMatchError, VideoUnavailable
+# 데이터베이스 (설정, 히스토리, 중단된 다운로드)
+from core.database import Database
 
-# 데이터베이스 연결을 위한 sqlite3
-import sqlite3
+# pytube로 영상 정보 가져오기 (pytube는 처음 사용할 때 불러옴)
+from core.youtube import resolve_video_info
 
-# 현재 사용자의 다운로드 폴더 경로를 기본값으로 설정
-DEFAULT_DOWNLOAD_PATH = str(Path.home() / "Downloads")
+# 작업자 풀 기반 다운로드 관리자 (다운로드 작업인 core.download는 첫 다운로드를 시작할 때 불러옴)
+from core.manager import DownloadManager
+
+# 영상 정보 캐시 (메모리 LRU + SQLite)
+from core.metadata_cache import MetadataCache
+
+# 진행률, 속도, 남은 시간 집계
+from core.progress import ProgressTracker, REPORT_INTERVAL, format_eta
+
+# 모든 다운로드가 함께 쓰는 속도 제한기
+from core.ratelimit import get_rate_limiter, parse_schedule
+
+# 미리 줄여서 저장하는 썸네일 캐시
+from core.thumbnails import ThumbnailCache, HISTORY_SIZE, PREVIEW_SIZE, thumbnail_url
+
+# 모든 HTTP 요청을 처리하는 공유 asyncio 연결 풀
+from core.transport import get_transport
+
+# 단계별 소요 시간과 호스트별 전송량 측정값 (환경 변수로 로컬 서버/기록 파일 사용)
+from core.metrics import get_metrics, start_exporters
+
+# GUI 이벤트 처리 구간의 Chrome trace 기록 (YTDL_TRACE가 있을 때만, 켜고 끄는 함수는 쓸 때 불러옴)
+from core.tracing import traced
+
+# GUI 스레드가 멈춘 시간과 그동안의 스택 기록
+from core.watchdog import HEARTBEAT_INTERVAL, start_watchdog
+
+# 받은 파일을 디스크에 동기화(fsync)하는 정책
+from core.storage import FSYNC_POLICIES
 
 # 스타일 상수
 DARK_MODE = """
@@ -220,108 +247,156 @@ LIGHT_MODE = """
     }
 """
 
-class Database:
-    """데이터베이스 관리 클래스"""
-    def __init__(self):
-        self.db_path = os.path.join(os.path.expanduser("~"), ".youtube_downloader.db")
-        self.conn = sqlite3.connect(self.db_path)
-        self.create_tables()
-    
-    def create_tables(self):
-        cursor = self.conn.cursor()
-        
-        # 설정 테이블
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS settings (
-            id INTEGER PRIMARY KEY,
-            download_path TEXT,
-            theme TEXT,
-            max_concurrent_downloads INTEGER
-        )
-        ''')
-        
-        # 다운로드 히스토리 테이블
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS download_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            video_id TEXT,
-            title TEXT,
-            url TEXT,
-            file_path TEXT,
-            thumbnail_path TEXT,
-            format TEXT,
-            resolution TEXT,
-            download_date TIMESTAMP,
-            file_size INTEGER
-        )
-        ''')
-        
-        # 기본 설정이 없으면 추가
-        cursor.execute("SELECT COUNT(*) FROM settings")
-        if cursor.fetchone()[0] == 0:
-            cursor.execute('''
-            INSERT INTO settings (id, download_path, theme, max_concurrent_downloads)
-            VALUES (1, ?, 'system', 3)
-            ''', (DEFAULT_DOWNLOAD_PATH,))
-        
-        self.conn.commit()
-    
-    def get_settings(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM settings WHERE id=1")
-        row = cursor.fetchone()
-        return {
-            'download_path': row[1],
-            'theme': row[2],
-            'max_concurrent_downloads': row[3]
-        }
-    
-    def update_settings(self, download_path=None, theme=None, max_concurrent_downloads=None):
-        cursor = self.conn.cursor()
-        current = self.get_settings()
-        
-        if download_path is not None:
-            current['download_path'] = download_path
-        if theme is not None:
-            current['theme'] = theme
-        if max_concurrent_downloads is not None:
-            current['max_concurrent_downloads'] = max_concurrent_downloads
-        
-        cursor.execute('''
-        UPDATE settings SET 
-            download_path=?, 
-            theme=?, 
-            max_concurrent_downloads=?
-        WHERE id=1
-        ''', (current['download_path'], current['theme'], current['max_concurrent_downloads']))
-        self.conn.commit()
-    
-    def add_to_history(self, video_id, title, url, file_path, thumbnail_path, format, resolution, file_size):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-        INSERT INTO download_history 
-        (video_id, title, url, file_path, thumbnail_path, format, resolution, download_date, file_size)
-        VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'), ?)
-        ''', (video_id, title, url, file_path, thumbnail_path, format, resolution, file_size))
-        self.conn.commit()
-        return cursor.lastrowid
-    
-    def get_history(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''
-        SELECT id, video_id, title, url, file_path, thumbnail_path, format, resolution, download_date, file_size 
-        FROM download_history 
-        ORDER BY download_date DESC
-        ''')
-        return cursor.fetchall()
+# 메모리에 보관할 썸네일 픽스맵 최대 크기 (KB)
+PIXMAP_CACHE_LIMIT = 8 * 1024
+
+# 썸네일 요청 전체 제한 시간 (초)
+THUMBNAIL_TIMEOUT = 10
+
+# 다운로드별 대역폭 비중 (표시 이름, 가중치)
+BANDWIDTH_WEIGHTS = [("낮음", 0.5), ("보통", 1.0), ("높음", 2.0)]
+
+
+def scale_thumbnail(data, width, height):
+    """이미지를 width x height 안에 맞게 줄인 JPEG 데이터 반환 (작업 스레드에서도 호출됨)"""
+    image = QImage.fromData(QByteArray(data))
+    if image.isNull():
+        raise ValueError("썸네일 이미지를 읽을 수 없습니다")
+    image = image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                         Qt.TransformationMode.SmoothTransformation)
+    buffer = QBuffer()
+    buffer.open(QIODevice.OpenModeFlag.WriteOnly)
+    image.save(buffer, "JPG", 90)
+    return bytes(buffer.data())
+
+
+def cached_pixmap(path):
+    """썸네일 파일의 픽스맵 (최근에 쓴 것은 메모리에서 바로 반환, 없으면 None)"""
+    pixmap = QPixmapCache.find(path)
+    if pixmap is None:
+        pixmap = QPixmap(path)
+        if pixmap.isNull():
+            return None
+        QPixmapCache.insert(path, pixmap)
+    return pixmap
+
+
+class ThumbnailRequest:
+    """ThumbnailLoader의 요청 하나"""
+    def __init__(self, key, video_id, url, size, fallback_path):
+        self.key = key
+        self.video_id = video_id
+        self.url = url
+        self.size = size
+        self.fallback_path = fallback_path
+        self.future = None
+        self.cancelled = False
+
+
+class ThumbnailLoader(QObject):
+    """썸네일을 GUI 스레드를 막지 않고 불러오는 객체 (미리보기와 히스토리 목록에서 함께 사용)
     
-    def remove_from_history(self, history_id):
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM download_history WHERE id=?", (history_id,))
-        self.conn.commit()
+    캐시 확인과 이미지 축소는 작업 스레드에서, 다운로드는 공유 Transport의 네트워크 스레드에서
+    처리하고 결과 파일 경로를 시그널로 전달한다. 같은 키로 진행 중인 요청이 있으면 다시 요청하지 않는다.
+    """
+    loaded = pyqtSignal(str, str)
+    failed = pyqtSignal(str, str)
+    
+    def __init__(self, thumbnail_cache, timeout=THUMBNAIL_TIMEOUT, parent=None):
+        super().__init__(parent)
+        self.thumbnail_cache = thumbnail_cache
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="thumbnail")
+        self._requests = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def request_key(video_id, size):
+        return f"{video_id}:{size[0]}x{size[1]}"
     
-    def close(self):
-        self.conn.close()
+    def load(self, video_id, url, size, fallback_path=None):
+        """썸네일 요청 후 요청 키 반환 (결과는 loaded/failed 시그널로 전달됨)"""
+        key = self.request_key(video_id, size)
+        with self._lock:
+            if key in self._requests:
+                return key
+            request = ThumbnailRequest(key, video_id, url, size, fallback_path)
+            self._requests[key] = request
+        self.executor.submit(self._lookup, request)
+        return key
+    
+    def cancel(self, key):
+        """진행 중인 요청 취소 (받는 중이면 연결도 끊음)"""
+        with self._lock:
+            request = self._requests.pop(key, None)
+        if request:
+            request.cancelled = True
+            if request.future:
+                request.future.cancel()
+    
+    def shutdown(self):
+        with self._lock:
+            keys = list(self._requests)
+        for key in keys:
+            self.cancel(key)
+        self.executor.shutdown(wait=False)
+    
+    def _lookup(self, request):
+        """캐시나 예전 썸네일 파일에서 찾고, 없으면 네트워크 요청 시작 (작업 스레드)"""
+        try:
+            if request.cancelled:
+                return
+            path = self.thumbnail_cache.get(request.video_id, request.size)
+            if path is None and request.fallback_path and os.path.exists(request.fallback_path):
+                # 썸네일 캐시 이전에 다운로드 폴더에 저장된 원본은 캐시로 옮겨 줄여 둠
+                with open(request.fallback_path, 'rb') as f:
+                    self.thumbnail_cache.put(request.video_id, f.read())
+                path = self.thumbnail_cache.get(request.video_id, request.size)
+            if path:
+                self._finish(request, path)
+                return
+            
+            transport = get_transport()
+            coro = transport.request('GET', request.url, timeout=self.timeout)
+            request.future = transport.submit(asyncio.wait_for(coro, self.timeout))
+            if request.cancelled:
+                request.future.cancel()
+                return
+            request.future.add_done_callback(lambda future: self.executor.submit(self._store, request, future))
+        except Exception as e:
+            self._fail(request, str(e))
+    
+    def _store(self, request, future):
+        """받은 이미지를 줄여서 캐시에 저장 (작업 스레드)"""
+        if request.cancelled or future.cancelled():
+            return
+        try:
+            data = future.result()[1]
+            self.thumbnail_cache.put(request.video_id, data)
+            path = self.thumbnail_cache.get(request.video_id, request.size)
+            if path is None:
+                raise IOError("썸네일을 저장하지 못했습니다")
+        except asyncio.TimeoutError:
+            self._fail(request, "시간 초과")
+        except Exception as e:
+            self._fail(request, str(e))
+        else:
+            self._finish(request, path)
+    
+    def _finish(self, request, path):
+        if self._done(request):
+            self.loaded.emit(request.key, path)
+    
+    def _fail(self, request, message):
+        if self._done(request):
+            self.failed.emit(request.key, message)
+    
+    def _done(self, request):
+        with self._lock:
+            if self._requests.get(request.key) is not request:
+                return False
+            del self._requests[request.key]
+        return not request.cancelled
 
 
 class VideoInfoFetcher(QThread):
@@ -329,196 +404,95 @@ class VideoInfoFetcher(QThread):
     info_fetched = pyqtSignal(object)
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, url):
+    def __init__(self, url, metadata_cache=None):
         super().__init__()
         self.url = url
+        self.metadata_cache = metadata_cache
     
     def run(self):
         try:
-            yt = YouTube(self.url)
-            thumbnail_url = yt.thumbnail_url
-            
-            # 이용 가능한 스트림 정보 수집
-            video_streams = yt.streams.filter(progressive=True).order_by('resolution').desc()
-            audio_streams = yt.streams.filter(only_audio=True).order_by('abr').desc()
-            
-            video_formats = {}
-            for stream in video_streams:
-                if stream.resolution not in video_formats:
-                    video_formats[stream.resolution] = []
-                video_formats[stream.resolution].append({
-                    'itag': stream.itag,
-                    'mime_type': stream.mime_type,
-                    'extension': stream.subtype,
-                    'fps': stream.fps,
-                    'file_size': stream.filesize,
-                    'progressive': True
-                })
-            
-            audio_formats = {}
-            for stream in audio_streams:
-                if stream.abr not in audio_formats:
-                    audio_formats[stream.abr] = []
-                audio_formats[stream.abr].append({
-                    'itag': stream.itag,
-                    'mime_type': stream.mime_type,
-                    'extension': stream.subtype,
-                    'file_size': stream.filesize
-                })
-            
-            info = {
-                'id': yt.video_id,
-                'title': yt.title,
-                'description': yt.description,
-                'author': yt.author,
-                'length': yt.length,
-                'publish_date': str(yt.publish_date) if yt.publish_date else "Unknown",
-                'views': yt.views,
-                'rating': yt.rating,
-                'thumbnail_url': thumbnail_url,
-                'video_formats': video_formats,
-                'audio_formats': audio_formats
-            }
-            
+            with get_metrics().phase('info_fetch'):
+                info = resolve_video_info(self.url, self.metadata_cache)
             self.info_fetched.emit(info)
         except Exception as e:
             self.error_occurred.emit(str(e))
 
 
-class VideoDownloader(QThread):
-    """동영상 다운로드를 수행하는 스레드"""
-    download_progress = pyqtSignal(int, str)
+class VideoDownloader(QObject):
+    """DownloadJob의 콜백을 시그널로 전달하는 다운로드 작업 (DownloadManager의 작업자 스레드에서 run()이 실행됨)
+    
+    진행 상황은 청크마다 시그널로 보내지 않고 on_progress(보통 ProgressTracker.update)로 넘긴다.
+    """
     download_completed = pyqtSignal(dict)
     download_error = pyqtSignal(str)
+    status_changed = pyqtSignal(str)
+    transcode_status = pyqtSignal(str, int)
     
-    def __init__(self, url, itag, download_path, filename=None):
+    def __init__(self, url, itag, download_path, filename=None, metadata_cache=None, thumbnail_cache=None,
+                 on_progress=None, rate_key=None, convert=None, transcoder=None, duplicates=None, fsync=None):
         super().__init__()
+        from core.download import DownloadJob
         self.url = url
-        self.itag = itag
-        self.download_path = download_path
-        self.filename = filename
-        self.cancelled = False
+        self.job = DownloadJob(
+            url, itag, download_path, filename, metadata_cache,
+            on_progress=on_progress,
+            on_completed=self.download_completed.emit,
+            on_error=self.download_error.emit,
+            thumbnail_cache=thumbnail_cache,
+            rate_key=rate_key,
+            convert=convert,
+            transcoder=transcoder,
+            on_transcode=self.transcode_status.emit,
+            duplicates=duplicates,
+            fsync=fsync
+        )
     
     def run(self):
-        try:
-            yt = YouTube(self.url)
-            
-            # 진행 상황 콜백 함수
-            def progress_callback(stream, chunk, bytes_remaining):
-                if self.cancelled:
-                    raise Exception("Download cancelled")
-                total_size = stream.filesize
-                bytes_downloaded = total_size - bytes_remaining
-                percentage = int((bytes_downloaded / total_size) * 100)
-                self.download_progress.emit(percentage, f"{percentage}% - {bytes_downloaded/1000000:.1f}MB/{total_size/1000000:.1f}MB")
-            
-            yt.register_on_progress_callback(progress_callback)
-            
-            # 선택한 스트림 가져오기
-            stream = yt.streams.get_by_itag(self.itag)
-            
-            # 파일명 설정 (사용자 지정 또는 기본값)
-            output_filename = self.filename if self.filename else stream.default_filename
-            
-            # 다운로드 수행
-            file_path = stream.download(output_path=self.download_path, filename=output_filename)
-            
-            # 썸네일 다운로드 (나중에 히스토리에 표시)
-            from urllib import request
-            thumbnail_path = os.path.join(self.download_path, f"{yt.video_id}_thumbnail.jpg")
-            request.urlretrieve(yt.thumbnail_url, thumbnail_path)
-            
-            # 다운로드 완료 시그널 발생
-            download_info = {
-                'video_id': yt.video_id,
-                'title': yt.title,
-                'url': self.url,
-                'file_path': file_path,
-                'thumbnail_path': thumbnail_path,
-                'format': stream.subtype,
-                'resolution': stream.resolution if hasattr(stream, 'resolution') else stream.abr,
-                'file_size': os.path.getsize(file_path)
-            }
-            
-            self.download_completed.emit(download_info)
-            
-        except Exception as e:
-            if not self.cancelled:
-                self.download_error.emit(str(e))
+        self.job.run()
     
     def cancel_download(self):
-        self.cancelled = True
+        self.job.cancel()
+    
+    def cancel(self):
+        """작업자 풀에서 호출하는 취소"""
+        self.cancel_download()
 
 
-class DownloadManager:
-    """다운로드 작업을 관리하는 클래스"""
-    def __init__(self, max_concurrent_downloads=3):
-        self.max_concurrent_downloads = max_concurrent_downloads
-        self.active_downloads = {}
-        self.download_queue = []
-        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_downloads)
-    
-    def add_download(self, download_id, downloader, update_callback):
-        """다운로드 작업 추가"""
-        if len(self.active_downloads) < self.max_concurrent_downloads:
-            self.start_download(download_id, downloader, update_callback)
-        else:
-            self.download_queue.append((download_id, downloader, update_callback))
-    
-    def start_download(self, download_id, downloader, update_callback):
-        """다운로드 작업 시작"""
-        self.active_downloads[download_id] = downloader
-        update_callback('active')  # UI 업데이트 콜백
-        downloader.start()
+class BatchFetcher(QObject):
+    """BatchJob의 콜백을 GUI 스레드로 전달하는 객체"""
+    item_ready = pyqtSignal(str, dict, dict)
+    item_failed = pyqtSignal(str, str)
+    finished = pyqtSignal(int, int)
     
-    def remove_download(self, download_id):
-        """다운로드 작업 제거"""
-        if download_id in self.active_downloads:
-            downloader = self.active_downloads.pop(download_id)
-            downloader.cancel_download()
-            
-            # 대기열에서 다음 다운로드 시작
-            if self.download_queue:
-                next_download = self.download_queue.pop(0)
-                self.start_download(*next_download)
+    def __init__(self, urls, rule, metadata_cache=None):
+        super().__init__()
+        from core.batch import BatchJob
+        self.job = BatchJob(
+            urls, rule,
+            lambda url: resolve_video_info(url, metadata_cache),
+            on_item=self.item_ready.emit,
+            on_error=self.item_failed.emit,
+            on_finished=self.finished.emit
+        )
     
-    def download_completed(self, download_id):
-        """다운로드 완료 처리"""
-        if download_id in self.active_downloads:
-            self.active_downloads.pop(download_id)
-            
-            # 대기열에서 다음 다운로드 시작
-            if self.download_queue:
-                next_download = self.download_queue.pop(0)
-                self.start_download(*next_download)
-    
-    def set_max_concurrent_downloads(self, max_downloads):
-        """최대 동시 다운로드 수 설정"""
-        self.max_concurrent_downloads = max_downloads
-        self.executor.shutdown(wait=False)
-        self.executor = ThreadPoolExecutor(max_workers=max_downloads)
-        
-        # 필요한 경우 대기 중인 다운로드 시작
-        while len(self.active_downloads) < self.max_concurrent_downloads and self.download_queue:
-            next_download = self.download_queue.pop(0)
-            self.start_download(*next_download)
+    def start(self):
+        self.job.start()
     
-    def clear_all(self):
-        """모든 다운로드 작업 취소"""
-        for download_id, downloader in self.active_downloads.items():
-            downloader.cancel_download()
-        
-        self.active_downloads.clear()
-        self.download_queue.clear()
+    def cancel(self):
+        self.job.cancel()
 
 
 class VideoInfoWidget(QWidget):
     """비디오 정보 및 다운로드 옵션을 표시하는 위젯"""
-    download_requested = pyqtSignal(str, int, str)
+    download_requested = pyqtSignal(str, int, str, str)
     
-    def __init__(self, parent=None):
+    def __init__(self, thumbnail_loader, parent=None):
         super().__init__(parent)
+        self.thumbnail_loader = thumbnail_loader
+        self.thumbnail_loader.loaded.connect(self.on_thumbnail_loaded)
+        self.thumbnail_loader.failed.connect(self.on_thumbnail_failed)
         self.video_info = None
+        self.thumbnail_key = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -585,6 +559,15 @@ class VideoInfoWidget(QWidget):
         self.filename_layout.addWidget(self.filename_edit)
         self.options_layout.addLayout(self.filename_layout)
         
+        # 음성 변환 형식 선택 (ffmpeg가 있을 때만 표시, 형식은 영상 정보를 처음 표시할 때 채움)
+        self.convert_layout = QHBoxLayout()
+        self.convert_label = QLabel("음성 변환:")
+        self.convert_combo = QComboBox()
+        self.convert_combo.addItem("변환 안 함", "")
+        self.convert_layout.addWidget(self.convert_label)
+        self.convert_layout.addWidget(self.convert_combo)
+        self.options_layout.addLayout(self.convert_layout)
+        
         # 다운로드 버튼
         self.download_btn = QPushButton("다운로드")
         self.download_btn.setFixedHeight(40)
@@ -638,27 +621,35 @@ class VideoInfoWidget(QWidget):
         # 설명 설정
         self.description_text.setText(info['description'])
         
-        # 썸네일 가져오기
-        from urllib import request
-        from PyQt6.QtCore import QByteArray
-        try:
-            data = request.urlopen(info['thumbnail_url']).read()
-            image = QPixmap()
-            image.loadFromData(QByteArray(data))
-            self.thumbnail_label.setPixmap(image)
-        except Exception:
-            # 썸네일 로드 실패 시 기본 이미지
-            self.thumbnail_label.setText("썸네일 로드 실패")
+        # 썸네일은 비동기로 불러오고 그동안 안내 문구 표시 (이전 영상의 요청은 취소)
+        self.cancel_thumbnail()
+        self.thumbnail_label.clear()
+        self.thumbnail_label.setText("썸네일 불러오는 중...")
+        self.thumbnail_key = self.thumbnail_loader.load(info['id'], info['thumbnail_url'], PREVIEW_SIZE)
         
         # 포맷 콤보박스 채우기
         self.format_combo.clear()
         
-        # 비디오 포맷 추가
+        # 비디오 포맷 추가 (영상 전용 스트림은 ffmpeg가 있을 때만 음성과 합쳐서 받을 수 있음)
+        from core.mux import ffmpeg_path
+        can_mux = ffmpeg_path() is not None
+        if can_mux and self.convert_combo.count() == 1:
+            from core.transcode import AUDIO_FORMATS
+            for target in AUDIO_FORMATS:
+                self.convert_combo.addItem(target.upper(), target)
+        self.convert_label.setVisible(can_mux)
+        self.convert_combo.setVisible(can_mux)
+        if not can_mux:
+            self.convert_combo.setCurrentIndex(0)
         for resolution in info['video_formats']:
             for format_info in info['video_formats'][resolution]:
+                progressive = format_info.get('progressive', True)
+                if not progressive and not can_mux:
+                    continue
                 file_size_mb = format_info['file_size'] / (1024 * 1024)
                 self.format_combo.addItem(
-                    f"비디오 - {resolution} - {format_info['extension']} - {format_info['fps']}fps - {file_size_mb:.1f}MB",
+                    f"비디오 - {resolution} - {format_info['extension']} - {format_info['fps']}fps - {file_size_mb:.1f}MB"
+                    + ("" if progressive else " (영상+음성 합침)"),
                     format_info['itag']
                 )
         
@@ -674,9 +665,34 @@ class VideoInfoWidget(QWidget):
         # 위젯 표시
         self.setVisible(True)
     
+    def on_thumbnail_loaded(self, key, path):
+        """썸네일 수신 완료"""
+        # 그 사이 다른 영상 정보가 설정되었거나 다른 곳의 요청이면 무시
+        if key != self.thumbnail_key:
+            return
+        self.thumbnail_key = None
+        pixmap = cached_pixmap(path)
+        if pixmap is None:
+            self.thumbnail_label.setText("썸네일 로드 실패")
+        else:
+            self.thumbnail_label.setPixmap(pixmap)
+    
+    def on_thumbnail_failed(self, key, error_msg):
+        """썸네일 로드 실패 시 기본 이미지"""
+        if key != self.thumbnail_key:
+            return
+        self.thumbnail_key = None
+        self.thumbnail_label.setText("썸네일 로드 실패")
+    
+    def cancel_thumbnail(self):
+        if self.thumbnail_key:
+            self.thumbnail_loader.cancel(self.thumbnail_key)
+            self.thumbnail_key = None
+    
     def clear(self):
         """위젯 초기화"""
         self.video_info = None
+        self.cancel_thumbnail()
         self.title_label.setText("")
         self.author_label.setText("")
         self.length_label.setText("")
@@ -705,17 +721,269 @@ class VideoInfoWidget(QWidget):
         if not filename:
             filename = None
         
+        # 변환 형식 (빈 문자열은 변환하지 않음)
+        convert = self.convert_combo.currentData()
+        
         # 다운로드 요청 시그널 발생
-        self.download_requested.emit(self.video_info['id'], itag, filename)
+        self.download_requested.emit(self.video_info['id'], itag, filename, convert)
+
+
+class BatchDialog(QDialog):
+    """여러 URL, 텍스트 파일, 재생목록/채널 URL을 입력받는 일괄 다운로드 대화상자"""
+    def __init__(self, text="", parent=None):
+        super().__init__(parent)
+        self.setup_ui()
+        self.urls_edit.setPlainText(text)
+    
+    def setup_ui(self):
+        self.setWindowTitle("일괄 다운로드")
+        self.setMinimumSize(600, 400)
+        self.layout = QVBoxLayout(self)
+        
+        self.guide_label = QLabel("한 줄에 하나씩 URL을 입력하세요. 재생목록이나 채널 URL은 포함된 영상 전체로 펼쳐집니다.")
+        self.guide_label.setWordWrap(True)
+        self.layout.addWidget(self.guide_label)
+        
+        self.urls_edit = QPlainTextEdit()
+        self.layout.addWidget(self.urls_edit)
+        
+        # 파일 불러오기 및 포맷 규칙
+        self.options_layout = QHBoxLayout()
+        self.load_btn = QPushButton("파일에서 불러오기")
+        self.load_btn.clicked.connect(self.load_from_file)
+        
+        from core.batch import FORMAT_RULES
+        from core.mux import ffmpeg_path
+        from core.transcode import AUDIO_FORMATS
+        
+        self.rule_label = QLabel("포맷 규칙:")
+        self.rule_combo = QComboBox()
+        for rule, label in FORMAT_RULES.items():
+            self.rule_combo.addItem(label, rule)
+        self.rule_combo.setCurrentIndex(self.rule_combo.findData('best_720'))
+        
+        self.options_layout.addWidget(self.load_btn)
+        self.options_layout.addStretch()
+        self.options_layout.addWidget(self.rule_label)
+        self.options_layout.addWidget(self.rule_combo)
+        
+        # 받은 뒤 음성 변환 (ffmpeg가 있을 때만 표시)
+        self.convert_label = QLabel("음성 변환:")
+        self.convert_combo = QComboBox()
+        self.convert_combo.addItem("변환 안 함", "")
+        for target in AUDIO_FORMATS:
+            self.convert_combo.addItem(target.upper(), target)
+        can_convert = ffmpeg_path() is not None
+        self.convert_label.setVisible(can_convert)
+        self.convert_combo.setVisible(can_convert)
+        self.options_layout.addWidget(self.convert_label)
+        self.options_layout.addWidget(self.convert_combo)
+        self.layout.addLayout(self.options_layout)
+        
+        self.button_box = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        self.layout.addWidget(self.button_box)
+    
+    def load_from_file(self):
+        """텍스트 파일에서 URL 목록 불러오기"""
+        path, _ = QFileDialog.getOpenFileName(self, "URL 목록 파일 선택", "", "텍스트 파일 (*.txt);;모든 파일 (*)")
+        if not path:
+            return
+        from core.batch import read_url_file
+        try:
+            urls = read_url_file(path)
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.warning(self, "오류", f"파일을 읽을 수 없습니다:\n{e}")
+            return
+        current = self.urls_edit.toPlainText().rstrip()
+        self.urls_edit.setPlainText("\n".join(([current] if current else []) + urls))
+    
+    def get_urls(self):
+        from core.batch import parse_url_list
+        return parse_url_list(self.urls_edit.toPlainText())
+    
+    def get_rule(self):
+        return self.rule_combo.currentData()
+    
+    def get_convert(self):
+        return self.convert_combo.currentData() or None
+
+
+class HistoryModel(QAbstractListModel):
+    """SQLite의 다운로드 히스토리를 페이지 단위로 읽어 오는 목록 모델
+    
+    처음에는 한 페이지만 읽고, 뷰가 끝까지 스크롤되면 fetchMore()로 다음 페이지를 읽는다.
+    항목 추가/삭제는 목록 전체를 다시 읽지 않고 해당 행만 반영한다.
+    검색어가 있으면 전문 검색 색인에서 일치하는 행만 같은 방식으로 나누어 읽는다.
+    """
+    HistoryRole = Qt.ItemDataRole.UserRole + 1
+    PAGE_SIZE = 200
+    
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.rows = []
+        self.search = ""
+        self.more = False
+    
+    def reload(self):
+        self.beginResetModel()
+        self.rows = self.db.get_history_page(self.PAGE_SIZE, search=self.search)
+        # 일치하는 행을 모두 세지 않고 페이지가 가득 찼는지로 다음 페이지 여부를 판단
+        self.more = len(self.rows) == self.PAGE_SIZE
+        self.endResetModel()
+    
+    def set_search(self, text):
+        """검색어를 바꾸고 첫 페이지부터 다시 읽음"""
+        text = text.strip()
+        if text != self.search:
+            self.search = text
+            self.reload()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.more
+    
+    @traced()
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self.rows:
+            return
+        last = self.rows[-1]
+        page = self.db.get_history_page(self.PAGE_SIZE, before=(last[8], last[0]), search=self.search)
+        self.more = len(page) == self.PAGE_SIZE
+        if not page:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(page) - 1)
+        self.rows.extend(page)
+        self.endInsertRows()
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        row = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return row[2]
+        if role == Qt.ItemDataRole.UserRole:
+            return row[0]
+        if role == self.HistoryRole:
+            return row
+        return None
+    
+    def add_item(self, history_id):
+        """새로 추가된 히스토리 행을 맨 위에 삽입 (검색 중이면 검색어에 맞을 때만)"""
+        row = self.db.get_history_item(history_id, search=self.search)
+        if row is None:
+            return
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.rows.insert(0, row)
+        self.endInsertRows()
+    
+    def remove_item(self, history_id):
+        for i, row in enumerate(self.rows):
+            if row[0] == history_id:
+                self.beginRemoveRows(QModelIndex(), i, i)
+                del self.rows[i]
+                self.endRemoveRows()
+                return
+
+
+class HistoryItemDelegate(QStyledItemDelegate):
+    """히스토리 행을 위젯 없이 직접 그리는 델리게이트 (화면에 보이는 행만 그려짐)"""
+    THUMBNAIL_SIZE = QSize(*HISTORY_SIZE)
+    MARGIN = 6
+    
+    def __init__(self, thumbnail_loader, parent=None):
+        super().__init__(parent)
+        self.thumbnail_loader = thumbnail_loader
+        self.thumbnail_loader.loaded.connect(self.on_thumbnail_loaded)
+        self.thumbnail_loader.failed.connect(self.on_thumbnail_failed)
+        # 불러온 썸네일 경로와 실패한 영상 (요청 키 기준)
+        self.paths = {}
+        self.failed = set()
+    
+    def sizeHint(self, option, index):
+        return QSize(0, self.THUMBNAIL_SIZE.height() + self.MARGIN * 2)
+    
+    def paint(self, painter, option, index):
+        history_id, video_id, title, url, file_path, thumbnail_path, format, resolution, download_date, file_size, author = index.data(HistoryModel.HistoryRole)
+        
+        painter.save()
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+        
+        # 썸네일 (캐시에 줄여서 저장된 이미지 사용)
+        rect = option.rect.adjusted(self.MARGIN, self.MARGIN, -self.MARGIN, -self.MARGIN)
+        thumbnail_rect = QRect(rect.topLeft(), self.THUMBNAIL_SIZE)
+        pixmap = self.thumbnail(video_id, thumbnail_path)
+        if pixmap is None:
+            key = ThumbnailLoader.request_key(video_id, HISTORY_SIZE)
+            text = "이미지 없음" if key in self.failed else "불러오는 중"
+            painter.drawText(thumbnail_rect, Qt.AlignmentFlag.AlignCenter, text)
+        else:
+            x = thumbnail_rect.x() + (thumbnail_rect.width() - pixmap.width()) // 2
+            y = thumbnail_rect.y() + (thumbnail_rect.height() - pixmap.height()) // 2
+            painter.drawPixmap(x, y, pixmap)
+        
+        # 제목과 파일 정보 및 날짜
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.setPen(option.palette.highlightedText().color())
+        else:
+            painter.setPen(option.palette.text().color())
+        text_rect = rect.adjusted(self.THUMBNAIL_SIZE.width() + self.MARGIN * 2, 0, 0, 0)
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        title_rect = QRect(text_rect.x(), text_rect.y(), text_rect.width(), text_rect.height() // 2)
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignBottom,
+                         painter.fontMetrics().elidedText(title, Qt.TextElideMode.ElideRight, title_rect.width()))
+        
+        painter.setFont(option.font)
+        file_size_mb = file_size / (1024 * 1024) if file_size else 0
+        details_rect = title_rect.translated(0, title_rect.height())
+        painter.drawText(details_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop,
+                         (f"{author} - " if author else "") + f"{resolution} - {format} - {file_size_mb:.1f}MB - {download_date}")
+        painter.restore()
+    
+    def thumbnail(self, video_id, thumbnail_path):
+        """불러온 썸네일 픽스맵 (아직 없으면 비동기 요청 후 None)"""
+        key = ThumbnailLoader.request_key(video_id, HISTORY_SIZE)
+        path = self.paths.get(key)
+        if path:
+            pixmap = cached_pixmap(path)
+            if pixmap is not None:
+                return pixmap
+        if key not in self.failed:
+            # paint()에서 디스크나 네트워크를 기다리지 않도록 작업 스레드에 맡김
+            self.thumbnail_loader.load(video_id, thumbnail_url(video_id), HISTORY_SIZE, thumbnail_path)
+        return None
+    
+    def on_thumbnail_loaded(self, key, path):
+        if key.endswith(f":{HISTORY_SIZE[0]}x{HISTORY_SIZE[1]}"):
+            self.paths[key] = path
+            self.parent().viewport().update()
+    
+    def on_thumbnail_failed(self, key, error_msg):
+        if key.endswith(f":{HISTORY_SIZE[0]}x{HISTORY_SIZE[1]}"):
+            self.failed.add(key)
+            self.parent().viewport().update()
 
 
 class DownloadHistoryWidget(QWidget):
     """다운로드 히스토리를 표시하는 위젯"""
     open_file_location = pyqtSignal(str)
     remove_history = pyqtSignal(int)
+    # 검색창 입력 후 검색까지 기다리는 시간 (밀리초)
+    SEARCH_DELAY = 150
     
-    def __init__(self, parent=None):
+    def __init__(self, model, thumbnail_loader, parent=None):
         super().__init__(parent)
+        self.model = model
+        self.thumbnail_loader = thumbnail_loader
         self.setup_ui()
     
     def setup_ui(self):
@@ -726,84 +994,45 @@ class DownloadHistoryWidget(QWidget):
         self.title_label.setStyleSheet("font-size: 16px; font-weight: bold;")
         self.layout.addWidget(self.title_label)
         
-        # 히스토리 목록
-        self.history_list = QListWidget()
+        # 검색창 (입력이 잠시 멈추면 검색하여 글자마다 다시 읽지 않음)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("제목, 채널, URL, 파일 경로 검색")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY)
+        self.search_timer.timeout.connect(lambda: self.model.set_search(self.search_edit.text()))
+        self.search_edit.textChanged.connect(self.search_timer.start)
+        self.layout.addWidget(self.search_edit)
+        
+        # 히스토리 목록 (행마다 위젯을 만들지 않고 델리게이트가 보이는 행만 그림)
+        self.history_list = QListView()
+        self.history_list.setModel(self.model)
+        self.history_list.setItemDelegate(HistoryItemDelegate(self.thumbnail_loader, self.history_list))
+        self.history_list.setUniformItemSizes(True)
         self.history_list.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.history_list.customContextMenuRequested.connect(self.show_context_menu)
         self.layout.addWidget(self.history_list)
     
-    def update_history(self, history_items):
-        """히스토리 목록 업데이트"""
-        self.history_list.clear()
-        
-        for item in history_items:
-            history_id, video_id, title, url, file_path, thumbnail_path, format, resolution, download_date, file_size = item
-            
-            # 아이템 위젯 생성
-            widget = QWidget()
-            layout = QHBoxLayout(widget)
-            
-            # 썸네일 표시
-            thumbnail_label = QLabel()
-            thumbnail_label.setFixedSize(120, 68)
-            if os.path.exists(thumbnail_path):
-                thumbnail_pixmap = QPixmap(thumbnail_path)
-                thumbnail_label.setPixmap(thumbnail_pixmap.scaled(120, 68, Qt.AspectRatioMode.KeepAspectRatio))
-            else:
-                thumbnail_label.setText("이미지 없음")
-            
-            layout.addWidget(thumbnail_label)
-            
-            # 정보 레이아웃
-            info_layout = QVBoxLayout()
-            
-            title_label = QLabel(title)
-            title_label.setStyleSheet("font-weight: bold;")
-            info_layout.addWidget(title_label)
-            
-            # 파일 정보 및 날짜
-            file_size_mb = file_size / (1024 * 1024) if file_size else 0
-            details_label = QLabel(f"{resolution} - {format} - {file_size_mb:.1f}MB - {download_date}")
-            info_layout.addWidget(details_label)
-            
-            layout.addLayout(info_layout)
-            
-            # 아이템에 히스토리 ID 저장
-            item_widget = QListWidgetItem()
-            item_widget.setData(Qt.ItemDataRole.UserRole, history_id)
-            item_widget.setSizeHint(widget.sizeHint())
-            
-            self.history_list.addItem(item_widget)
-            self.history_list.setItemWidget(item_widget, widget)
-    
     def show_context_menu(self, position):
         """컨텍스트 메뉴 표시"""
-        item = self.history_list.itemAt(position)
-        if not item:
+        index = self.history_list.indexAt(position)
+        if not index.isValid():
             return
         
-        history_id = item.data(Qt.ItemDataRole.UserRole)
+        row = index.data(HistoryModel.HistoryRole)
+        history_id, file_path = row[0], row[4]
         
         menu = QMenu()
         open_location_action = menu.addAction("파일 위치 열기")
         remove_action = menu.addAction("기록에서 삭제")
         
-        action = menu.exec(self.history_list.mapToGlobal(position))
+        action = menu.exec(self.history_list.viewport().mapToGlobal(position))
         
         if action == open_location_action:
-            widget = self.history_list.itemWidget(item)
-            self.open_file_location.emit(os.path.dirname(self.get_file_path(history_id)))
+            self.open_file_location.emit(os.path.dirname(file_path or ""))
         elif action == remove_action:
             self.remove_history.emit(history_id)
-    
-    def get_file_path(self, history_id):
-        """히스토리 ID로 파일 경로 가져오기"""
-        for i in range(self.history_list.count()):
-            item = self.history_list.item(i)
-            if item.data(Qt.ItemDataRole.UserRole) == history_id:
-                # TODO: 실제 데이터베이스에서 경로 가져오기
-                return ""
-        return ""
 
 
 class SettingsWidget(QWidget):
@@ -851,7 +1080,7 @@ class SettingsWidget(QWidget):
         self.concurrent_layout = QHBoxLayout()
         self.concurrent_label = QLabel("최대 동시 다운로드 수:")
         self.concurrent_combo = QComboBox()
-        self.concurrent_combo.addItems(["1", "2", "3", "4", "5"])
+        self.concurrent_combo.addItems(["1", "2", "3", "4", "5", "자동"])
         self.concurrent_combo.setCurrentIndex(2)  # 기본값 3
         self.concurrent_combo.currentIndexChanged.connect(self.on_concurrent_changed)
         
@@ -859,13 +1088,67 @@ class SettingsWidget(QWidget):
         self.concurrent_layout.addWidget(self.concurrent_combo)
         self.layout.addLayout(self.concurrent_layout)
         
+        # 자동 모드의 동시 다운로드 수 범위 (자동을 골랐을 때만 표시)
+        self.auto_layout = QHBoxLayout()
+        from core.concurrency import AUTO_LIMIT
+        self.auto_label = QLabel("자동 조정 범위:")
+        self.auto_min_spin = QSpinBox()
+        self.auto_min_spin.setRange(1, AUTO_LIMIT)
+        self.auto_max_spin = QSpinBox()
+        self.auto_max_spin.setRange(1, AUTO_LIMIT)
+        self.auto_min_spin.editingFinished.connect(self.on_auto_range_changed)
+        self.auto_max_spin.editingFinished.connect(self.on_auto_range_changed)
+        
+        self.auto_layout.addWidget(self.auto_label)
+        self.auto_layout.addWidget(self.auto_min_spin)
+        self.auto_layout.addWidget(QLabel("~"))
+        self.auto_layout.addWidget(self.auto_max_spin)
+        self.auto_widget = QWidget()
+        self.auto_widget.setLayout(self.auto_layout)
+        self.auto_widget.setVisible(False)
+        self.layout.addWidget(self.auto_widget)
+        
+        # 전체 다운로드 속도 제한
+        self.rate_layout = QHBoxLayout()
+        self.rate_label = QLabel("최대 다운로드 속도 (KB/s, 0은 무제한):")
+        self.rate_spin = QSpinBox()
+        self.rate_spin.setRange(0, 10000000)
+        self.rate_spin.setSingleStep(100)
+        self.rate_spin.editingFinished.connect(self.on_rate_limit_changed)
+        
+        self.rate_layout.addWidget(self.rate_label)
+        self.rate_layout.addWidget(self.rate_spin)
+        self.layout.addLayout(self.rate_layout)
+        
+        # 시간대별 속도 제한 (해당 시간대에는 위 값 대신 사용)
+        self.schedule_label = QLabel("시간대별 속도 제한 (한 줄에 하나씩, 예: 09:00-18:00 500):")
+        self.layout.addWidget(self.schedule_label)
+        self.schedule_edit = QPlainTextEdit()
+        self.schedule_edit.setMaximumHeight(80)
+        self.layout.addWidget(self.schedule_edit)
+        self.schedule_btn = QPushButton("시간대 적용")
+        self.schedule_btn.clicked.connect(self.on_schedule_changed)
+        self.layout.addWidget(self.schedule_btn, alignment=Qt.AlignmentFlag.AlignRight)
+        
+        # 디스크 동기화 정책 (FSYNC_POLICIES 순서)
+        self.fsync_layout = QHBoxLayout()
+        self.fsync_label = QLabel("디스크 기록:")
+        self.fsync_combo = QComboBox()
+        self.fsync_combo.addItems(["빠르게 (운영체제에 맡김)", "완료할 때 동기화 (기본)", "블록마다 동기화 (가장 안전)"])
+        self.fsync_combo.currentIndexChanged.connect(self.on_fsync_changed)
+        
+        self.fsync_layout.addWidget(self.fsync_label)
+        self.fsync_layout.addWidget(self.fsync_combo)
+        self.layout.addLayout(self.fsync_layout)
+        
         # 여백 추가
         spacer = QSpacerItem(20, 40, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding)
         self.layout.addItem(spacer)
     
     def set_settings(self, settings):
         """설정 값 설정"""
-        self.settings = settings
+        # 변경 전 값과 비교할 수 있도록 복사본을 수정함
+        self.settings = dict(settings)
         self.path_edit.setText(settings['download_path'])
         
         # 테마 설정
@@ -876,9 +1159,23 @@ class SettingsWidget(QWidget):
         else:  # 'dark'
             self.theme_combo.setCurrentIndex(2)
         
-        # 최대 동시 다운로드 수
-        max_downloads = min(5, max(1, settings['max_concurrent_downloads']))
-        self.concurrent_combo.setCurrentIndex(max_downloads - 1)
+        # 최대 동시 다운로드 수 (자동 모드는 마지막 항목)
+        self.auto_min_spin.setValue(settings['auto_min_downloads'])
+        self.auto_max_spin.setValue(settings['auto_max_downloads'])
+        if settings['auto_concurrency']:
+            self.concurrent_combo.setCurrentIndex(self.concurrent_combo.count() - 1)
+        else:
+            max_downloads = min(5, max(1, settings['max_concurrent_downloads']))
+            self.concurrent_combo.setCurrentIndex(max_downloads - 1)
+        self.auto_widget.setVisible(settings['auto_concurrency'])
+        
+        # 속도 제한
+        self.rate_spin.setValue(settings['rate_limit'])
+        self.schedule_edit.setPlainText(settings['rate_schedule'])
+        
+        # 디스크 동기화 정책
+        if settings['fsync_policy'] in FSYNC_POLICIES:
+            self.fsync_combo.setCurrentIndex(FSYNC_POLICIES.index(settings['fsync_policy']))
     
     def change_download_path(self):
         """다운로드 경로 변경"""
@@ -899,19 +1196,57 @@ class SettingsWidget(QWidget):
         self.settings_updated.emit(self.settings)
     
     def on_concurrent_changed(self, index):
-        """최대 동시 다운로드 수 변경 처리"""
-        self.settings['max_concurrent_downloads'] = index + 1
+        """최대 동시 다운로드 수 변경 처리 (마지막 항목은 자동 모드)"""
+        auto = index == self.concurrent_combo.count() - 1
+        self.settings['auto_concurrency'] = auto
+        if not auto:
+            self.settings['max_concurrent_downloads'] = index + 1
+        self.auto_widget.setVisible(auto)
+        self.settings_updated.emit(self.settings)
+    
+    def on_auto_range_changed(self):
+        """자동 모드의 동시 다운로드 수 범위 변경 처리"""
+        minimum = self.auto_min_spin.value()
+        maximum = max(minimum, self.auto_max_spin.value())
+        self.auto_max_spin.setValue(maximum)
+        self.settings['auto_min_downloads'] = minimum
+        self.settings['auto_max_downloads'] = maximum
+        self.settings_updated.emit(self.settings)
+    
+    def on_rate_limit_changed(self):
+        """전체 속도 제한 변경 처리"""
+        self.settings['rate_limit'] = self.rate_spin.value()
+        self.settings_updated.emit(self.settings)
+    
+    def on_schedule_changed(self):
+        """시간대별 속도 제한 변경 처리"""
+        text = self.schedule_edit.toPlainText().strip()
+        try:
+            parse_schedule(text)
+        except ValueError as e:
+            QMessageBox.warning(self, "설정 오류", str(e))
+            return
+        self.settings['rate_schedule'] = text
+        self.settings_updated.emit(self.settings)
+    
+    def on_fsync_changed(self, index):
+        """디스크 동기화 정책 변경 처리 (다음에 시작하는 다운로드부터 적용)"""
+        self.settings['fsync_policy'] = FSYNC_POLICIES[index]
         self.settings_updated.emit(self.settings)
 
 
 class ActiveDownloadWidget(QWidget):
     """활성 다운로드를 표시하는 위젯"""
     cancel_download = pyqtSignal(str)
+    # 다운로드 ID, 속도 제한(KB/s, 0은 무제한), 대역폭 가중치
+    bandwidth_changed = pyqtSignal(str, int, float)
     
     def __init__(self, download_id, title, parent=None):
         super().__init__(parent)
         self.download_id = download_id
         self.title = title
+        self.rate_limit = 0
+        self.weight = 1.0
         self.setup_ui()
     
     def setup_ui(self):
@@ -958,6 +1293,32 @@ class ActiveDownloadWidget(QWidget):
     def request_cancel(self):
         """다운로드 취소 요청"""
         self.cancel_download.emit(self.download_id)
+    
+    def contextMenuEvent(self, event):
+        """이 다운로드의 속도 제한과 대역폭 비중 설정 메뉴"""
+        menu = QMenu(self)
+        limit_action = menu.addAction("속도 제한 설정...")
+        weight_menu = menu.addMenu("대역폭 비중")
+        for label, weight in BANDWIDTH_WEIGHTS:
+            action = weight_menu.addAction(label)
+            action.setCheckable(True)
+            action.setChecked(weight == self.weight)
+            action.setData(weight)
+        
+        action = menu.exec(event.globalPos())
+        if action is None:
+            return
+        if action is limit_action:
+            value, ok = QInputDialog.getInt(
+                self, "속도 제한", "이 다운로드의 최대 속도 (KB/s, 0은 무제한):",
+                self.rate_limit, 0, 10000000, 100
+            )
+            if not ok:
+                return
+            self.rate_limit = value
+        else:
+            self.weight = action.data()
+        self.bandwidth_changed.emit(self.download_id, self.rate_limit, self.weight)
 
 
 class MainWindow(QMainWindow):
@@ -971,22 +1332,68 @@ class MainWindow(QMainWindow):
         # 설정 불러오기
         self.settings = self.db.get_settings()
         
+        # 속도 제한 (설정의 전체/시간대별 제한 적용)
+        self.rate_limiter = get_rate_limiter()
+        self.apply_rate_limits()
+        
+        # 다운로드 진행 상황 추적 (청크마다가 아니라 일정 간격으로 화면 갱신)
+        self.progress_tracker = ProgressTracker()
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(int(REPORT_INTERVAL * 1000))
+        self.progress_timer.timeout.connect(self.report_progress)
+        
+        # 영상 정보 캐시 (같은 URL을 다시 열거나 다운로드할 때 재사용)
+        self.metadata_cache = MetadataCache(self.db)
+        
+        # 썸네일 캐시 (앱 데이터 폴더에 줄인 크기로 저장, 최근 픽스맵은 메모리에 보관)
+        self.thumbnail_cache = ThumbnailCache(self.db, scaler=scale_thumbnail)
+        self.thumbnail_loader = ThumbnailLoader(self.thumbnail_cache, parent=self)
+        QPixmapCache.setCacheLimit(PIXMAP_CACHE_LIMIT)
+        
         # 다운로드 관리자 초기화
         self.download_manager = DownloadManager(
             max_concurrent_downloads=self.settings['max_concurrent_downloads']
         )
+        self.apply_concurrency()
+        
+        # 음성 변환 대기열과 중복 파일 색인은 첫 다운로드를 시작할 때 만듦 (start_job_services)
+        self.transcoder = None
+        self.duplicates = None
+        
+        # YTDL_METRICS_PORT/YTDL_METRICS_LOG가 있으면 측정값 서버와 기록 파일 시작
+        self.metrics_exporters = start_exporters()
+        
+        # YTDL_TRACE가 있으면 작업 단계와 GUI 이벤트 처리 구간을 기록 (종료할 때 파일로 저장)
+        from core.tracing import start_tracing
+        start_tracing()
+        
+        # GUI 스레드 감시 (멈춤 기준을 넘으면 ~/.youtube_downloader/stalls.log에 걸린 시간과 스택 기록)
+        self.watchdog = start_watchdog()
+        if self.watchdog:
+            self.heartbeat_timer = QTimer(self)
+            self.heartbeat_timer.setTimerType(Qt.TimerType.PreciseTimer)
+            self.heartbeat_timer.setInterval(int(HEARTBEAT_INTERVAL * 1000))
+            self.heartbeat_timer.timeout.connect(self.watchdog.beat)
+            self.heartbeat_timer.start()
         
         # 활성 다운로드 위젯 매핑
         self.active_downloads = {}
         
+        # 진행 중인 일괄 작업
+        self.batches = []
+        self.batch_errors = []
+        
         self.setup_ui()
         self.setup_tray_icon()
         
         # 테마 적용
         self.apply_theme()
         
-        # 히스토리 로드
-        self.load_history()
+        # 히스토리는 창을 먼저 띄운 뒤 불러옴 (첫 페이지만 읽고 썸네일은 보이는 행만 백그라운드에서 받음)
+        QTimer.singleShot(0, self.load_history)
+        
+        # 이전 실행에서 중단된 다운로드 이어받기 확인
+        QTimer.singleShot(0, self.resume_pending_downloads)
     
     def setup_ui(self):
         """UI 초기화"""
@@ -1019,10 +1426,14 @@ class MainWindow(QMainWindow):
         
         self.url_layout.addWidget(self.url_input)
         self.url_layout.addWidget(self.fetch_btn)
+        
+        self.batch_btn = QPushButton("일괄 다운로드")
+        self.batch_btn.clicked.connect(self.on_batch_requested)
+        self.url_layout.addWidget(self.batch_btn)
         self.left_layout.addLayout(self.url_layout)
         
         # 비디오 정보 및 다운로드 옵션 위젯
-        self.video_info_widget = VideoInfoWidget()
+        self.video_info_widget = VideoInfoWidget(self.thumbnail_loader)
         self.video_info_widget.download_requested.connect(self.on_download_requested)
         self.left_layout.addWidget(self.video_info_widget)
         
@@ -1031,6 +1442,13 @@ class MainWindow(QMainWindow):
         self.downloads_label.setStyleSheet("font-size: 16px; font-weight: bold;")
         self.left_layout.addWidget(self.downloads_label)
         
+        self.queue_status_label = QLabel("")
+        self.left_layout.addWidget(self.queue_status_label)
+        
+        self.batch_status_label = QLabel("")
+        self.batch_status_label.setVisible(False)
+        self.left_layout.addWidget(self.batch_status_label)
+        
         self.active_downloads_container = QWidget()
         self.active_downloads_layout = QVBoxLayout(self.active_downloads_container)
         self.active_downloads_layout.setContentsMargins(0, 0, 0, 0)
@@ -1050,7 +1468,8 @@ class MainWindow(QMainWindow):
         self.tab_widget = QTabWidget()
         
         # 히스토리 탭
-        self.history_widget = DownloadHistoryWidget()
+        self.history_model = HistoryModel(self.db, self)
+        self.history_widget = DownloadHistoryWidget(self.history_model, self.thumbnail_loader)
         self.history_widget.open_file_location.connect(self.open_file_location)
         self.history_widget.remove_history.connect(self.remove_from_history)
         self.tab_widget.addTab(self.history_widget, "다운로드 기록")
@@ -1106,10 +1525,10 @@ class MainWindow(QMainWindow):
         
         self.setStyleSheet(style)
     
+    @traced()
     def load_history(self):
-        """다운로드 히스토리 로드"""
-        history_items = self.db.get_history()
-        self.history_widget.update_history(history_items)
+        """다운로드 히스토리의 첫 페이지 로드 (나머지는 스크롤할 때 읽음)"""
+        self.history_model.reload()
     
     def on_fetch_video_info(self):
         """비디오 정보 가져오기"""
@@ -1117,17 +1536,24 @@ class MainWindow(QMainWindow):
         if not url:
             return
         
+        # 재생목록/채널 URL은 일괄 다운로드로 처리
+        from core.batch import is_collection_url
+        if is_collection_url(url):
+            self.on_batch_requested(url)
+            return
+        
         # 입력 비활성화
         self.url_input.setEnabled(False)
         self.fetch_btn.setEnabled(False)
         self.fetch_btn.setText("로딩 중...")
         
         # 비디오 정보 가져오기 스레드 시작
-        self.info_fetcher = VideoInfoFetcher(url)
+        self.info_fetcher = VideoInfoFetcher(url, self.metadata_cache)
         self.info_fetcher.info_fetched.connect(self.on_info_fetched)
         self.info_fetcher.error_occurred.connect(self.on_info_error)
         self.info_fetcher.start()
     
+    @traced()
     def on_info_fetched(self, info):
         """비디오 정보 가져오기 완료"""
         # 입력 다시 활성화
@@ -1151,92 +1577,291 @@ class MainWindow(QMainWindow):
         # 정보 위젯 초기화
         self.video_info_widget.clear()
     
-    def on_download_requested(self, video_id, itag, filename):
+    def on_download_requested(self, video_id, itag, filename, convert):
         """다운로드 요청 처리"""
         # 비디오 URL 가져오기
         url = self.url_input.text().strip()
         
-        # 고유 다운로드 ID 생성
-        download_id = f"{video_id}_{int(time.time())}"
+        # 고유 다운로드 ID 생성 (같은 영상을 연달아 요청해도 겹치지 않음)
+        download_id = uuid.uuid4().hex[:12]
         
-        # 다운로드 위젯 생성
         title = self.video_info_widget.title_label.text()
+        # 직접 요청한 다운로드는 일괄 작업보다 먼저 실행
+        self.queue_download(download_id, url, itag, filename, title, priority=1, convert=convert or None)
+    
+    def on_batch_requested(self, text=""):
+        """일괄 다운로드 대화상자 표시 후 작업 시작"""
+        dialog = BatchDialog(text if isinstance(text, str) else "", self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        urls = dialog.get_urls()
+        if not urls:
+            return
+        
+        batch = BatchFetcher(urls, dialog.get_rule(), self.metadata_cache)
+        convert = dialog.get_convert()
+        batch.item_ready.connect(lambda url, info, format_info: self.on_batch_item_ready(url, info, format_info, convert))
+        batch.item_failed.connect(self.on_batch_item_failed)
+        batch.finished.connect(lambda resolved, failed, b=batch: self.on_batch_finished(b, resolved, failed))
+        self.batches.append(batch)
+        self.batch_errors = []
+        batch.start()
+        self.update_batch_status()
+    
+    def on_batch_item_ready(self, url, info, format_info, convert=None):
+        """일괄 작업에서 정보가 준비된 영상을 다운로드 대기열에 추가"""
+        download_id = uuid.uuid4().hex[:12]
+        self.queue_download(download_id, url, format_info['itag'], None, info['title'], convert=convert)
+        self.update_batch_status()
+    
+    def on_batch_item_failed(self, url, error_msg):
+        self.batch_errors.append(f"{url}: {error_msg}")
+        self.update_batch_status()
+    
+    def on_batch_finished(self, batch, resolved, failed):
+        """일괄 작업의 정보 가져오기 단계 완료"""
+        if batch in self.batches:
+            self.batches.remove(batch)
+        self.update_batch_status()
+        if failed:
+            details = "\n".join(self.batch_errors[:20])
+            QMessageBox.warning(self, "일괄 다운로드", f"{resolved}개를 대기열에 추가했고 {failed}개는 실패했습니다.\n\n{details}")
+    
+    def update_batch_status(self):
+        """진행 중인 일괄 작업의 정보 가져오기 진행 상황 표시"""
+        if not self.batches:
+            self.batch_status_label.setVisible(False)
+            return
+        done = sum(b.job.resolved + b.job.failed for b in self.batches)
+        total = sum(b.job.total for b in self.batches)
+        self.batch_status_label.setText(f"일괄 작업: 정보 확인 {done}/{total or '?'}")
+        self.batch_status_label.setVisible(True)
+    
+    def queue_download(self, download_id, url, itag, filename, title, download_path=None, priority=0,
+                       convert=None):
+        """다운로드 작업 생성 후 다운로드 관리자에 추가 (convert를 지정하면 받은 뒤 음성 변환)"""
+        download_path = download_path or self.settings['download_path']
+        
+        # 앱이 종료되어도 다음 실행 때 이어받을 수 있도록 기록
+        self.db.add_pending_download(download_id, url, itag, download_path, filename, title, convert)
+        
+        # 다운로드 위젯 생성
         download_widget = ActiveDownloadWidget(download_id, title)
         download_widget.cancel_download.connect(self.on_cancel_download)
+        download_widget.bandwidth_changed.connect(self.on_bandwidth_changed)
         
         # 위젯을 활성 다운로드 영역에 추가
         self.active_downloads_layout.addWidget(download_widget)
         self.active_downloads[download_id] = download_widget
         
         # 다운로드 스레드 생성
-        downloader = VideoDownloader(url, itag, self.settings['download_path'], filename)
-        downloader.download_progress.connect(lambda p, t, wid=download_widget: wid.update_progress(p, t))
+        # 진행 상황은 추적기에 기록만 하고 화면은 타이머가 일정 간격으로 갱신
+        self.start_job_services()
+        downloader = VideoDownloader(
+            url, itag, download_path, filename, self.metadata_cache, self.thumbnail_cache,
+            on_progress=lambda done, total, did=download_id: self.progress_tracker.update(did, done, total),
+            rate_key=download_id,
+            convert=convert,
+            transcoder=self.transcoder,
+            duplicates=self.duplicates,
+            fsync=self.settings['fsync_policy']
+        )
         downloader.download_completed.connect(lambda info, did=download_id: self.on_download_completed(info, did))
         downloader.download_error.connect(lambda err, did=download_id: self.on_download_error(err, did))
         
+        # 상태 변경은 작업자 스레드에서 올 수 있으므로 시그널을 거쳐 GUI 스레드에서 처리
+        downloader.status_changed.connect(lambda status, did=download_id: self.update_download_status(did, status))
+        downloader.transcode_status.connect(
+            lambda status, percentage, did=download_id: self.update_transcode_status(did, status, percentage)
+        )
+        
+        # 받아 둔 같은 파일을 캐시만으로 찾으면 대기열에 넣지 않고 바로 완료 처리 (완료 시그널은 같은
+        # 스레드이므로 on_download_completed가 바로 호출됨)
+        if downloader.job.reuse_cached():
+            return
+        
         # 다운로드 관리자에 추가
         self.download_manager.add_download(
             download_id, 
             downloader, 
-            lambda status, did=download_id: self.update_download_status(did, status)
+            downloader.status_changed.emit,
+            priority=priority
+        )
+    
+    def resume_pending_downloads(self):
+        """이전 실행에서 끝나지 않은 다운로드를 이어받을지 확인"""
+        pending = self.db.get_pending_downloads()
+        if not pending:
+            return
+        
+        answer = QMessageBox.question(
+            self, "이어받기",
+            f"이전에 완료되지 않은 다운로드가 {len(pending)}개 있습니다.\n이어서 받으시겠습니까?"
         )
+        
+        for download_id, url, itag, download_path, filename, title, convert in pending:
+            if answer == QMessageBox.StandardButton.Yes:
+                self.queue_download(download_id, url, itag, filename, title, download_path, convert=convert)
+            else:
+                self.db.remove_pending_download(download_id)
+    
+    def start_job_services(self):
+        """음성 변환 대기열(다운로드 작업자와 별도로 CPU 코어 수만큼 실행)과 히스토리에 있는 같은
+        영상/포맷의 파일을 찾는 색인을 처음 쓸 때 만듦"""
+        if self.transcoder is None:
+            from core.dedupe import DuplicateIndex
+            from core.transcode import TranscodePool
+            self.transcoder = TranscodePool()
+            self.duplicates = DuplicateIndex(self.db)
+    
+    def apply_concurrency(self):
+        """설정의 자동 모드를 다운로드 관리자에 적용"""
+        self.download_manager.set_auto_concurrency(
+            self.settings['auto_concurrency'],
+            self.settings['auto_min_downloads'],
+            self.settings['auto_max_downloads']
+        )
+    
+    def on_bandwidth_changed(self, download_id, rate_limit, weight):
+        """다운로드별 속도 제한과 가중치 변경 (진행 중인 전송에 바로 반영)"""
+        self.rate_limiter.configure(download_id, limit=rate_limit * 1000, weight=weight)
+    
+    def apply_rate_limits(self):
+        """설정의 전체/시간대별 속도 제한을 속도 제한기에 반영"""
+        self.rate_limiter.set_limit(self.settings['rate_limit'] * 1000)
+        try:
+            self.rate_limiter.set_schedule(parse_schedule(self.settings['rate_schedule']))
+        except ValueError:
+            self.rate_limiter.set_schedule([])
     
     def on_cancel_download(self, download_id):
         """다운로드 취소 요청 처리"""
-        # 다운로드 관리자에서 제거
+        # 다운로드 관리자에서 제거 (받은 구간은 같은 포맷을 다시 받을 때 이어받음)
         self.download_manager.remove_download(download_id)
+        self.progress_tracker.remove(download_id)
+        self.db.remove_pending_download(download_id)
         
         # 위젯 제거
         if download_id in self.active_downloads:
             widget = self.active_downloads.pop(download_id)
             self.active_downloads_layout.removeWidget(widget)
             widget.deleteLater()
+        self.update_queue_status()
     
+    @traced()
     def on_download_completed(self, info, download_id):
         """다운로드 완료 처리"""
-        # 히스토리에 추가
-        self.db.add_to_history(
-            info['video_id'],
-            info['title'],
-            info['url'],
-            info['file_path'],
-            info['thumbnail_path'],
-            info['format'],
-            info['resolution'],
-            info['file_size']
-        )
+        # 히스토리에 추가 (이미 같은 자리에 있던 파일은 기록이 있으므로 건너뜀)
+        history_id = None
+        if info.get('reused') != 'existing':
+            history_id = self.db.add_to_history(
+                info['video_id'],
+                info['title'],
+                info['url'],
+                info['file_path'],
+                info['thumbnail_path'],
+                info['format'],
+                info['resolution'],
+                info['file_size'],
+                author=info.get('author'),
+                itag=info.get('itag'),
+                content_hash=info.get('content_hash')
+            )
+        self.db.remove_pending_download(download_id)
         
         # 다운로드 관리자에서 완료 처리
         self.download_manager.download_completed(download_id)
+        self.progress_tracker.remove(download_id)
         
         # 위젯 제거
         if download_id in self.active_downloads:
             widget = self.active_downloads.pop(download_id)
             self.active_downloads_layout.removeWidget(widget)
             widget.deleteLater()
+        self.update_queue_status()
         
-        # 히스토리 새로고침
-        self.load_history()
+        # 새 행만 히스토리 목록에 추가
+        if history_id is not None:
+            self.history_model.add_item(history_id)
     
+    @traced()
     def on_download_error(self, error_msg, download_id):
         """다운로드 오류 처리"""
         # 오류 메시지 표시
         QMessageBox.warning(self, "다운로드 오류", f"다운로드 중 오류가 발생했습니다:\n{error_msg}")
+        self.db.remove_pending_download(download_id)
         
         # 다운로드 관리자에서 완료 처리
         self.download_manager.download_completed(download_id)
+        self.progress_tracker.remove(download_id)
         
         # 위젯 제거
         if download_id in self.active_downloads:
             widget = self.active_downloads.pop(download_id)
             self.active_downloads_layout.removeWidget(widget)
             widget.deleteLater()
+        self.update_queue_status()
     
+    @traced()
     def update_download_status(self, download_id, status):
         """다운로드 상태 업데이트"""
-        # 필요시 UI 업데이트
-        pass
+        widget = self.active_downloads.get(download_id)
+        if widget:
+            if status == 'queued':
+                widget.update_progress(0, "대기 중")
+            elif status == 'active':
+                widget.update_progress(0, "연결 중...")
+        if status == 'active' and widget:
+            self.progress_tracker.register(download_id)
+            if not self.progress_timer.isActive():
+                self.progress_timer.start()
+        self.update_queue_status()
+    
+    def update_transcode_status(self, download_id, status, percentage):
+        """다 받은 뒤 음성 변환 상태 표시 (다운로드 진행률 대신)"""
+        self.progress_tracker.remove(download_id)
+        widget = self.active_downloads.get(download_id)
+        if widget:
+            if status == 'queued':
+                widget.update_progress(100, "변환 대기 중")
+            elif percentage < 0:
+                widget.update_progress(100, "변환 중...")
+            else:
+                widget.update_progress(percentage, f"변환 중 {percentage}%")
+        self.update_queue_status()
     
+    @traced()
+    def report_progress(self):
+        """진행 상황 표본을 만들어 다운로드 위젯과 전체 상태 갱신 (REPORT_INTERVAL마다 호출)"""
+        snapshot = self.progress_tracker.sample()
+        for download_id, progress in snapshot['downloads'].items():
+            widget = self.active_downloads.get(download_id)
+            if widget is None or not progress['total']:
+                continue
+            text = (f"{progress['percentage']}% - {progress['downloaded']/1000000:.1f}MB/{progress['total']/1000000:.1f}MB"
+                    f" · {progress['speed']/1000000:.1f}MB/s · 남은 시간 {format_eta(progress['eta'])}")
+            widget.update_progress(progress['percentage'], text)
+        if not snapshot['downloads']:
+            self.progress_timer.stop()
+        self.update_queue_status()
+    
+    def update_queue_status(self):
+        """대기열 길이와 평균 대기 시간 표시"""
+        stats = self.download_manager.get_stats()
+        text = f"실행 중 {stats['running']}개 · 대기 {stats['queue_depth']}개"
+        if 'auto' in stats:
+            text += f" · 자동 {stats['auto']['limit']}개"
+        if stats['started']:
+            text += f" · 평균 대기 {stats['avg_wait']:.1f}초"
+        total = self.progress_tracker.snapshot()['total']
+        if total['active']:
+            text += f" · 전체 {total['speed']/1000000:.1f}MB/s, 남은 시간 {format_eta(total['eta'])}"
+        transcode = self.transcoder.stats() if self.transcoder else {'running': 0, 'queue_depth': 0}
+        if transcode['running'] or transcode['queue_depth']:
+            text += f" · 변환 중 {transcode['running']}개, 변환 대기 {transcode['queue_depth']}개"
+        self.queue_status_label.setText(text)
+    
+    @traced()
     def on_settings_updated(self, settings):
         """설정 업데이트 처리"""
         # 이전 설정과 비교하여 변경된 부분 처리
@@ -1256,6 +1881,30 @@ class MainWindow(QMainWindow):
             self.settings['max_concurrent_downloads'] = settings['max_concurrent_downloads']
             self.db.update_settings(max_concurrent_downloads=settings['max_concurrent_downloads'])
             self.download_manager.set_max_concurrent_downloads(settings['max_concurrent_downloads'])
+        
+        if (settings['auto_concurrency'] != self.settings['auto_concurrency']
+                or settings['auto_min_downloads'] != self.settings['auto_min_downloads']
+                or settings['auto_max_downloads'] != self.settings['auto_max_downloads']):
+            # 자동 모드 켜기/끄기와 범위 변경 (끄면 설정한 동시 다운로드 수로 돌아감)
+            for key in ('auto_concurrency', 'auto_min_downloads', 'auto_max_downloads'):
+                self.settings[key] = settings[key]
+            self.db.update_settings(auto_concurrency=settings['auto_concurrency'],
+                                    auto_min_downloads=settings['auto_min_downloads'],
+                                    auto_max_downloads=settings['auto_max_downloads'])
+            self.apply_concurrency()
+        
+        if (settings['rate_limit'] != self.settings['rate_limit']
+                or settings['rate_schedule'] != self.settings['rate_schedule']):
+            # 속도 제한 변경 (진행 중인 다운로드에도 바로 적용)
+            self.settings['rate_limit'] = settings['rate_limit']
+            self.settings['rate_schedule'] = settings['rate_schedule']
+            self.db.update_settings(rate_limit=settings['rate_limit'], rate_schedule=settings['rate_schedule'])
+            self.apply_rate_limits()
+        
+        if settings['fsync_policy'] != self.settings['fsync_policy']:
+            # 디스크 동기화 정책 변경
+            self.settings['fsync_policy'] = settings['fsync_policy']
+            self.db.update_settings(fsync_policy=settings['fsync_policy'])
     
     def open_file_location(self, directory):
         """파일 위치 열기"""
@@ -1266,7 +1915,7 @@ class MainWindow(QMainWindow):
     def remove_from_history(self, history_id):
         """히스토리에서 항목 제거"""
         self.db.remove_from_history(history_id)
-        self.load_history()
+        self.history_model.remove_item(history_id)
     
     def closeEvent(self, event):
         """창 닫기 이벤트 처리"""
@@ -1280,10 +1929,28 @@ class MainWindow(QMainWindow):
     
     def on_quit(self):
         """프로그램 종료"""
-        # 활성 다운로드 모두 취소
+        # 일괄 작업의 정보 가져오기 중지
+        for batch in self.batches:
+            batch.cancel()
+        
+        # 활성 다운로드 모두 중지 (중단 기록과 부분 파일은 다음 실행 때 이어받기 위해 남김)
         self.download_manager.clear_all()
         
+        # 진행 중인 변환 중지 (변환 전 파일은 남아 있음)
+        if self.transcoder:
+            self.transcoder.shutdown()
+        
+        # 측정값 서버 종료 (기록 파일에는 마지막 요약을 남김)
+        for exporter in self.metrics_exporters:
+            exporter.close()
+        from core.tracing import stop_tracing
+        stop_tracing()
+        if self.watchdog:
+            self.heartbeat_timer.stop()
+            self.watchdog.close()
+        
         # 데이터베이스 연결 종료
+        self.thumbnail_loader.shutdown()
         self.db.close()
         
         # 애플리케이션 종료
@@ -0,0 +1,25 @@
+import os
+import sys
+
+import pytest
+
+# 저장소 루트의 core, bench 패키지를 불러올 수 있도록 함
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench.fake_server import FakeYouTubeServer
+
+
+@pytest.fixture
+def server():
+    """Range 요청을 지원하는 가짜 YouTube/CDN 서버 (미디어 2MB)"""
+    with FakeYouTubeServer(media_size=2 * 1024 * 1024) as fake:
+        yield fake
+
+
+@pytest.fixture
+def plain_server():
+    """Range 요청을 지원하지 않는 서버"""
+    with FakeYouTubeServer(media_size=2 * 1024 * 1024, ranges=False) as fake:
+        yield fake
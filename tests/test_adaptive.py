@@ -0,0 +1,55 @@
+import os
+import subprocess
+
+import pytest
+
+from core import adaptive
+from core.adaptive import TRACK_SUFFIXES, AdaptiveDownloader
+from core.mux import ffmpeg_path
+from core.segmented import PART_SUFFIX
+
+# 1초짜리 작은 샘플 (DASH처럼 영상과 음성이 따로 있는 조각난 MP4, WebM)
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+SAMPLES = {
+    'mp4': ('video.mp4', 'audio.m4a'),
+    'webm': ('video.webm', 'audio.webm'),
+}
+
+pytestmark = pytest.mark.skipif(ffmpeg_path() is None, reason="ffmpeg가 필요합니다")
+
+
+def read(name):
+    with open(os.path.join(DATA, name), 'rb') as f:
+        return f.read()
+
+
+def stream_types(path):
+    """ffmpeg가 path에서 찾은 스트림 종류 목록 (예: ['Video', 'Audio'])"""
+    result = subprocess.run([ffmpeg_path(), '-hide_banner', '-nostdin', '-i', path],
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    types = []
+    for line in result.stderr.decode('utf-8', 'replace').splitlines():
+        if 'Stream #' in line:
+            types += [kind for kind in ('Video', 'Audio') if f": {kind}:" in line]
+    return types
+
+
+@pytest.mark.parametrize('streaming', [
+    pytest.param(True, marks=pytest.mark.skipif(os.name == 'nt', reason="파이프로 합치기는 POSIX 전용")),
+    False,
+], ids=['streaming', 'temp-files'])
+@pytest.mark.parametrize('container', sorted(SAMPLES))
+def test_tracks_are_muxed_into_one_file(server, tmp_path, monkeypatch, container, streaming):
+    monkeypatch.setattr(adaptive, 'STREAMING_MUX', streaming)
+    video, audio = (read(name) for name in SAMPLES[container])
+    video_url = server.add_file(f'video.{container}', video)
+    audio_url = server.add_file(f'audio.{container}', audio)
+    path = str(tmp_path / f'muxed.{container}')
+    
+    task = AdaptiveDownloader(video_url, len(video), audio_url, len(audio), path, container, resume_key=container)
+    assert task.download() == path
+    
+    assert sorted(stream_types(path)) == ['Audio', 'Video']
+    assert task.bytes_downloaded == len(video) + len(audio)
+    leftovers = [path + PART_SUFFIX] + [path + suffix for suffix in TRACK_SUFFIXES]
+    assert not any(os.path.exists(leftover) for leftover in leftovers)
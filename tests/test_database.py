@@ -0,0 +1,71 @@
+from core.database import Database
+
+
+def test_history_pages_follow_date_then_id(tmp_path):
+    db = Database(str(tmp_path / 'history.db'))
+    # 같은 초에 추가되어 download_date가 같은 행들은 id로 순서를 정함
+    added = [db.add_to_history(f"v{index}", f"title {index}", "url", f"/f{index}", None, 'mp4', '720p', 1)
+             for index in range(25)]
+    
+    ids = []
+    before = None
+    while True:
+        page = db.get_history_page(10, before)
+        if not page:
+            break
+        ids += [row[0] for row in page]
+        before = (page[-1][8], page[-1][0])
+    db.close()
+    
+    assert ids == sorted(added, reverse=True)
+
+
+def test_deep_history_page_costs_as_much_as_first(tmp_path):
+    db = Database(str(tmp_path / 'history.db'))
+    # 1초 간격으로 받은 기록 5000개
+    db.conn.executemany('''
+    INSERT INTO download_history (video_id, title, url, file_path, format, download_date)
+    VALUES (?, ?, 'url', ?, 'mp4', datetime('2024-01-01', ?))
+    ''', [(f"v{index}", f"title {index}", f"/f{index}", f"+{index} seconds") for index in range(5000)])
+    oldest = db.query("SELECT download_date, id FROM download_history ORDER BY download_date, id LIMIT 11")[-1]
+    
+    def steps(before):
+        """조회 하나를 실행하는 동안 SQLite가 실행한 명령 수 (100개 단위)"""
+        count = [0]
+        
+        def tick():
+            count[0] += 1
+        db.conn.set_progress_handler(tick, 100)
+        rows = db.get_history_page(10, before)
+        db.conn.set_progress_handler(None, 100)
+        assert len(rows) == 10
+        return count[0]
+    
+    # 다음 페이지는 인덱스에서 위치를 찾아 읽으므로 앞의 행 수와 관계없이 비용이 같아야 함
+    first = steps(None)
+    deepest = steps(tuple(oldest))
+    db.close()
+    
+    assert deepest <= first * 2 + 5
+
+
+def test_caches_write_while_history_commit_is_pending(tmp_path):
+    from core.metadata_cache import MetadataCache
+    from core.thumbnails import ThumbnailCache, HISTORY_SIZE
+    
+    # 커밋 스레드가 오래 기다리도록 해 히스토리 쓰기의 트랜잭션을 열어 둠
+    db = Database(str(tmp_path / 'history.db'), commit_interval=60)
+    metadata_cache = MetadataCache(db)
+    thumbnail_cache = ThumbnailCache(db, cache_dir=str(tmp_path / 'thumbnails'))
+    history_id = db.add_to_history("v1", "title", "url", "/f1", None, 'mp4', '720p', 1)
+    
+    # 같은 연결을 쓰므로 잠금을 기다리거나 "database is locked"가 나지 않아야 함
+    metadata_cache.put("v1", {'id': "v1", 'title': "title", 'formats': []})
+    thumbnail_cache.put("v1", b"jpeg")
+    assert db.get_history_item(history_id)[1] == "v1"
+    db.close()
+    
+    db = Database(str(tmp_path / 'history.db'))
+    assert MetadataCache(db).get("v1")['title'] == "title"
+    assert ThumbnailCache(db, cache_dir=str(tmp_path / 'thumbnails')).get("v1", HISTORY_SIZE) is not None
+    db.close()
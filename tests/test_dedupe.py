@@ -0,0 +1,88 @@
+from core import dedupe, download
+from core.dedupe import DuplicateIndex
+from core.integrity import tree_digest
+
+
+class FakeHistory:
+    """find_downloads만 있는 히스토리 (받아 둔 파일 하나)"""
+    def __init__(self, path, data):
+        self.record = (str(path), len(data), tree_digest(str(path)))
+    
+    def find_downloads(self, video_id, itag, format):
+        return [self.record]
+
+
+def make_index(tmp_path):
+    source = tmp_path / 'old' / 'video.mp4'
+    source.parent.mkdir()
+    source.write_bytes(b'video' * 1000)
+    return DuplicateIndex(FakeHistory(source, source.read_bytes())), source
+
+
+def test_reuse_keeps_unrelated_file_at_target(tmp_path):
+    index, source = make_index(tmp_path)
+    target = tmp_path / 'video.mp4'
+    target.write_bytes(b'another video')
+    
+    method, _, path = index.reuse('v1', 18, 'mp4', str(target))
+    
+    # 원래 있던 파일은 그대로 두고 다른 이름으로 만듦
+    assert target.read_bytes() == b'another video'
+    assert path == str(tmp_path / 'video (1).mp4')
+    assert open(path, 'rb').read() == source.read_bytes()
+    assert method in ('reflink', 'hardlink', 'copy')
+
+
+def test_reuse_keeps_identical_file_at_target(tmp_path):
+    index, source = make_index(tmp_path)
+    target = tmp_path / 'video.mp4'
+    target.write_bytes(source.read_bytes())
+    
+    assert index.reuse('v1', 18, 'mp4', str(target))[::2] == ('kept', str(target))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['old', 'video.mp4']
+
+
+def test_reuse_of_same_file_is_existing(tmp_path):
+    index, source = make_index(tmp_path)
+    
+    assert index.reuse('v1', 18, 'mp4', str(source))[::2] == ('existing', str(source))
+
+
+def cached_info(monkeypatch):
+    """캐시에 있는 것으로 할 영상 정보 (itag 18, 파일명 video.mp4)"""
+    info = {
+        'id': 'v1', 'title': 'title', 'author': 'author',
+        'video_formats': {'360p': [{'itag': 18, 'extension': 'mp4', 'resolution': '360p',
+                                    'default_filename': 'video.mp4', 'progressive': True}]},
+    }
+    monkeypatch.setattr(download, 'cached_video_info', lambda url, metadata_cache: info)
+    return info
+
+
+def test_reuse_before_queueing_uses_known_digest(tmp_path, monkeypatch):
+    cached_info(monkeypatch)
+    index, source = make_index(tmp_path)
+    index.remember(str(source), index.find('v1', 18, 'mp4')[1])
+    completed = []
+    job = download.DownloadJob('https://youtu.be/v1', 18, str(tmp_path / 'new'), metadata_cache=object(),
+                               on_completed=completed.append, duplicates=index)
+    
+    assert job.reuse_cached()
+    assert completed == [job.result]
+    assert job.result['reused'] in ('reflink', 'hardlink', 'copy')
+    assert (tmp_path / 'new' / 'video.mp4').read_bytes() == source.read_bytes()
+
+
+def test_reuse_before_queueing_does_not_read_files(tmp_path, monkeypatch):
+    cached_info(monkeypatch)
+    index, source = make_index(tmp_path)
+    
+    def read(path, *args):
+        raise AssertionError("대기열에 넣기 전에 파일을 읽음")
+    monkeypatch.setattr(dedupe, 'tree_digest', read)
+    job = download.DownloadJob('https://youtu.be/v1', 18, str(tmp_path / 'new'), metadata_cache=object(),
+                               duplicates=index)
+    
+    # 해시를 모르는 파일은 작업이 실행될 때 확인
+    assert not job.reuse_cached()
+    assert not (tmp_path / 'new').exists()
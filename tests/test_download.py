@@ -0,0 +1,34 @@
+from core.download import DownloadJob
+from core.transcode import TranscodeJob
+
+
+class RecordingPool:
+    """TranscodePool 대신 넣어 추가/취소된 작업 키를 기록"""
+    def __init__(self):
+        self.submitted = []
+        self.cancelled = []
+    
+    def submit(self, job_id, job, on_start=None):
+        self.submitted.append(job_id)
+    
+    def cancel(self, job_id):
+        self.cancelled.append(job_id)
+
+
+def test_transcodes_to_same_file_do_not_collide(tmp_path):
+    pool = RecordingPool()
+    source = str(tmp_path / 'song.m4a')
+    jobs = []
+    for download_id in ('first', 'second'):
+        job = DownloadJob('https://youtu.be/x', 140, str(tmp_path), 'song.m4a', rate_key=download_id,
+                          convert='mp3', transcoder=pool)
+        job.transcode = TranscodeJob(source, 'mp3')
+        job._start_transcode()
+        jobs.append(job)
+    
+    jobs[0].cancel()
+    
+    # 두 작업은 같은 파일(song.mp3)로 변환하지만 대기열에서는 다운로드 ID로 구분됨
+    assert pool.submitted == ['first', 'second']
+    assert pool.cancelled == ['first']
+    assert not jobs[1].transcode.cancelled
@@ -0,0 +1,55 @@
+import os
+import stat
+import sys
+import threading
+
+import pytest
+
+from core.mux import FFMPEG_ENV, StreamMuxer
+
+# 입력을 읽기 전에 오류 출력을 파이프 버퍼(보통 64KB)보다 많이 쓰고, 두 입력을 끝까지 읽은 뒤
+# 읽은 크기를 출력 파일에 쓰는 가짜 ffmpeg
+NOISY_FFMPEG = f"""#!{sys.executable}
+import os
+import sys
+sys.stderr.write("dts warning\\n" * 100000)
+sys.stderr.flush()
+sizes = []
+for arg in sys.argv:
+    if arg.startswith('pipe:'):
+        size = 0
+        while True:
+            data = os.read(int(arg[5:]), 65536)
+            if not data:
+                break
+            size += len(data)
+        sizes.append(str(size))
+with open(sys.argv[-1], 'w') as f:
+    f.write(' '.join(sizes))
+"""
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="파이프로 합치기는 POSIX 전용")
+def test_large_stderr_does_not_block_inputs(tmp_path, monkeypatch):
+    ffmpeg = tmp_path / 'ffmpeg'
+    ffmpeg.write_text(NOISY_FFMPEG)
+    ffmpeg.chmod(ffmpeg.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv(FFMPEG_ENV, str(ffmpeg))
+    output = tmp_path / 'video.mp4'
+    muxer = StreamMuxer(str(output))
+    
+    def feed():
+        muxer.video.write(b'v' * 1024 * 1024)
+        muxer.video.close()
+        muxer.audio.write(b'a' * 1024 * 1024)
+        muxer.finish()
+    
+    worker = threading.Thread(target=feed, daemon=True)
+    worker.start()
+    worker.join(30)
+    if worker.is_alive():
+        muxer.kill()
+    
+    assert not worker.is_alive(), "ffmpeg의 오류 출력을 기다리며 멈춤"
+    assert output.read_text() == f"{1024 * 1024} {1024 * 1024}"
+    assert muxer.stderr.startswith("dts warning")
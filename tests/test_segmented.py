@@ -0,0 +1,207 @@
+import os
+import threading
+import zlib
+
+import pytest
+
+from bench.fake_server import FakeYouTubeServer
+from core import segmented
+from core.integrity import tree_digest
+from core.journal import SegmentJournal
+from core.segmented import DownloadCancelled, SegmentedDownloader, partial_paths, plan_segments
+
+# 작은 파일에서도 블록과 구간이 여러 개 생기도록 줄인 크기
+BLOCK = 128 * 1024
+RANGE = 256 * 1024
+
+VIDEO = 'seg'
+ITAG = 22
+RESUME_KEY = f"{VIDEO}:{ITAG}"
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(segmented, 'BLOCK_SIZE', BLOCK)
+    monkeypatch.setattr(segmented, 'REQUEST_RANGE_SIZE', RANGE)
+
+
+def expected(server):
+    size = server.format_size(ITAG)
+    return server.media(VIDEO, ITAG, 0, size - 1)
+
+
+def downloader(server, path, **kwargs):
+    kwargs.setdefault('resume_key', RESUME_KEY)
+    return SegmentedDownloader(server.media_url(VIDEO, ITAG), path, server.format_size(ITAG), **kwargs)
+
+
+def write_partial(server, path, blocks, corrupt=()):
+    """blocks의 블록만 받은 상태의 부분 파일과 저널 (corrupt 블록은 저널에만 맞는 체크섬을 남기고 내용을 망가뜨림)"""
+    data = expected(server)
+    part_path, journal_path = partial_paths(path)
+    journal = SegmentJournal(journal_path, RESUME_KEY, len(data), BLOCK)
+    content = bytearray(len(data))
+    for index in blocks:
+        start, end = journal.block_range(index)
+        content[start:end + 1] = data[start:end + 1]
+        journal.mark_done(index, zlib.crc32(data[start:end + 1]))
+    for index in corrupt:
+        start = journal.block_range(index)[0]
+        content[start] ^= 0xff
+    with open(part_path, 'wb') as f:
+        f.write(content)
+    journal.save()
+    return journal
+
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def test_plan_segments_splits_longest_missing_run(tmp_path):
+    journal = SegmentJournal(str(tmp_path / 'j'), 'key', 8 * BLOCK, BLOCK)
+    for index in (2, 3):
+        journal.mark_done(index, 0)
+    
+    plan = plan_segments(journal, 4)
+    
+    assert [(segment.start // BLOCK, (segment.end + 1) // BLOCK - 1) for segment in plan] == [(0, 0), (1, 1), (4, 5), (6, 7)]
+    assert [segment.index for segment in plan] == [0, 1, 2, 3]
+
+
+def test_plan_segments_never_splits_a_block(tmp_path):
+    journal = SegmentJournal(str(tmp_path / 'j'), 'key', 3 * BLOCK - 10, BLOCK)
+    
+    plan = plan_segments(journal, 8)
+    
+    assert [(segment.start, segment.end) for segment in plan] == [
+        (0, BLOCK - 1), (BLOCK, 2 * BLOCK - 1), (2 * BLOCK, 3 * BLOCK - 11)]
+
+
+def test_missing_ranges_merges_adjacent_blocks(tmp_path):
+    journal = SegmentJournal(str(tmp_path / 'j'), 'key', 10 * BLOCK, BLOCK)
+    for index in (0, 4, 5, 9):
+        journal.mark_done(index, 0)
+    
+    assert journal.missing_ranges() == [(1, 3), (6, 8)]
+    assert plan_segments(journal, 1)[0].start == BLOCK
+
+
+def test_segments_merge_into_one_file(server, tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    task = downloader(server, path, segments=4)
+    
+    assert task.download() == path
+    
+    assert read(path) == expected(server)
+    assert task.content_hash == tree_digest(path, BLOCK)
+    assert not os.path.exists(path + segmented.PART_SUFFIX)
+    assert not os.path.exists(path + segmented.JOURNAL_SUFFIX)
+
+
+def test_resume_after_cancel_keeps_completed_blocks(server, tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    total = server.format_size(ITAG)
+    
+    def cancel_halfway(downloaded, total_size):
+        if downloaded >= total_size // 2:
+            first.cancel()
+    first = downloader(server, path, segments=4, progress_callback=cancel_halfway)
+    with pytest.raises(DownloadCancelled):
+        first.download()
+    
+    part_path, journal_path = partial_paths(path)
+    assert os.path.getsize(part_path) == total
+    journal = SegmentJournal.load(journal_path, RESUME_KEY, total, BLOCK)
+    assert 0 < journal.completed_bytes() < total
+    
+    second = downloader(server, path, segments=4)
+    second.download()
+    
+    assert second.resumed_bytes == journal.completed_bytes()
+    assert second.bytes_downloaded - second.resumed_bytes == total - journal.completed_bytes()
+    assert read(path) == expected(server)
+    assert second.content_hash == tree_digest(path, BLOCK)
+    assert not os.path.exists(journal_path)
+
+
+def test_resume_from_half_written_part(server, tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    total = server.format_size(ITAG)
+    half = list(range(total // BLOCK // 2))
+    write_partial(server, path, half)
+    
+    task = downloader(server, path, segments=2)
+    task.download()
+    
+    assert task.resumed_bytes == len(half) * BLOCK
+    assert task.bytes_downloaded == total
+    assert read(path) == expected(server)
+
+
+def test_crc_mismatch_fetches_block_again(server, tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    total = server.format_size(ITAG)
+    write_partial(server, path, [0, 1, 2, 3], corrupt=[1])
+    
+    task = downloader(server, path, segments=2)
+    task.download()
+    
+    # 망가진 블록 1은 완료로 인정하지 않고 다시 받음
+    assert task.resumed_bytes == 3 * BLOCK
+    assert task.bytes_downloaded - task.resumed_bytes == total - 3 * BLOCK
+    assert read(path) == expected(server)
+    assert task.content_hash == tree_digest(path, BLOCK)
+
+
+def test_journal_of_other_file_is_ignored(server, tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    write_partial(server, path, [0, 1])
+    
+    task = downloader(server, path, resume_key='other:22')
+    task.download()
+    
+    assert task.resumed_bytes == 0
+    assert read(path) == expected(server)
+
+
+def test_single_connection_without_range_support(plain_server, tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    task = downloader(plain_server, path, segments=4)
+    
+    assert not task.supports_range()
+    task.download()
+    
+    assert task.journal is None
+    assert read(path) == expected(plain_server)
+    assert task.content_hash == tree_digest(path, BLOCK)
+    assert not os.path.exists(path + segmented.PART_SUFFIX)
+    assert not os.path.exists(path + segmented.JOURNAL_SUFFIX)
+
+
+def test_short_body_without_length_is_not_committed(tmp_path):
+    path = str(tmp_path / 'video.mp4')
+    with FakeYouTubeServer(media_size=2 * 1024 * 1024, ranges=False, cut_after=1024 * 1024) as fake:
+        task = downloader(fake, path)
+        
+        # 연결이 닫혀 응답이 끝났어도 알려진 크기보다 짧으면 실패하고 완성된 파일을 만들지 않음
+        with pytest.raises(IOError):
+            task.download()
+    
+    assert not os.path.exists(path)
+    assert os.path.exists(path + segmented.PART_SUFFIX)
+
+
+def test_disk_work_runs_off_the_network_thread(server, tmp_path, monkeypatch):
+    threads = set()
+    write = SegmentedDownloader._write
+    
+    def record(self, f, segment, chunk):
+        threads.add(threading.current_thread().name)
+        return write(self, f, segment, chunk)
+    monkeypatch.setattr(SegmentedDownloader, '_write', record)
+    
+    downloader(server, str(tmp_path / 'video.mp4'), segments=4).download()
+    
+    assert threads and all(name.startswith('disk') for name in threads)
@@ -0,0 +1,40 @@
+import os
+import stat
+import sys
+import threading
+
+import pytest
+
+from core.mux import FFMPEG_ENV
+from core.transcode import TranscodeJob
+
+# 진행 상황보다 오류 출력을 먼저 파이프 버퍼(보통 64KB)보다 많이 쓰고 실패하는 가짜 ffmpeg
+NOISY_FFMPEG = f"""#!{sys.executable}
+import sys
+sys.stderr.write("warning\\n" * 100000)
+sys.stderr.flush()
+sys.stdout.write("out_time_us=500000\\nprogress=end\\n")
+sys.exit(1)
+"""
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="가짜 ffmpeg 스크립트는 POSIX 전용")
+def test_large_stderr_does_not_deadlock(tmp_path, monkeypatch):
+    ffmpeg = tmp_path / 'ffmpeg'
+    ffmpeg.write_text(NOISY_FFMPEG)
+    ffmpeg.chmod(ffmpeg.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv(FFMPEG_ENV, str(ffmpeg))
+    source = tmp_path / 'song.mp4'
+    source.write_bytes(b'\0' * 1024)
+    
+    errors = []
+    job = TranscodeJob(str(source), 'mp3', duration=1, on_error=errors.append)
+    job.source_ready()
+    worker = threading.Thread(target=job.run, daemon=True)
+    worker.start()
+    worker.join(30)
+    
+    assert not worker.is_alive(), "ffmpeg의 오류 출력을 기다리며 멈춤"
+    assert len(errors) == 1 and errors[0].startswith("ffmpeg 오류: warning")
+    assert job.percentage == 100
+    assert source.exists() and not (tmp_path / 'song.mp3.part').exists()
@@ -0,0 +1,123 @@
+import asyncio
+import concurrent.futures
+import socket
+import threading
+
+import pytest
+
+from core.transport import Transport, open_tunnel
+
+
+class RelayProxy:
+    """받은 요청 줄을 기록하고 모든 연결을 target으로 넘기는 프록시 (CONNECT면 터널을 연 뒤 넘김)"""
+    def __init__(self, target):
+        self.target = target
+        self.request_lines = []
+        self.listener = socket.create_server(('127.0.0.1', 0))
+        self.url = f"http://127.0.0.1:{self.listener.getsockname()[1]}"
+        threading.Thread(target=self._accept, daemon=True).start()
+    
+    def _accept(self):
+        while True:
+            try:
+                client, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(client,), daemon=True).start()
+    
+    def _handle(self, client):
+        head = b''
+        while b'\r\n\r\n' not in head:
+            data = client.recv(4096)
+            if not data:
+                client.close()
+                return
+            head += data
+        self.request_lines.append(head.split(b'\r\n', 1)[0].decode('latin-1'))
+        upstream = socket.create_connection(self.target)
+        if head.startswith(b'CONNECT '):
+            client.sendall(b'HTTP/1.1 200 Connection established\r\n\r\n')
+        else:
+            upstream.sendall(head)
+        threading.Thread(target=self._pipe, args=(upstream, client), daemon=True).start()
+        self._pipe(client, upstream)
+    
+    @staticmethod
+    def _pipe(source, target):
+        try:
+            while True:
+                data = source.recv(65536)
+                if not data:
+                    break
+                target.sendall(data)
+        except OSError:
+            pass
+        finally:
+            # 다른 방향에서 recv()로 기다리는 스레드도 깨어나도록 shutdown 후 닫음
+            for sock in (source, target):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                sock.close()
+    
+    def close(self):
+        self.listener.close()
+
+
+@pytest.fixture
+def proxy(server):
+    relay = RelayProxy(server.httpd.server_address[:2])
+    yield relay
+    relay.close()
+
+
+def test_http_requests_go_through_proxy(server, proxy, monkeypatch):
+    monkeypatch.setenv('http_proxy', proxy.url)
+    monkeypatch.delenv('no_proxy', raising=False)
+    monkeypatch.delenv('NO_PROXY', raising=False)
+    url = server.watch_url('abc')
+    
+    assert b'ytInitialPlayerResponse' in Transport().fetch(url)
+    # 프록시에는 전체 URL로 요청
+    assert proxy.request_lines == [f"GET {url} HTTP/1.1"]
+
+
+def test_no_proxy_hosts_connect_directly(server, proxy, monkeypatch):
+    monkeypatch.setenv('http_proxy', proxy.url)
+    monkeypatch.setenv('no_proxy', '127.0.0.1')
+    
+    Transport().fetch(server.watch_url('abc'))
+    
+    assert proxy.request_lines == []
+
+
+def test_tunnel_carries_requests_to_target(server, proxy):
+    async def get():
+        proxy_port = int(proxy.url.rsplit(':', 1)[1])
+        sock = await open_tunnel('127.0.0.1', proxy_port, 'example.com', 443)
+        reader, writer = await asyncio.open_connection(sock=sock)
+        writer.write(b'GET /watch?v=abc HTTP/1.1\r\nHost: example.com\r\nConnection: close\r\n\r\n')
+        body = await reader.read()
+        writer.close()
+        return body
+    
+    transport = Transport()
+    
+    assert b'ytInitialPlayerResponse' in transport.run(get(), 10)
+    assert proxy.request_lines == ["CONNECT example.com:443 HTTP/1.1"]
+
+
+def test_run_timeout_releases_connection(server, monkeypatch):
+    monkeypatch.delenv('http_proxy', raising=False)
+    transport = Transport(per_host_limit=1)
+    url = server.watch_url('abc')
+    
+    async def hold():
+        async with await transport.open('GET', url):
+            await asyncio.sleep(60)
+    
+    with pytest.raises(concurrent.futures.TimeoutError):
+        transport.run(hold(), 0.5)
+    # 시간이 지난 코루틴은 취소되어 하나뿐인 호스트 자리를 돌려줌
+    assert b'ytInitialPlayerResponse' in transport.fetch(url, timeout=5)